@@ -0,0 +1,125 @@
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import jwt
+
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# What the user cache keeps: identity for logins, stats for the matchmaking rating
+USER_PROJECTION = {'_id': 0, 'id': 1, 'username': 1, 'stats': 1}
+
+TOKEN_ALGORITHM = 'HS256'
+TOKEN_TTL = int(os.environ.get('AUTH_TOKEN_TTL', 7 * 24 * 3600))  # Seconds
+
+_secret = os.environ.get('AUTH_SECRET')
+if not _secret:
+    # Tokens still work, but only on this process and until it restarts
+    logger.warning('AUTH_SECRET is not set, using a random per-process secret')
+    _secret = secrets.token_urlsafe(32)
+
+
+def issue_token(user_id: str, username: str, ttl: int = TOKEN_TTL) -> str:
+    """Signed session token that any node sharing AUTH_SECRET can verify offline"""
+    now = int(time.time())
+    claims = {'sub': user_id, 'name': username, 'iat': now, 'exp': now + ttl}
+    return jwt.encode(claims, _secret, algorithm=TOKEN_ALGORITHM)
+
+
+def verify_token(token: str) -> Optional[dict]:
+    """Claims of a valid token ({'sub', 'name', ...}), or None if invalid or expired"""
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, _secret, algorithms=[TOKEN_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+
+
+class UserCache:
+    """Small LRU of recently seen users, by username"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, username: str) -> Optional[dict]:
+        user = self.entries.get(username)
+        if user is not None:
+            self.entries.move_to_end(username)
+        return user
+
+    def put(self, username: str, user: dict):
+        self.entries[username] = user
+        self.entries.move_to_end(username)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def forget(self, username: str):
+        self.entries.pop(username, None)
+
+
+class UserStore:
+    """Users collection access with one round trip per unknown user.
+
+    A unique index on username makes the upsert atomic, so concurrent
+    logins of the same new user cannot create duplicates.
+    """
+
+    def __init__(self, db, collection: str = 'users', cache_size: int = 10000):
+        self.db = db
+        self.collection_name = collection
+        self.cache = UserCache(cache_size)
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        # Resolved on use, so a lazy database connects on the first login
+        return self.db[self.collection_name]
+
+    async def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            await self.collection.create_index('username', unique=True)
+        except Exception as e:
+            # Existing duplicate usernames: keep serving, the upsert still finds one of them
+            logger.error(f'Error creating unique username index: {e}')
+        self._indexes_ready = True
+
+    async def get_or_create(self, username: str) -> Tuple[dict, bool]:
+        """(user document, created) for username"""
+        cached = self.cache.get(username)
+        if cached is not None:
+            return cached, False
+        from pymongo import ReturnDocument
+        await self._ensure_indexes()
+        new_user = User(username=username).dict()
+        user = await self.collection.find_one_and_update(
+            {'username': username},
+            {'$setOnInsert': new_user},
+            upsert=True,
+            projection=USER_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        self.cache.put(username, user)
+        return user, user['id'] == new_user['id']
+
+    async def find(self, username: str) -> Optional[dict]:
+        """Cached user document, or None for guests without one"""
+        cached = self.cache.get(username)
+        if cached is not None:
+            return cached
+        user = await self.collection.find_one({'username': username}, USER_PROJECTION)
+        if user is not None:
+            self.cache.put(username, user)
+        return user
+
+    def forget(self, username: str):
+        """Drop a cached user whose document changed (e.g. stats after a match)"""
+        self.cache.forget(username)
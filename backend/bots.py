@@ -0,0 +1,134 @@
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Las 9 combinaciones posibles de teclas, compartidas por todos los bots.
+# El engine solo lee estos dicts, nunca los modifica.
+_KEY_TABLE = [
+    {**({'a': True} if sx < 0 else {'d': True} if sx > 0 else {}),
+     **({'w': True} if sy < 0 else {'s': True} if sy > 0 else {})}
+    for sx in (-1, 0, 1) for sy in (-1, 0, 1)
+]
+_SECTOR = 0.383  # sin(22.5°): components below this fraction do not press a key
+
+
+def new_bot_id() -> str:
+    """Bot ids never collide with Socket.IO sids"""
+    return f'bot_{uuid.uuid4().hex[:8]}'
+
+
+def is_bot(player_id: str) -> bool:
+    return player_id.startswith('bot_')
+
+
+class BotDirector:
+    """Computer-controlled players for every room of this process.
+
+    Decisions for all bots in all engines are computed together in one
+    NumPy pass and fed to each engine through update_player_input, exactly
+    like inputs coming from a socket.
+    """
+
+    def __init__(self):
+        self.bots: Dict[str, List[str]] = {}  # room_id -> bot player ids
+        self.engines = {}  # room_id -> GameEngine
+
+    def add_room(self, engine, bot_ids: List[str]):
+        """Start driving the given bots inside an engine"""
+        bot_ids = [b for b in bot_ids if b in engine.players]
+        if bot_ids:
+            self.engines[engine.room_id] = engine
+            self.bots[engine.room_id] = bot_ids
+
+    def remove_room(self, room_id: str):
+        self.engines.pop(room_id, None)
+        self.bots.pop(room_id, None)
+
+    def remove_bot(self, room_id: str, bot_id: str):
+        if bot_id in self.bots.get(room_id, []):
+            self.bots[room_id].remove(bot_id)
+            if not self.bots[room_id]:
+                self.remove_room(room_id)
+
+    @property
+    def bot_count(self) -> int:
+        return sum(len(ids) for ids in self.bots.values())
+
+    def _gather(self) -> Tuple[list, 'np.ndarray']:
+        """Flatten bot, ball and field state of every room into one array"""
+        import numpy as np  # Imported on first use: nodes without bots never load it
+        targets = []
+        rows = []
+        for room_id, bot_ids in self.bots.items():
+            engine = self.engines[room_id]
+            if engine.paused:
+                continue
+            ball = engine.ball
+            goals = engine.map.goal_centers
+            for index, bot_id in enumerate(bot_ids):
+                player = engine.players.get(bot_id)
+                if player is None:
+                    continue
+                team = player['team']
+                targets.append((engine, bot_id))
+                rows.append((
+                    player['x'], player['y'], ball['x'], ball['y'],
+                    *goals['blue' if team == 'red' else 'red'],  # Goal to attack
+                    *goals[team],  # Goal to defend
+                    float(index % 2),  # 0 = atacante, 1 = defensor
+                    engine.rules.contact_distance, engine.rules.kick_distance,
+                ))
+        return targets, np.array(rows, dtype=np.float64).reshape(-1, 11)
+
+    def step(self):
+        """Decide and apply inputs for every bot in one vectorized pass"""
+        import numpy as np
+        targets, s = self._gather()
+        if not targets:
+            return 0
+
+        px, py, bx, by = s[:, 0], s[:, 1], s[:, 2], s[:, 3]
+        goal_x, goal_y, own_goal_x, own_goal_y = s[:, 4], s[:, 5], s[:, 6], s[:, 7]
+        defender, contact, kick_distance = s[:, 8], s[:, 9], s[:, 10]
+
+        # Unit vector from the ball to the opponent goal
+        gx = goal_x - bx
+        gy = goal_y - by
+        g_len = np.hypot(gx, gy) + 1e-9
+        gx /= g_len
+        gy /= g_len
+
+        # Attackers go behind the ball, defenders sit between ball and own goal
+        attack_tx = bx - gx * (contact + 4)
+        attack_ty = by - gy * (contact + 4)
+        defend_tx = own_goal_x + (bx - own_goal_x) * 0.3
+        defend_ty = own_goal_y + (by - own_goal_y) * 0.5
+        tx = np.where(defender > 0, defend_tx, attack_tx)
+        ty = np.where(defender > 0, defend_ty, attack_ty)
+
+        # Once in position (or the ball is close) go straight for the ball
+        to_ball_x = bx - px
+        to_ball_y = by - py
+        ball_dist = np.hypot(to_ball_x, to_ball_y) + 1e-9
+        in_position = np.hypot(tx - px, ty - py) < 10
+        chase = ((defender == 0) & in_position) | (ball_dist < contact * 2.5)
+        dx = np.where(chase, to_ball_x, tx - px)
+        dy = np.where(chase, to_ball_y, ty - py)
+
+        # Quantize the direction to the 8-way keyboard
+        d_len = np.hypot(dx, dy) + 1e-9
+        sx = np.where(dx > _SECTOR * d_len, 1, np.where(dx < -_SECTOR * d_len, -1, 0))
+        sy = np.where(dy > _SECTOR * d_len, 1, np.where(dy < -_SECTOR * d_len, -1, 0))
+        sx = np.where(d_len < 4, 0, sx)
+        sy = np.where(d_len < 4, 0, sy)
+        key_codes = (sx + 1) * 3 + (sy + 1)
+
+        # Kick when touching the ball and it would travel towards the opponent goal
+        facing = (to_ball_x * gx + to_ball_y * gy) / ball_dist
+        kicks = (ball_dist < kick_distance) & (facing > 0.5)
+
+        for (engine, bot_id), code, kick in zip(targets, key_codes.tolist(), kicks.tolist()):
+            engine.update_player_input(bot_id, _KEY_TABLE[code], kick, False)
+        return len(targets)
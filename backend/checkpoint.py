@@ -0,0 +1,34 @@
+import json
+import struct
+import zlib
+
+# Formato binario: MAGIC | version (uint8) | JSON comprimido con zlib
+CHECKPOINT_MAGIC = b'HXCK'
+CHECKPOINT_VERSION = 1
+_HEADER = struct.Struct('>4sB')
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint cannot be decoded or has an unknown version"""
+
+
+def encode_checkpoint(state: dict) -> bytes:
+    """Pack an engine checkpoint dict into the compact versioned format"""
+    payload = json.dumps(state, separators=(',', ':')).encode()
+    # Nivel 1: los checkpoints son pequeños y hay que generarlos rápido al apagar
+    return _HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION) + zlib.compress(payload, 1)
+
+
+def decode_checkpoint(blob: bytes) -> dict:
+    """Unpack a checkpoint produced by encode_checkpoint"""
+    if len(blob) < _HEADER.size:
+        raise CheckpointError('Checkpoint too short')
+    magic, version = _HEADER.unpack_from(blob)
+    if magic != CHECKPOINT_MAGIC:
+        raise CheckpointError('Not an engine checkpoint')
+    if version != CHECKPOINT_VERSION:
+        raise CheckpointError(f'Unsupported checkpoint version {version}')
+    try:
+        return json.loads(zlib.decompress(blob[_HEADER.size:]))
+    except (zlib.error, ValueError) as e:
+        raise CheckpointError(f'Corrupt checkpoint: {e}')
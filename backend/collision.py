@@ -0,0 +1,89 @@
+import math
+from typing import Optional, Tuple
+
+# Swept-circle helpers. A moving circle of radius r against a static shape is
+# tested as a moving point (the circle centre) against the shape grown by r.
+# Every function returns (t, nx, ny) where t in [0, 1] is the fraction of the
+# displacement (dx, dy) travelled before contact and (nx, ny) is the unit
+# contact normal pointing towards the moving circle, or None if there is no hit.
+
+Hit = Optional[Tuple[float, float, float]]
+
+
+def sweep_circle(px: float, py: float, dx: float, dy: float,
+                 cx: float, cy: float, radius: float) -> Hit:
+    """Moving point against a static circle (only when approaching from outside)"""
+    fx = px - cx
+    fy = py - cy
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    c = fx * fx + fy * fy - radius * radius
+    if a == 0 or b >= 0 or c < 0:
+        # Not moving, moving away, or already overlapping (resolved elsewhere)
+        return None
+    disc = b * b - a * c
+    if disc < 0:
+        return None
+    t = (-b - math.sqrt(disc)) / a
+    if t > 1:
+        return None
+    t = max(t, 0.0)
+    hx = fx + dx * t
+    hy = fy + dy * t
+    length = math.sqrt(hx * hx + hy * hy) or 1.0
+    return t, hx / length, hy / length
+
+
+def sweep_capsule(px: float, py: float, dx: float, dy: float, segment, radius: float) -> Hit:
+    """Moving point against a segment grown by radius.
+
+    segment is (ax, ay, bx, by, ux, uy, length) with (ux, uy) the unit
+    direction from A to B, as produced by the map compiler. A point already
+    inside the flat part and moving deeper reports a contact at t = 0.
+    """
+    ax, ay, bx, by, ux, uy, length = segment
+    # Normal of the segment line (left of A->B)
+    nx, ny = -uy, ux
+    s0 = (px - ax) * nx + (py - ay) * ny
+    side = 1.0 if s0 >= 0 else -1.0
+    approach = (dx * nx + dy * ny) * side
+    best = None
+
+    if approach < 0:
+        if abs(s0) >= radius:
+            t = (side * radius - s0) / (dx * nx + dy * ny)
+        else:
+            t = 0.0
+        if t <= 1:
+            hx = px + dx * t
+            hy = py + dy * t
+            u = (hx - ax) * ux + (hy - ay) * uy
+            if 0 <= u <= length:
+                best = (t, side * nx, side * ny)
+
+    # Rounded ends
+    for ex, ey in ((ax, ay), (bx, by)):
+        hit = sweep_circle(px, py, dx, dy, ex, ey, radius)
+        if hit and (best is None or hit[0] < best[0]):
+            best = hit
+    return best
+
+
+def sweep_line_crossing(px: float, py: float, dx: float, dy: float, segment,
+                        nx: float, ny: float, offset: float) -> Optional[float]:
+    """Fraction of (dx, dy) at which a point gets closer than offset to a segment
+    line from its (nx, ny) side, with the crossing inside the segment extent.
+
+    Used for goal lines: the ball scores once its leading edge crosses them.
+    """
+    ax, ay, bx, by, ux, uy, length = segment
+    s0 = (px - ax) * nx + (py - ay) * ny
+    ds = dx * nx + dy * ny
+    if s0 >= offset:
+        if ds >= 0 or s0 + ds >= offset:
+            return None
+        t = (offset - s0) / ds
+    else:
+        t = 0.0
+    u = (px + dx * t - ax) * ux + (py + dy * t - ay) * uy
+    return t if 0 <= u <= length else None
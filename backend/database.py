@@ -0,0 +1,68 @@
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LazyDatabase:
+    """MongoDB database whose client is created on first use.
+
+    Importing the server (and spawning workers) does not import Motor,
+    read MONGO_URL or open a connection pool; the first collection access
+    does. Collections are reached as db.users or db['users'], like a
+    Motor database.
+    """
+
+    def __init__(self, url: str = None, name: str = None,
+                 max_pool_size: int = None, min_pool_size: int = None):
+        self._url = url
+        self._name = name
+        self._max_pool_size = max_pool_size
+        self._min_pool_size = min_pool_size
+        self._client = None
+        self._database = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            started = time.perf_counter()
+            from motor.motor_asyncio import AsyncIOMotorClient
+            url = self._url or os.environ.get('MONGO_URL')
+            if not url:
+                raise RuntimeError('MONGO_URL is not set')
+            self._client = AsyncIOMotorClient(
+                url,
+                maxPoolSize=self._max_pool_size or int(os.environ.get('MONGO_MAX_POOL', 50)),
+                minPoolSize=self._min_pool_size or int(os.environ.get('MONGO_MIN_POOL', 0)),
+                serverSelectionTimeoutMS=int(os.environ.get('MONGO_TIMEOUT_MS', 5000))
+            )
+            logger.info(f'MongoDB client created in {(time.perf_counter() - started) * 1000:.1f} ms')
+        return self._client
+
+    @property
+    def database(self):
+        if self._database is None:
+            name = self._name or os.environ.get('DB_NAME')
+            if not name:
+                raise RuntimeError('DB_NAME is not set')
+            self._database = self.client[name]
+        return self._database
+
+    @property
+    def connected(self) -> bool:
+        """Whether the client has been created"""
+        return self._client is not None
+
+    def __getattr__(self, name):
+        # Only called for names not found on the instance: collections
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.database, name)
+
+    def __getitem__(self, name):
+        return self.database[name]
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
@@ -0,0 +1,92 @@
+import time
+from typing import Dict, Optional, Tuple
+
+# Default limits per event: (events per second, burst)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'player_input': (60, 20),  # Key repeat sends ~30/s while a key is held
+    'chat_message': (2, 5),
+}
+
+
+class TokenBucket:
+    """Classic token bucket: rate tokens per second, up to burst tokens"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class FloodGuard:
+    """Per-sid, per-event rate limits, checked before any session lookup.
+
+    Inputs over the limit are not lost: they are merged into one pending input
+    per sid (latest keys, kick/push kept if any dropped event had them) that
+    the game loop applies on its next tick.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.buckets: Dict[str, Dict[str, TokenBucket]] = {}  # sid -> event -> bucket
+        self.pending_inputs: Dict[str, dict] = {}  # sid -> coalesced input
+        self.dropped: Dict[str, int] = {}  # event -> events rejected since start
+        self.coalesced = 0
+
+    def allow(self, sid: str, event: str) -> bool:
+        """Whether sid may send one more event now; counts rejections"""
+        limit = self.limits.get(event)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        buckets = self.buckets.setdefault(sid, {})
+        bucket = buckets.get(event)
+        if bucket is None:
+            bucket = buckets[event] = TokenBucket(limit[0], limit[1], now)
+        if bucket.take(now):
+            return True
+        self.dropped[event] = self.dropped.get(event, 0) + 1
+        return False
+
+    def coalesce_input(self, sid: str, data: dict):
+        """Keep an over-limit input as the sid's pending state"""
+        pending = self.pending_inputs.get(sid)
+        keys = data.get('keys', {})
+        if pending is None:
+            self.pending_inputs[sid] = {
+                'keys': keys,
+                'kick': bool(data.get('kick', False)),
+                'push': bool(data.get('push', False)),
+            }
+        else:
+            pending['keys'] = keys
+            pending['kick'] = pending['kick'] or bool(data.get('kick', False))
+            pending['push'] = pending['push'] or bool(data.get('push', False))
+        self.coalesced += 1
+
+    def take_input(self, sid: str) -> Optional[dict]:
+        """Pop the pending input of sid, if any"""
+        return self.pending_inputs.pop(sid, None)
+
+    def forget(self, sid: str):
+        """Drop every bucket and pending input of a disconnected sid"""
+        self.buckets.pop(sid, None)
+        self.pending_inputs.pop(sid, None)
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            'tracked_sids': len(self.buckets),
+            'pending_inputs': len(self.pending_inputs),
+            'coalesced_inputs': self.coalesced,
+            'dropped': dict(self.dropped),
+        }
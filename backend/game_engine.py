@@ -3,14 +3,20 @@ from typing import List, Dict
 import asyncio
 import random
 import time
+from snapshot import GameSnapshot
+from checkpoint import encode_checkpoint, decode_checkpoint
+from match_stats import MatchStats
+from collision import sweep_circle, sweep_capsule, sweep_line_crossing
+from maps import load_map
+from rules import GameRules, get_rules, DEFAULT_MODE
 
 class PowerUp:
     """Power-up item that spawns on the field"""
-    def __init__(self, x: float, y: float, powerup_type: str):
+    def __init__(self, x: float, y: float, powerup_type: str, radius: float = 15):
         self.x = x
         self.y = y
         self.type = powerup_type
-        self.radius = 15
+        self.radius = radius
         self.spawn_time = time.time()
         
     def to_dict(self):
@@ -22,55 +28,50 @@ class PowerUp:
         }
 
 class GameEngine:
-    def __init__(self, room_id: str):
+    # Speeds and frictions below are tuned per tick at this rate; other
+    # tick rates scale them so the game plays the same
+    PHYSICS_BASE_HZ = 90
+    MAX_BALL_CONTACTS = 4  # Contacts resolved per tick for the swept ball
+    
+    def __init__(self, room_id: str, rules: GameRules = None, map_name: str = None):
         self.room_id = room_id
         self.running = False
         
-        # Game constants - horizontal field
-        self.CANVAS_WIDTH = 1400  # Wider field
-        self.CANVAS_HEIGHT = 600  # Height
-        self.PLAYER_RADIUS = 20
-        self.BALL_RADIUS = 12
-        self.PLAYER_SPEED = 2.5  # Reducido de 4 a 2.5 para mejor control
-        self.BALL_FRICTION = 0.98
-        self.KICK_POWER = 15
-        self.PUSH_POWER = 20  # Aumentado a 20 para alejar más (antes 15)
-        self.KICK_DISTANCE = self.PLAYER_RADIUS + self.BALL_RADIUS + 5
-        self.PUSH_DISTANCE = 60  # Distancia para empujar jugadores
-        self.GOAL_HEIGHT = 150  # Goal height (vertical)
-        self.KICKOFF_RADIUS = 80  # Radius of center circle
+        # Gameplay constants and field geometry are immutable and shared
+        # by every engine of the same mode/map
+        self.rules = rules or get_rules(DEFAULT_MODE)
+        self.map = load_map(map_name or self.rules.map_name)
+        # Centre circle the defending team cannot enter during kickoff
+        self.kickoff_block_radius = self.map.kickoff[2] + self.rules.player_radius
         
         # Game state
         self.players = {}
         self.player_initial_positions = {}  # Store initial positions
         self.ball = {
-            'x': self.CANVAS_WIDTH / 2,
-            'y': self.CANVAS_HEIGHT / 2,
+            'x': self.map.kickoff[0],
+            'y': self.map.kickoff[1],
             'vx': 0,
             'vy': 0
         }
         self.score = {'red': 0, 'blue': 0}
-        self.time_remaining = 600  # 10 minutes in seconds
+        self.time_remaining = self.rules.match_duration
         self.player_inputs = {}  # Store player inputs
         self.kickoff_team = 'red'  # Red team starts with kickoff
         self.ball_touched = False  # Has the ball been touched after kickoff
         self.game_started = False  # Track if game has started
         self.paused = False  # Game pause state
         self.player_animations = {}  # Track player animations
+        self.tick = 0  # Physics steps simulated so far
+        self.started_at = time.time()  # Wall clock, for match history
+        self.last_kicker = None  # Player credited if the ball goes in
+        self.goals = {}  # Goals per player {player_id: int}
+        self.stats = MatchStats(self.map)  # Touches, passes, possession and heatmaps
+        self.trace = None  # Optional TraceRecorder fed every tick
         
         # Power-ups system
         self.powerups = []  # Active power-ups on field
         self.player_powerups = {}  # Active power-ups per player {player_id: {'type': str, 'expires': float}}
         self.last_powerup_spawn = time.time()
-        self.powerup_spawn_interval = 25  # Spawn power-up every 25 seconds (antes 15)
-        self.powerup_duration = 10  # Power-up dura 10 segundos en el jugador
-        self.powerup_field_duration = 20  # Power-up dura 20 segundos en el campo (antes 30)
-        self.powerup_types = [
-            'super_kick',    # Disparo más fuerte (2x)
-            'mega_push',     # Empuje más fuerte (2x)
-            'speed_boost',   # Velocidad aumentada (1.5x)
-            'giant',         # Jugador más grande (más fácil empujar)
-        ]
         
     def add_player(self, player_id: str, username: str, team: str):
         """Add a player to the game"""
@@ -78,8 +79,30 @@ class GameEngine:
         # Red team on the left, Blue team on the right
         team_count = len([p for p in self.players.values() if p['team'] == team])
         
+        spawn = self.map.spawn_point(team, team_count)
+        if spawn:
+            x, y = spawn
+        else:
+            x, y = self.default_spawn(team, team_count)
+            
+        self.players[player_id] = {
+            'id': len(self.players) + 1,
+            'x': x,
+            'y': y,
+            'vx': 0,
+            'vy': 0,
+            'team': team,
+            'name': username
+        }
+        
+        # Store initial position for resets
+        self.player_initial_positions[player_id] = {'x': x, 'y': y}
+        self.player_inputs[player_id] = {'keys': {}, 'kick': False, 'push': False}
+        
+    def default_spawn(self, team: str, team_count: int):
+        """Spawn position for maps without spawn points"""
         # Centro vertical del campo
-        center_y = self.CANVAS_HEIGHT / 2
+        center_y = self.map.height / 2
         
         if team == 'red':
             # Red team starts on the LEFT side, centrado verticalmente
@@ -95,27 +118,14 @@ class GameEngine:
                 y = center_y + (team_count // 2) * 80
         else:
             # Blue team starts on the RIGHT side, centrado verticalmente
-            x = self.CANVAS_WIDTH - 250
+            x = self.map.width - 250
             if team_count == 0:
                 y = center_y
             elif team_count % 2 == 1:
                 y = center_y - (team_count // 2 + 1) * 80
             else:
                 y = center_y + (team_count // 2) * 80
-            
-        self.players[player_id] = {
-            'id': len(self.players) + 1,
-            'x': x,
-            'y': y,
-            'vx': 0,
-            'vy': 0,
-            'team': team,
-            'name': username
-        }
-        
-        # Store initial position for resets
-        self.player_initial_positions[player_id] = {'x': x, 'y': y}
-        self.player_inputs[player_id] = {'keys': {}, 'kick': False, 'push': False}
+        return x, y
         
     def remove_player(self, player_id: str):
         """Remove a player from the game"""
@@ -129,8 +139,17 @@ class GameEngine:
         if player_id in self.player_inputs:
             self.player_inputs[player_id] = {'keys': keys, 'kick': kick, 'push': push}
             
-    def update_physics(self, delta_time: float = 1/60):
-        """Update game physics"""
+    def update_physics(self, delta_time: float = None):
+        """Update game physics by delta_time seconds (one base tick by default)"""
+        self.tick += 1
+        scale = 1.0 if delta_time is None else delta_time * self.PHYSICS_BASE_HZ
+        rules = self.rules
+        player_radius = rules.player_radius
+        player_diameter = rules.player_diameter
+        max_x = self.map.width - player_radius
+        max_y = self.map.height - player_radius
+        player_friction = rules.player_friction if scale == 1.0 else rules.player_friction ** scale
+        
         # Update player positions based on inputs
         for player_id, player in self.players.items():
             if player_id in self.player_inputs:
@@ -152,10 +171,10 @@ class GameEngine:
                     dy *= 0.707
                 
                 # Apply speed with power-up bonus
-                speed = self.PLAYER_SPEED
+                speed = rules.player_speed
                 if player_id in self.player_powerups:
                     if self.player_powerups[player_id]['type'] == 'speed_boost':
-                        speed *= 1.5  # 50% más rápido
+                        speed *= rules.speed_boost_multiplier  # 50% más rápido
                     
                 player['vx'] = dx * speed
                 player['vy'] = dy * speed
@@ -185,23 +204,22 @@ class GameEngine:
                     self.player_inputs[player_id]['kick'] = False
                     
             # Update player position
-            new_x = player['x'] + player['vx']
-            new_y = player['y'] + player['vy']
+            new_x = player['x'] + player['vx'] * scale
+            new_y = player['y'] + player['vy'] * scale
             
             # Check kickoff restrictions - opposing team cannot enter center circle
             if self.kickoff_team and not self.ball_touched:
                 if player['team'] != self.kickoff_team:
                     # Calculate distance from center
-                    center_x = self.CANVAS_WIDTH / 2
-                    center_y = self.CANVAS_HEIGHT / 2
+                    center_x, center_y = self.map.kickoff[0], self.map.kickoff[1]
                     dist_to_center = math.sqrt((new_x - center_x)**2 + (new_y - center_y)**2)
                     
                     # Don't allow entry into kickoff circle
-                    if dist_to_center < self.KICKOFF_RADIUS + self.PLAYER_RADIUS:
+                    if dist_to_center < self.kickoff_block_radius:
                         # Push player back outside the circle
                         angle = math.atan2(new_y - center_y, new_x - center_x)
-                        new_x = center_x + math.cos(angle) * (self.KICKOFF_RADIUS + self.PLAYER_RADIUS)
-                        new_y = center_y + math.sin(angle) * (self.KICKOFF_RADIUS + self.PLAYER_RADIUS)
+                        new_x = center_x + math.cos(angle) * self.kickoff_block_radius
+                        new_y = center_y + math.sin(angle) * self.kickoff_block_radius
                         player['vx'] = 0
                         player['vy'] = 0
             
@@ -213,10 +231,10 @@ class GameEngine:
                     dy = new_y - other['y']
                     dist = math.sqrt(dx * dx + dy * dy)
                     
-                    if dist < self.PLAYER_RADIUS * 2:
+                    if dist < player_diameter:
                         # Collision detected - push both players apart
                         can_move = False
-                        overlap = self.PLAYER_RADIUS * 2 - dist
+                        overlap = player_diameter - dist
                         if dist > 0:
                             # Push away
                             push_x = (dx / dist) * overlap * 0.5
@@ -236,127 +254,46 @@ class GameEngine:
                 player['y'] = new_y
             
             # Apply friction
-            player['vx'] *= 0.92
-            player['vy'] *= 0.92
+            player['vx'] *= player_friction
+            player['vy'] *= player_friction
             
             # Keep player in bounds
-            player['x'] = max(self.PLAYER_RADIUS, min(self.CANVAS_WIDTH - self.PLAYER_RADIUS, player['x']))
-            player['y'] = max(self.PLAYER_RADIUS, min(self.CANVAS_HEIGHT - self.PLAYER_RADIUS, player['y']))
+            player['x'] = max(player_radius, min(max_x, player['x']))
+            player['y'] = max(player_radius, min(max_y, player['y']))
             
-        # Update ball with improved physics
-        self.ball['x'] += self.ball['vx']
-        self.ball['y'] += self.ball['vy']
-        self.ball['vx'] *= self.BALL_FRICTION
-        self.ball['vy'] *= self.BALL_FRICTION
-        
-        # Define goal boundaries
-        goal_top = (self.CANVAS_HEIGHT - self.GOAL_HEIGHT) / 2
-        goal_bottom = goal_top + self.GOAL_HEIGHT
-        goal_depth = 30  # Same as GOAL_DEPTH in frontend
-        
-        # Ball collision with top and bottom walls
-        # BUT: handle goal post collisions separately
-        if self.ball['y'] - self.BALL_RADIUS < 0:
-            self.ball['vy'] *= -0.8
-            self.ball['y'] = self.BALL_RADIUS
-        elif self.ball['y'] + self.BALL_RADIUS > self.CANVAS_HEIGHT:
-            self.ball['vy'] *= -0.8
-            self.ball['y'] = self.CANVAS_HEIGHT - self.BALL_RADIUS
-            
-        # Check goals (left and right side for horizontal field)
-        goal_scored = None
-        
-        # LEFT goal (RED defends this side - BLUE scores here)
-        if self.ball['x'] - self.BALL_RADIUS < 0:
-            # Check if ball is within goal vertical bounds
-            if self.ball['y'] > goal_top and self.ball['y'] < goal_bottom:
-                self.score['blue'] += 1
-                goal_scored = 'blue'
-                # Blue scored, so RED gets kickoff
-                self.reset_positions_for_kickoff('blue')
-            else:
-                # Ball hit the wall outside the goal - bounce back
-                self.ball['vx'] *= -0.8
-                self.ball['x'] = self.BALL_RADIUS
-        
-        # LEFT goal - TOP POST collision (solid boundary)
-        if self.ball['x'] <= goal_depth and self.ball['x'] >= 0:
-            # Ball is in the goal area depth
-            if self.ball['y'] - self.BALL_RADIUS < goal_top and self.ball['y'] + self.BALL_RADIUS > goal_top - 10:
-                # Ball hit top post
-                self.ball['vy'] *= -0.8
-                self.ball['y'] = goal_top - self.BALL_RADIUS
-        
-        # LEFT goal - BOTTOM POST collision (solid boundary)
-        if self.ball['x'] <= goal_depth and self.ball['x'] >= 0:
-            if self.ball['y'] + self.BALL_RADIUS > goal_bottom and self.ball['y'] - self.BALL_RADIUS < goal_bottom + 10:
-                # Ball hit bottom post
-                self.ball['vy'] *= -0.8
-                self.ball['y'] = goal_bottom + self.BALL_RADIUS
-                
-        # RIGHT goal (BLUE defends this side - RED scores here)
-        if self.ball['x'] + self.BALL_RADIUS > self.CANVAS_WIDTH:
-            if self.ball['y'] > goal_top and self.ball['y'] < goal_bottom:
-                self.score['red'] += 1
-                goal_scored = 'red'
-                # Red scored, so BLUE gets kickoff
-                self.reset_positions_for_kickoff('red')
-            else:
-                self.ball['vx'] *= -0.8
-                self.ball['x'] = self.CANVAS_WIDTH - self.BALL_RADIUS
-        
-        # RIGHT goal - TOP POST collision (solid boundary)
-        if self.ball['x'] >= self.CANVAS_WIDTH - goal_depth and self.ball['x'] <= self.CANVAS_WIDTH:
-            if self.ball['y'] - self.BALL_RADIUS < goal_top and self.ball['y'] + self.BALL_RADIUS > goal_top - 10:
-                # Ball hit top post
-                self.ball['vy'] *= -0.8
-                self.ball['y'] = goal_top - self.BALL_RADIUS
-        
-        # RIGHT goal - BOTTOM POST collision (solid boundary)
-        if self.ball['x'] >= self.CANVAS_WIDTH - goal_depth and self.ball['x'] <= self.CANVAS_WIDTH:
-            if self.ball['y'] + self.BALL_RADIUS > goal_bottom and self.ball['y'] - self.BALL_RADIUS < goal_bottom + 10:
-                # Ball hit bottom post
-                self.ball['vy'] *= -0.8
-                self.ball['y'] = goal_bottom + self.BALL_RADIUS
-                
-        # Ball collision with players - improved physics
-        for player in self.players.values():
-            dx = self.ball['x'] - player['x']
-            dy = self.ball['y'] - player['y']
-            dist = math.sqrt(dx * dx + dy * dy)
+        # Update ball: swept against walls, posts and players so fast shots
+        # cannot tunnel through anything between two ticks.
+        # With N base ticks per step the ball travels v * (1 + f + ... + f^(N-1)),
+        # exactly what N ticks at the base rate would have covered
+        ball_friction = rules.ball_friction if scale == 1.0 else rules.ball_friction ** scale
+        if scale == 1.0 or rules.ball_friction == 1:
+            ball_travel = scale
+        else:
+            ball_travel = (1 - ball_friction) / (1 - rules.ball_friction)
+        goal_scored = self.move_ball(ball_travel)
+        if goal_scored:
+            self.score[goal_scored] += 1
+            scorer = self.players.get(self.last_kicker)
+            if scorer and scorer['team'] == goal_scored:  # Own goals are not credited
+                self.goals[self.last_kicker] = self.goals.get(self.last_kicker, 0) + 1
+            self.last_kicker = None
+            self.stats.goal(goal_scored)
+            if self.trace:
+                self.trace.event(self.tick, 'goal', team=goal_scored)
+            # The team that conceded gets the kickoff
+            self.reset_positions_for_kickoff(goal_scored)
+        self.stats.step(self.tick, self.players, scale)
+        if self.trace:
+            self.trace.sample(self)
             
-            if dist < self.PLAYER_RADIUS + self.BALL_RADIUS:
-                # Collision response with momentum transfer
-                if dist > 0:
-                    # Normalize
-                    nx = dx / dist
-                    ny = dy / dist
-                    
-                    # Relative velocity
-                    dvx = self.ball['vx'] - player['vx']
-                    dvy = self.ball['vy'] - player['vy']
-                    
-                    # Velocity along normal
-                    dvn = dvx * nx + dvy * ny
-                    
-                    # Don't process if moving apart
-                    if dvn < 0:
-                        # Bounce coefficient
-                        bounce = 1.5
-                        
-                        # Apply impulse
-                        self.ball['vx'] += -dvn * nx * bounce + player['vx'] * 0.5
-                        self.ball['vy'] += -dvn * ny * bounce + player['vy'] * 0.5
-                        
-                        # Separate ball from player
-                        overlap = self.PLAYER_RADIUS + self.BALL_RADIUS - dist
-                        self.ball['x'] += nx * overlap
-                        self.ball['y'] += ny * overlap
+        self.ball['vx'] *= ball_friction
+        self.ball['vy'] *= ball_friction
         
         # Update power-ups system
         self.update_powerups()
         
-        # Check power-up collection
+        # Check power-up collection (every power-up has the rules' radius)
+        pickup_distance = self.rules.pickup_distance
         for player_id, player in self.players.items():
             # Skip if player already has a power-up active
             if player_id in self.player_powerups:
@@ -367,7 +304,7 @@ class GameEngine:
                 dy = player['y'] - powerup.y
                 dist = math.sqrt(dx * dx + dy * dy)
                 
-                if dist < self.PLAYER_RADIUS + powerup.radius:
+                if dist < pickup_distance:
                     # Player collected the power-up
                     self.collect_powerup(player_id, powerup)
                     self.powerups.remove(powerup)
@@ -375,18 +312,138 @@ class GameEngine:
                 
         return goal_scored
         
+    def move_ball(self, travel: float = 1.0):
+        """Advance the ball by travel times its velocity with time-of-impact
+        collision resolution.
+        
+        Returns the team that scored if the ball crossed a goal line.
+        """
+        ball = self.ball
+        
+        # Players that walked into the ball this tick push it out first
+        self.resolve_ball_overlaps()
+        
+        remaining = 1.0
+        for _ in range(self.MAX_BALL_CONTACTS):
+            dx = ball['vx'] * travel * remaining
+            dy = ball['vy'] * travel * remaining
+            if dx == 0 and dy == 0:
+                break
+                
+            contact = self.first_ball_contact(dx, dy)
+            if contact is None:
+                ball['x'] += dx
+                ball['y'] += dy
+                break
+                
+            t, nx, ny, kind, player = contact
+            ball['x'] += dx * t
+            ball['y'] += dy * t
+            
+            if kind == 'goal':
+                return player  # Scoring team
+            if kind == 'player':
+                if self.bounce_ball_off_player(player, nx, ny):
+                    self.stats.touch(player['name'], player['team'], self.tick)
+                    if self.trace:
+                        self.trace.event(self.tick, 'touch', player['name'], player['team'])
+            else:
+                # Wall or post: reflect the normal component
+                vn = ball['vx'] * nx + ball['vy'] * ny
+                ball['vx'] -= (1 + self.map.restitution) * vn * nx
+                ball['vy'] -= (1 + self.map.restitution) * vn * ny
+            remaining *= 1 - t
+            
+        # Safety net for numeric drift along the touchlines
+        ball_radius = self.rules.ball_radius
+        ball['y'] = max(ball_radius, min(self.map.height - ball_radius, ball['y']))
+        return None
+        
+    def first_ball_contact(self, dx: float, dy: float):
+        """Earliest contact of the ball along (dx, dy): (t, nx, ny, kind, data) or None"""
+        ball = self.ball
+        bx, by = ball['x'], ball['y']
+        r = self.rules.ball_radius
+        field = self.map
+        best = None
+        
+        # Goal lines: scoring once the ball's edge crosses them
+        for _, scorer, segment, nx, ny in field.goals:
+            t = sweep_line_crossing(bx, by, dx, dy, segment, nx, ny, r)
+            if t is not None and (best is None or t < best[0]):
+                best = (t, nx, ny, 'goal', scorer)
+        
+        # Walls and posts near the swept path (spatial index of the map)
+        candidates = field.query(
+            min(bx, bx + dx) - r, min(by, by + dy) - r,
+            max(bx, bx + dx) + r, max(by, by + dy) + r
+        )
+        for index in candidates:
+            segment, radius, kind = field.segments[index]
+            hit = sweep_capsule(bx, by, dx, dy, segment, r + radius)
+            if hit and (best is None or hit[0] < best[0]):
+                best = (hit[0], hit[1], hit[2], kind, None)
+        
+        # Players (already moved this tick)
+        reach = self.rules.contact_distance
+        for player in self.players.values():
+            hit = sweep_circle(bx, by, dx, dy, player['x'], player['y'], reach)
+            if hit and (best is None or hit[0] < best[0]):
+                best = (hit[0], hit[1], hit[2], 'player', player)
+        return best
+        
+    def bounce_ball_off_player(self, player: dict, nx: float, ny: float):
+        """Momentum transfer from a player to the ball along the contact normal"""
+        # Relative velocity
+        dvx = self.ball['vx'] - player['vx']
+        dvy = self.ball['vy'] - player['vy']
+        
+        # Velocity along normal
+        dvn = dvx * nx + dvy * ny
+        
+        # Don't process if moving apart
+        if dvn < 0:
+            # Bounce coefficient
+            bounce = self.rules.ball_bounce
+            
+            # Apply impulse
+            self.ball['vx'] += -dvn * nx * bounce + player['vx'] * 0.5
+            self.ball['vy'] += -dvn * ny * bounce + player['vy'] * 0.5
+            return True
+        return False
+        
+    def resolve_ball_overlaps(self):
+        """Push the ball out of players that moved into it"""
+        contact_distance = self.rules.contact_distance
+        for player in self.players.values():
+            dx = self.ball['x'] - player['x']
+            dy = self.ball['y'] - player['y']
+            dist = math.sqrt(dx * dx + dy * dy)
+            
+            if 0 < dist < contact_distance:
+                nx = dx / dist
+                ny = dy / dist
+                if self.bounce_ball_off_player(player, nx, ny):
+                    self.stats.touch(player['name'], player['team'], self.tick)
+                    if self.trace:
+                        self.trace.event(self.tick, 'touch', player['name'], player['team'])
+                    # Separate ball from player
+                    overlap = contact_distance - dist
+                    self.ball['x'] += nx * overlap
+                    self.ball['y'] += ny * overlap
+    
     def push_players(self, pusher_id: str, pusher: dict):
         """Push nearby players away"""
-        push_radius = self.PUSH_DISTANCE  # Use defined push distance
+        push_radius = self.rules.push_distance  # Use defined push distance
         
         # Set push animation
         self.player_animations[pusher_id] = {'type': 'push', 'frame': 0}
         
         # Calculate push power with power-up bonus
-        push_power = self.PUSH_POWER
+        push_power = self.rules.push_power
         if pusher_id in self.player_powerups:
             if self.player_powerups[pusher_id]['type'] == 'mega_push':
-                push_power *= 2  # Doble de fuerza!
+                push_power *= self.rules.mega_push_multiplier  # Doble de fuerza!
         
         pushed_someone = False
         for other_id, other in self.players.items():
@@ -421,22 +478,23 @@ class GameEngine:
         dist = math.sqrt(dx * dx + dy * dy)
         
         # Only kick if close enough (intent system - button press accepted always, but only works if close)
-        if dist < self.KICK_DISTANCE:
+        if dist < self.rules.kick_distance:
             if dist > 0:
                 # Set kick animation
                 self.player_animations[player_id] = {'type': 'kick', 'frame': 0}
+                self.last_kicker = player_id
                 
                 # Normalize direction
                 nx = dx / dist
                 ny = dy / dist
                 
                 # Calculate kick power with player velocity bonus
-                kick_power = self.KICK_POWER
+                kick_power = self.rules.kick_power
                 
                 # Apply power-up bonus
                 if player_id in self.player_powerups:
                     if self.player_powerups[player_id]['type'] == 'super_kick':
-                        kick_power *= 2.0  # Doble de potencia!
+                        kick_power *= self.rules.super_kick_multiplier  # Doble de potencia!
                 
                 player_speed = math.sqrt(player['vx']**2 + player['vy']**2)
                 
@@ -447,13 +505,16 @@ class GameEngine:
                 # Apply kick velocity
                 self.ball['vx'] = nx * total_power + player['vx'] * 0.3
                 self.ball['vy'] = ny * total_power + player['vy'] * 0.3
+                self.stats.kick(player['name'], player['team'], self.tick, self.ball)
+                if self.trace:
+                    self.trace.event(self.tick, 'kick', player['name'], player['team'])
                 return True
         return False
             
     def reset_ball(self):
         """Reset ball to center"""
-        self.ball['x'] = self.CANVAS_WIDTH / 2
-        self.ball['y'] = self.CANVAS_HEIGHT / 2
+        self.ball['x'] = self.map.kickoff[0]
+        self.ball['y'] = self.map.kickoff[1]
         self.ball['vx'] = 0
         self.ball['vy'] = 0
         
@@ -475,22 +536,26 @@ class GameEngine:
         self.kickoff_team = 'blue' if scoring_team == 'red' else 'red'
         self.ball_touched = False
         
-    def get_game_state(self):
-        """Get current game state"""
-        # Update animations
+    def advance_animations(self):
+        """Advance kick/push animation frames by one server frame"""
         for player_id in list(self.player_animations.keys()):
             anim = self.player_animations[player_id]
             anim['frame'] += 1
             # Remove animation after 10 frames (about 0.16 seconds at 60fps)
             if anim['frame'] > 10:
                 del self.player_animations[player_id]
+    
+    def build_state(self) -> dict:
+        """Build the game state for clients without mutating the engine.
         
+        Everything is copied, so the result stays valid after later ticks.
+        """
         # Prepare animations with player names for frontend
         animations_with_names = {}
         for player_id, anim in self.player_animations.items():
             if player_id in self.players:
                 player_name = self.players[player_id]['name']
-                animations_with_names[player_name] = anim
+                animations_with_names[player_name] = dict(anim)
         
         # Prepare player powerups for frontend
         player_powerups_for_frontend = {}
@@ -500,9 +565,9 @@ class GameEngine:
                 player_powerups_for_frontend[player_name] = powerup_data['type']
         
         return {
-            'players': list(self.players.values()),
-            'ball': self.ball,
-            'score': self.score,
+            'players': [dict(p) for p in self.players.values()],
+            'ball': dict(self.ball),
+            'score': dict(self.score),
             'time': self.time_remaining,
             'kickoff_team': self.kickoff_team,
             'ball_touched': self.ball_touched,
@@ -511,17 +576,110 @@ class GameEngine:
             'player_powerups': player_powerups_for_frontend
         }
     
+    def build_snapshot(self) -> GameSnapshot:
+        """Build the immutable, pre-encoded snapshot for the current tick"""
+        return GameSnapshot(self.room_id, self.tick, self.build_state())
+        
+    def get_game_state(self):
+        """Get current game state (advances animations, kept for compatibility)"""
+        self.advance_animations()
+        return self.build_state()
+    
+    def to_checkpoint(self) -> bytes:
+        """Serialize the full match state for migration to another worker.
+        
+        Wall-clock timestamps are stored as ages/remaining seconds so the
+        match resumes correctly on a machine with a different clock.
+        """
+        now = time.time()
+        return encode_checkpoint({
+            'room_id': self.room_id,
+            'mode': self.rules.name,
+            'map': self.map.name,
+            'tick': self.tick,
+            'started_at': self.started_at,
+            'players': self.players,
+            'initial_positions': self.player_initial_positions,
+            'ball': self.ball,
+            'score': self.score,
+            'goals': self.goals,
+            'last_kicker': self.last_kicker,
+            'stats': self.stats.to_state(),
+            'time_remaining': self.time_remaining,
+            'kickoff_team': self.kickoff_team,
+            'ball_touched': self.ball_touched,
+            'game_started': self.game_started,
+            'paused': self.paused,
+            'animations': self.player_animations,
+            'powerups': [[p.x, p.y, p.type, now - p.spawn_time] for p in self.powerups],
+            'player_powerups': {
+                player_id: [data['type'], data['expires'] - now]
+                for player_id, data in self.player_powerups.items()
+            },
+            'powerup_spawn_age': now - self.last_powerup_spawn,
+        })
+    
+    @classmethod
+    def from_checkpoint(cls, blob: bytes) -> 'GameEngine':
+        """Rebuild an engine from to_checkpoint output"""
+        data = decode_checkpoint(blob)
+        now = time.time()
+        engine = cls(data['room_id'], get_rules(data.get('mode', DEFAULT_MODE)), data.get('map'))
+        engine.tick = data['tick']
+        engine.started_at = data.get('started_at', engine.started_at)
+        engine.players = data['players']
+        engine.player_initial_positions = data['initial_positions']
+        engine.ball = data['ball']
+        engine.score = data['score']
+        engine.goals = data.get('goals', {})
+        engine.last_kicker = data.get('last_kicker')
+        if 'stats' in data:
+            engine.stats.load_state(data['stats'])
+        engine.time_remaining = data['time_remaining']
+        engine.kickoff_team = data['kickoff_team']
+        engine.ball_touched = data['ball_touched']
+        engine.game_started = data['game_started']
+        engine.paused = data['paused']
+        engine.player_animations = data['animations']
+        engine.powerups = []
+        for x, y, powerup_type, age in data['powerups']:
+            powerup = PowerUp(x, y, powerup_type, engine.rules.powerup_radius)
+            powerup.spawn_time = now - age
+            engine.powerups.append(powerup)
+        engine.player_powerups = {
+            player_id: {'type': powerup_type, 'expires': now + remaining}
+            for player_id, (powerup_type, remaining) in data['player_powerups'].items()
+        }
+        engine.last_powerup_spawn = now - data['powerup_spawn_age']
+        # Inputs are not migrated: everyone starts from neutral after the move
+        engine.player_inputs = {
+            player_id: {'keys': {}, 'kick': False, 'push': False} for player_id in engine.players
+        }
+        return engine
+    
+    def rebind_player(self, old_id: str, new_id: str):
+        """Move a player's state to a new id (e.g. a new sid after migration)"""
+        if old_id not in self.players or old_id == new_id:
+            return
+        for table in (self.players, self.player_initial_positions, self.player_inputs,
+                      self.player_powerups, self.player_animations, self.goals):
+            if old_id in table:
+                table[new_id] = table.pop(old_id)
+        if self.last_kicker == old_id:
+            self.last_kicker = new_id
+    
     def update_powerups(self):
         """Update power-ups: spawn new ones and expire old ones"""
         current_time = time.time()
         
         # Spawn new power-up if it's time
-        if current_time - self.last_powerup_spawn > self.powerup_spawn_interval:
+        if current_time - self.last_powerup_spawn > self.rules.powerup_spawn_interval:
             self.spawn_powerup()
             self.last_powerup_spawn = current_time
         
         # Remove old power-ups from field (usar la nueva constante)
-        self.powerups = [p for p in self.powerups if current_time - p.spawn_time < self.powerup_field_duration]
+        field_duration = self.rules.powerup_field_duration
+        self.powerups = [p for p in self.powerups if current_time - p.spawn_time < field_duration]
         
         # Expire player power-ups (exactamente 10 segundos)
         for player_id in list(self.player_powerups.keys()):
@@ -532,13 +690,15 @@ class GameEngine:
         """Spawn a random power-up at a random location"""
         # Random position avoiding goal areas
         margin = 100
-        x = random.randint(margin, self.CANVAS_WIDTH - margin)
-        y = random.randint(margin, self.CANVAS_HEIGHT - margin)
+        x = random.randint(margin, int(self.map.width) - margin)
+        y = random.randint(margin, int(self.map.height) - margin)
         
-        # Random type
-        powerup_type = random.choice(self.powerup_types)
+        # Random type (some modes play without power-ups)
+        if not self.rules.powerup_types:
+            return
+        powerup_type = random.choice(self.rules.powerup_types)
         
-        powerup = PowerUp(x, y, powerup_type)
+        powerup = PowerUp(x, y, powerup_type, self.rules.powerup_radius)
         self.powerups.append(powerup)
     
     def collect_powerup(self, player_id: str, powerup: PowerUp):
@@ -546,5 +706,5 @@ class GameEngine:
         # Give power-up to player for exactly 10 seconds
         self.player_powerups[player_id] = {
             'type': powerup.type,
-            'expires': time.time() + self.powerup_duration  # Usar la constante (10 segundos)
+            'expires': time.time() + self.rules.powerup_duration  # Usar la constante (10 segundos)
         }
@@ -0,0 +1,100 @@
+import base64
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from models import GameSession
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+# List views: match summary only, never the full per-player stats
+LIST_PROJECTION = {'_id': 0, 'id': 1, 'room_id': 1, 'start_time': 1, 'end_time': 1,
+                   'winner': 1, 'final_score': 1}
+
+
+class CursorError(ValueError):
+    """Raised for malformed pagination cursors"""
+
+
+def encode_cursor(end_time: datetime, match_id: str) -> str:
+    """Opaque keyset cursor pointing after (end_time, id)"""
+    raw = f'{end_time.isoformat()}|{match_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        end_time, match_id = raw.split('|', 1)
+        return datetime.fromisoformat(end_time), match_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise CursorError(f'Invalid cursor: {e}')
+
+
+class MatchHistory:
+    """Finished matches (GameSession documents) with keyset-paginated queries.
+
+    Pages are ordered newest first by (end_time, id) and each one is a single
+    index range scan: the cursor says where the previous page stopped, so the
+    cost does not grow with the page number or the collection size.
+    """
+
+    def __init__(self, db, collection: str = 'game_sessions'):
+        self.db = db
+        self.collection_name = collection
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    async def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        await self.collection.create_index('id', unique=True)
+        await self.collection.create_index([('room_id', 1), ('end_time', -1), ('id', -1)])
+        await self.collection.create_index([('player_stats.username', 1), ('end_time', -1), ('id', -1)])
+        self._indexes_ready = True
+
+    async def record(self, session: GameSession):
+        """Store a finished match"""
+        try:
+            await self._ensure_indexes()
+            await self.collection.insert_one(session.dict())
+        except Exception as e:
+            logger.error(f'Error saving match {session.id} of room {session.room_id}: {e}')
+
+    async def _page(self, query: dict, projection: dict, limit: int, cursor: Optional[str]) -> dict:
+        await self._ensure_indexes()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if cursor:
+            end_time, match_id = decode_cursor(cursor)
+            query = {**query, '$or': [
+                {'end_time': {'$lt': end_time}},
+                {'end_time': end_time, 'id': {'$lt': match_id}},
+            ]}
+        # One extra document tells whether there is a next page
+        documents: List[dict] = await self.collection.find(query, projection) \
+            .sort([('end_time', -1), ('id', -1)]).limit(limit + 1).to_list(limit + 1)
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            last = documents[-1]
+            next_cursor = encode_cursor(last['end_time'], last['id'])
+        return {'matches': documents, 'next_cursor': next_cursor}
+
+    async def for_user(self, username: str, limit: int = 20, cursor: str = None) -> dict:
+        """Matches a user played in, with only their own stats entry"""
+        projection = {**LIST_PROJECTION, 'player_stats': {'$elemMatch': {'username': username}}}
+        return await self._page({'player_stats.username': username}, projection, limit, cursor)
+
+    async def for_room(self, room_id: str, limit: int = 20, cursor: str = None) -> dict:
+        """Matches played in a room"""
+        return await self._page({'room_id': room_id}, LIST_PROJECTION, limit, cursor)
+
+    async def get(self, match_id: str) -> Optional[dict]:
+        """Full match document, stats of every player included"""
+        await self._ensure_indexes()
+        return await self.collection.find_one({'id': match_id}, {'_id': 0})
@@ -0,0 +1,141 @@
+import json
+import logging
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from bots import is_bot
+from models import GameSession
+
+logger = logging.getLogger(__name__)
+
+STATS_PROJECTION = {'_id': 0, 'username': 1, 'stats': 1}
+
+# Mongo sort matching rank_key: more wins, then more goals, then fewer losses
+RANK_SORT = [('stats.wins', -1), ('stats.goals', -1), ('stats.losses', 1), ('username', 1)]
+
+
+def rank_key(entry: dict) -> Tuple[int, int, int, str]:
+    """Sort key of a leaderboard entry, best first"""
+    return (-entry['wins'], -entry['goals'], entry['losses'], entry['username'])
+
+
+def to_entry(user: dict) -> dict:
+    stats = user.get('stats') or {}
+    return {
+        'username': user['username'],
+        'wins': stats.get('wins', 0),
+        'losses': stats.get('losses', 0),
+        'goals': stats.get('goals', 0)
+    }
+
+
+class Leaderboard:
+    """Top players by UserStats, materialized in memory.
+
+    Match results update Mongo with $inc and move the affected players in a
+    sorted top list, which holds a margin of extra entries so a player
+    dropping out of the visible top can be replaced without a query. The
+    response body is encoded once per change, so reads cost the same
+    whatever the number of users. A periodic reconcile reloads the list
+    from Mongo to pick up results recorded by other nodes.
+    """
+
+    def __init__(self, db, collection: str = 'users', size: int = 100, margin: int = 100):
+        self.db = db
+        self.collection_name = collection
+        self.size = size  # Entries served
+        self.capacity = size + margin  # Entries kept
+        self.ranking: List[Tuple] = []  # Sorted rank keys
+        self.entries: Dict[str, dict] = {}  # username -> entry, for everyone in ranking
+        self.loaded = False
+        self.reconciled_at = 0.0
+        self._encoded: Optional[bytes] = None
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    async def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        await self.collection.create_index(RANK_SORT)
+        self._indexes_ready = True
+
+    def offer(self, entry: dict):
+        """Insert or reposition a player with their current stats"""
+        previous = self.entries.pop(entry['username'], None)
+        if previous is not None:
+            del self.ranking[bisect_left(self.ranking, rank_key(previous))]
+            self._encoded = None
+        key = rank_key(entry)
+        if len(self.ranking) >= self.capacity and key > self.ranking[-1]:
+            return  # Not good enough for the kept range
+        insort(self.ranking, key)
+        self.entries[entry['username']] = entry
+        if len(self.ranking) > self.capacity:
+            dropped = self.ranking.pop()
+            del self.entries[dropped[3]]
+        self._encoded = None
+
+    async def reconcile(self):
+        """Reload the kept range from Mongo"""
+        await self._ensure_indexes()
+        users = await self.collection.find({}, STATS_PROJECTION) \
+            .sort(RANK_SORT).limit(self.capacity).to_list(self.capacity)
+        entries = [to_entry(user) for user in users]
+        self.entries = {entry['username']: entry for entry in entries}
+        self.ranking = sorted(rank_key(entry) for entry in entries)
+        self.loaded = True
+        self.reconciled_at = time.time()
+        self._encoded = None
+
+    async def record_match(self, session: GameSession):
+        """Add a finished match to the players' stats and the ranking"""
+        from pymongo import UpdateOne
+        updates = {}
+        for player in session.player_stats:
+            if is_bot(player.user_id) or player.team not in ('red', 'blue'):
+                continue
+            inc = {'stats.goals': player.goals}
+            if session.winner == player.team:
+                inc['stats.wins'] = 1
+            elif session.winner in ('red', 'blue'):
+                inc['stats.losses'] = 1
+            updates[player.username] = inc
+        if not updates:
+            return
+        try:
+            # Guests without a user document are not ranked
+            await self.collection.bulk_write(
+                [UpdateOne({'username': username}, {'$inc': inc}) for username, inc in updates.items()],
+                ordered=False
+            )
+            users = await self.collection.find(
+                {'username': {'$in': list(updates)}}, STATS_PROJECTION
+            ).to_list(len(updates))
+        except Exception as e:
+            logger.error(f'Error updating stats of match {session.id}: {e}')
+            return
+        if self.loaded:
+            for user in users:
+                self.offer(to_entry(user))
+
+    def top(self, limit: int = None) -> List[dict]:
+        limit = self.size if limit is None else min(limit, self.size)
+        return [
+            {'rank': rank, **self.entries[key[3]]}
+            for rank, key in enumerate(self.ranking[:limit], 1)
+        ]
+
+    async def encoded(self) -> bytes:
+        """JSON body of the leaderboard endpoint, encoded once per change"""
+        if not self.loaded:
+            await self.reconcile()
+        if self._encoded is None:
+            self._encoded = json.dumps(
+                {'leaderboard': self.top(), 'reconciled_at': self.reconciled_at},
+                separators=(',', ':')
+            ).encode()
+        return self._encoded
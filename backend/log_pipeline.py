@@ -0,0 +1,125 @@
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Optional
+
+# Structured fields handlers can attach with extra={...}; printed as key=value
+STRUCTURED_FIELDS = ('event', 'room', 'sid', 'tick', 'suppressed')
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the event loop: records are dropped when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Per-event sampling and rate limiting.
+
+    The event of a record is its 'event' extra field, or the logger name.
+    INFO and below are sampled (keep 1 of every N, from sample_rates); every
+    level goes through a per-event token bucket of rate_limit records per
+    second. The next record kept for an event carries how many were dropped.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, rate_limit: float = 20):
+        super().__init__()
+        self.sample_every = {
+            event: max(1, round(1 / rate)) if rate > 0 else 0
+            for event, rate in (sample_rates or {}).items()
+        }
+        self.rate_limit = rate_limit
+        self.counters: Dict[str, int] = {}
+        self.buckets: Dict[str, list] = {}  # event -> [tokens, last refill]
+        self.suppressed: Dict[str, int] = {}
+
+    def filter(self, record):
+        event = getattr(record, 'event', None) or record.name
+        keep = True
+
+        if record.levelno < logging.WARNING and event in self.sample_every:
+            every = self.sample_every[event]
+            count = self.counters.get(event, 0)
+            self.counters[event] = count + 1
+            keep = every > 0 and count % every == 0
+
+        if keep and self.rate_limit > 0:
+            now = time.monotonic()
+            bucket = self.buckets.get(event)
+            if bucket is None:
+                bucket = self.buckets[event] = [self.rate_limit, now]
+            bucket[0] = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+            else:
+                keep = False
+
+        if not keep:
+            self.suppressed[event] = self.suppressed.get(event, 0) + 1
+            return False
+        dropped = self.suppressed.pop(event, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """Standard format followed by the structured fields present on the record"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = [
+            f'{name}={getattr(record, name)}'
+            for name in STRUCTURED_FIELDS if getattr(record, name, None) is not None
+        ]
+        return f'{line} [{" ".join(fields)}]' if fields else line
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse 'event=rate,event=rate' (e.g. 'connect=0.1,socketio=0')"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        event, _, rate = item.partition('=')
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            raise ValueError(f'Invalid log sample rate: {item}')
+    return rates
+
+
+def setup_logging(level=logging.INFO, sample_rates: Optional[Dict[str, float]] = None,
+                  rate_limit: float = 20, queue_size: int = 10000,
+                  stream=None) -> logging.handlers.QueueListener:
+    """Route every log record through a bounded queue to a background writer thread.
+
+    Sampling and rate limiting run before the record is queued, so suppressed
+    records cost almost nothing. Returns the listener; stop() it on shutdown
+    to flush the queue.
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates, rate_limit))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(StructuredFormatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    listener.start()
+    return listener
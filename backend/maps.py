@@ -0,0 +1,155 @@
+import json
+import math
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Tuple
+
+MAPS_DIR = Path(__file__).parent / 'maps'
+DEFAULT_MAP = 'Classic'
+
+_compiled: Dict[str, 'CompiledMap'] = {}  # Un mapa compilado compartido por todos los engines
+_index: Dict[str, Tuple[str, Path]] = {}  # lowercase name -> (display name, file)
+
+
+class MapError(ValueError):
+    """Raised for unknown maps or invalid map files"""
+
+
+def _segment(ax: float, ay: float, bx: float, by: float) -> tuple:
+    """Segment with its unit direction and length precomputed"""
+    length = math.hypot(bx - ax, by - ay)
+    if length == 0:
+        raise MapError(f'Zero-length segment at ({ax}, {ay})')
+    return (ax, ay, bx, by, (bx - ax) / length, (by - ay) / length, length)
+
+
+class CompiledMap:
+    """Immutable collision geometry of a map, shared by every engine using it.
+
+    Walls and posts are segments with a radius, bucketed into a uniform grid
+    so the ball only tests the segments near its path.
+    """
+    __slots__ = ('name', 'width', 'height', 'restitution', 'kickoff', 'segments',
+                 'goals', 'goal_centers', 'spawns', 'cell_size', '_cols', '_rows', '_cells')
+
+    def __init__(self, spec: dict, cell_size: float = 100):
+        try:
+            self.name = spec['name']
+            self.width = float(spec['width'])
+            self.height = float(spec['height'])
+            self.restitution = float(spec.get('restitution', 0.8))
+            kickoff = spec.get('kickoff', {})
+            self.kickoff = (
+                float(kickoff.get('x', self.width / 2)),
+                float(kickoff.get('y', self.height / 2)),
+                float(kickoff.get('radius', 80)),
+            )
+
+            # (geometry, radius, kind) for every solid segment
+            segments = [(_segment(*wall), 0.0, 'wall') for wall in spec.get('walls', [])]
+            segments += [
+                (_segment(*post['segment']), float(post.get('radius', 0)), 'post')
+                for post in spec.get('posts', [])
+            ]
+            self.segments: Tuple[tuple, ...] = tuple(segments)
+
+            # (defending team, scoring team, geometry, nx, ny) with the normal facing the field
+            goals = []
+            goal_centers = {}
+            for goal in spec['goals']:
+                team = goal['team']
+                geometry = _segment(*goal['segment'])
+                ax, ay, bx, by, ux, uy, _ = geometry
+                nx, ny = -uy, ux
+                if (self.kickoff[0] - ax) * nx + (self.kickoff[1] - ay) * ny < 0:
+                    nx, ny = -nx, -ny
+                goals.append((team, 'blue' if team == 'red' else 'red', geometry, nx, ny))
+                goal_centers[team] = ((ax + bx) / 2, (ay + by) / 2)
+            self.goals = tuple(goals)
+            self.goal_centers = MappingProxyType(goal_centers)
+
+            self.spawns = MappingProxyType({
+                team: tuple((float(x), float(y)) for x, y in points)
+                for team, points in spec.get('spawns', {}).items()
+            })
+        except (KeyError, TypeError, ValueError) as e:
+            raise MapError(f'Invalid map definition: {e}')
+
+        if set(self.goal_centers) != {'red', 'blue'}:
+            raise MapError('A map needs exactly one goal for red and one for blue')
+
+        self.cell_size = cell_size
+        self._cols = max(1, math.ceil(self.width / cell_size))
+        self._rows = max(1, math.ceil(self.height / cell_size))
+        self._cells = self._build_grid()
+
+    def __setattr__(self, name, value):
+        # _cells is assigned last in __init__: from then on the map is frozen
+        if hasattr(self, '_cells'):
+            raise AttributeError('CompiledMap is immutable')
+        object.__setattr__(self, name, value)
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        c0 = min(self._cols - 1, max(0, int(x0 // self.cell_size)))
+        c1 = min(self._cols - 1, max(0, int(x1 // self.cell_size)))
+        r0 = min(self._rows - 1, max(0, int(y0 // self.cell_size)))
+        r1 = min(self._rows - 1, max(0, int(y1 // self.cell_size)))
+        return c0, c1, r0, r1
+
+    def _build_grid(self) -> Tuple[tuple, ...]:
+        buckets: List[List[int]] = [[] for _ in range(self._cols * self._rows)]
+        for index, (geometry, radius, _) in enumerate(self.segments):
+            ax, ay, bx, by = geometry[:4]
+            c0, c1, r0, r1 = self._cell_range(
+                min(ax, bx) - radius, min(ay, by) - radius,
+                max(ax, bx) + radius, max(ay, by) + radius
+            )
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    buckets[row * self._cols + col].append(index)
+        return tuple(tuple(bucket) for bucket in buckets)
+
+    def query(self, x0: float, y0: float, x1: float, y1: float):
+        """Indices of the segments that may touch the box (x0, y0)-(x1, y1)"""
+        c0, c1, r0, r1 = self._cell_range(x0, y0, x1, y1)
+        if c0 == c1 and r0 == r1:
+            return self._cells[r0 * self._cols + c0]
+        found = set()
+        for row in range(r0, r1 + 1):
+            base = row * self._cols
+            for col in range(c0, c1 + 1):
+                found.update(self._cells[base + col])
+        return found
+
+    def spawn_point(self, team: str, index: int):
+        """Spawn point for the index-th player of a team, or None if the map has none"""
+        points = self.spawns.get(team)
+        if not points:
+            return None
+        return points[index % len(points)]
+
+
+def _map_index() -> Dict[str, Tuple[str, Path]]:
+    if not _index:
+        for path in sorted(MAPS_DIR.glob('*.json')):
+            with open(path) as f:
+                name = json.load(f).get('name', path.stem)
+            _index[name.lower()] = (name, path)
+    return _index
+
+
+def available_maps() -> List[str]:
+    """Display names of every map shipped in the maps directory"""
+    return [name for name, _ in _map_index().values()]
+
+
+def load_map(name: str = DEFAULT_MAP) -> CompiledMap:
+    """Load and compile a map once; later calls return the same shared object"""
+    key = (name or DEFAULT_MAP).lower()
+    if key not in _compiled:
+        entry = _map_index().get(key)
+        if entry is None:
+            raise MapError(f'Unknown map: {name}')
+        with open(entry[1]) as f:
+            _compiled[key] = CompiledMap(json.load(f))
+    return _compiled[key]
@@ -0,0 +1,203 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from maps import CompiledMap
+
+HEATMAP_CELL = 50  # Field units per heatmap cell
+SAMPLE_EVERY = 9  # Game time between heatmap samples, in 90 Hz ticks (10 per second at any tick rate)
+TOUCH_DEBOUNCE = 10  # Ticks a player keeps the ball before contacts count as a new touch
+FLUSH_SAMPLES = 512  # Buffered samples per player before they are added to the grid
+
+TEAMS = ('red', 'blue')
+
+
+def new_counters() -> dict:
+    return {'team': None, 'touches': 0, 'kicks': 0, 'shots': 0, 'passes': 0, 'assists': 0}
+
+
+class MatchStats:
+    """Post-match analytics accumulated by the engine while it simulates.
+
+    The engine reports ball contacts and kicks from its physics code and
+    calls step once per tick, so nothing has to be recomputed from
+    snapshots afterwards. Possession is the time each team was the last to
+    touch the ball; a pass is a touch by a teammate of the previous toucher,
+    and a chain is an unbroken sequence of passes. Positions are sampled
+    every SAMPLE_EVERY base ticks of game time (the scaled dt of each
+    step, so the density does not depend on GAME_TICK_RATE) into one small
+    occupancy grid per player; samples are buffered as cell indices and
+    added to the NumPy grids in batches, so a tick never pays for
+    per-element array indexing. Players
+    are keyed by name, which survives migrations and reconnects.
+    """
+
+    def __init__(self, field: CompiledMap, cell: int = HEATMAP_CELL, sample_every: int = SAMPLE_EVERY):
+        self.field = field
+        self.cell = cell
+        self.sample_every = sample_every
+        self.cols = max(1, math.ceil(field.width / cell))
+        self.rows = max(1, math.ceil(field.height / cell))
+        self.players: Dict[str, dict] = {}  # name -> counters
+        self.heatmaps: Dict[str, np.ndarray] = {}  # name -> rows x cols sample counts
+        self.pending: Dict[str, List[int]] = {}  # name -> flat cell indices not in the grid yet
+        self.samples = 0
+        self.sample_clock = 0.0  # Game time since the last sample (scaled ticks)
+        self.possession = dict.fromkeys(TEAMS, 0.0)  # Ticks of possession (scaled)
+        self.longest_chain = dict.fromkeys(TEAMS, 0)
+        self.chains = dict.fromkeys(TEAMS, 0)  # Chains of at least one pass
+        self.holder: Optional[str] = None  # Last player to touch the ball
+        self.holder_team: Optional[str] = None
+        self.last_touch_tick = 0
+        self.last_passer: Optional[str] = None  # Passer of the current holder, for assists
+        self.kicked = False  # Whether the holder kicked the ball since touching it
+        self.chain = 0  # Passes in the current chain
+
+    def _counters(self, name: str) -> dict:
+        counters = self.players.get(name)
+        if counters is None:
+            counters = self.players[name] = new_counters()
+        return counters
+
+    def _end_chain(self):
+        if self.chain:
+            self.chains[self.holder_team] += 1
+        self.chain = 0
+        self.last_passer = None
+
+    def touch(self, name: str, team: str, tick: int):
+        """The ball bounced off (or was kicked by) a player"""
+        if name == self.holder and tick - self.last_touch_tick <= TOUCH_DEBOUNCE:
+            self.last_touch_tick = tick  # Still dribbling
+            return
+        counters = self._counters(name)
+        counters['team'] = team
+        counters['touches'] += 1
+        if self.holder is not None and self.holder != name:
+            if self.holder_team != team:
+                self._end_chain()
+            elif self.kicked:
+                # Teammates bumping the ball between them is not a pass
+                self.players[self.holder]['passes'] += 1
+                self.last_passer = self.holder
+                self.chain += 1
+                if self.chain > self.longest_chain[team]:
+                    self.longest_chain[team] = self.chain
+            self.kicked = False
+        self.holder = name
+        self.holder_team = team
+        self.last_touch_tick = tick
+
+    def kick(self, name: str, team: str, tick: int, ball: dict):
+        """A player kicked the ball (its velocity already updated)"""
+        self.touch(name, team, tick)
+        self.kicked = True
+        counters = self.players[name]
+        counters['kicks'] += 1
+        if self.is_shot(team, ball):
+            counters['shots'] += 1
+
+    def is_shot(self, team: str, ball: dict) -> bool:
+        """Whether the ball is heading between the posts of the goal team attacks"""
+        vx, vy = ball['vx'], ball['vy']
+        for _, scorer, (ax, ay, bx, by, ux, uy, length), nx, ny in self.field.goals:
+            if scorer != team:
+                continue
+            vn = vx * nx + vy * ny
+            if vn >= 0:
+                return False  # Moving away from the goal line (normals face the field)
+            t = -((ball['x'] - ax) * nx + (ball['y'] - ay) * ny) / vn
+            along = (ball['x'] + vx * t - ax) * ux + (ball['y'] + vy * t - ay) * uy
+            return 0 <= along <= length
+        return False
+
+    def goal(self, scoring_team: str):
+        """Credit the assist and reset possession for the kickoff"""
+        if self.holder_team == scoring_team and self.last_passer:
+            self.players[self.last_passer]['assists'] += 1
+        self._end_chain()
+        self.holder = None
+        self.holder_team = None
+        self.kicked = False
+
+    def step(self, tick: int, players: dict, scale: float = 1.0):
+        """Once per physics step, after the ball moved"""
+        if self.holder_team:
+            self.possession[self.holder_team] += scale
+        self.sample_clock += scale
+        if self.sample_clock < self.sample_every:
+            return
+        self.sample_clock -= self.sample_every
+        self.samples += 1
+        cell, cols, last_col, last_row = self.cell, self.cols, self.cols - 1, self.rows - 1
+        for player in players.values():
+            pending = self.pending.get(player['name'])
+            if pending is None:
+                pending = self.pending[player['name']] = []
+            pending.append(min(last_row, int(player['y'] // cell)) * cols + min(last_col, int(player['x'] // cell)))
+            if len(pending) >= FLUSH_SAMPLES:
+                self._flush(player['name'])
+
+    def _flush(self, name: str):
+        """Add a player's buffered samples to their grid"""
+        pending = self.pending.pop(name, None)
+        grid = self.heatmaps.get(name)
+        if grid is None:
+            grid = self.heatmaps[name] = np.zeros((self.rows, self.cols), dtype=np.uint32)
+        if pending:
+            grid += np.bincount(pending, minlength=self.rows * self.cols).reshape(self.rows, self.cols).astype(np.uint32)
+
+    def _flush_all(self):
+        for name in list(self.pending):
+            self._flush(name)
+
+    def summary(self) -> dict:
+        """JSON-ready per-player and per-team aggregates"""
+        self._flush_all()
+        total = sum(self.possession.values())
+        teams = {
+            team: {
+                'possession': round(100 * self.possession[team] / total, 1) if total else 0.0,
+                'shots': sum(p['shots'] for p in self.players.values() if p['team'] == team),
+                'passes': sum(p['passes'] for p in self.players.values() if p['team'] == team),
+                'chains': self.chains[team] + (1 if self.chain and self.holder_team == team else 0),
+                'longest_chain': self.longest_chain[team]
+            }
+            for team in TEAMS
+        }
+        players = {name: dict(counters) for name, counters in self.players.items()}
+        for name, grid in self.heatmaps.items():
+            players.setdefault(name, new_counters())['heatmap'] = grid.tolist()
+        return {
+            'teams': teams,
+            'players': players,
+            'heatmap': {'cell': self.cell, 'rows': self.rows, 'cols': self.cols, 'samples': self.samples}
+        }
+
+    def to_state(self) -> dict:
+        """Checkpoint form (see GameEngine.to_checkpoint)"""
+        self._flush_all()
+        return {
+            'players': self.players,
+            'heatmaps': {name: grid.tolist() for name, grid in self.heatmaps.items()},
+            'samples': self.samples,
+            'sample_clock': self.sample_clock,
+            'possession': self.possession,
+            'longest_chain': self.longest_chain,
+            'chains': self.chains,
+            'holder': [self.holder, self.holder_team, self.last_passer, self.chain, self.kicked]
+        }
+
+    def load_state(self, state: dict):
+        """Restore counters saved by to_state"""
+        self.players = state['players']
+        self.heatmaps = {
+            name: np.array(grid, dtype=np.uint32) for name, grid in state['heatmaps'].items()
+        }
+        self.samples = state['samples']
+        self.sample_clock = state.get('sample_clock', 0.0)
+        self.possession = state['possession']
+        self.longest_chain = state['longest_chain']
+        self.chains = state['chains']
+        self.holder, self.holder_team, self.last_passer, self.chain, self.kicked = state['holder']
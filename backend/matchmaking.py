@@ -0,0 +1,130 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+BASE_RATING = 1000  # Rating of players without results
+BUCKET_WIDTH = 100  # Rating points per queue bucket
+
+
+def rating_of(stats: Optional[dict]) -> int:
+    """Matchmaking rating from a user's stats"""
+    stats = stats or {}
+    return BASE_RATING + 25 * (stats.get('wins', 0) - stats.get('losses', 0))
+
+
+class Ticket:
+    """A player waiting in the matchmaking queue"""
+    __slots__ = ('sid', 'username', 'rating', 'mode', 'queued_at')
+
+    def __init__(self, sid: str, username: str, rating: int, mode: str, queued_at: float):
+        self.sid = sid
+        self.username = username
+        self.rating = rating
+        self.mode = mode
+        self.queued_at = queued_at
+
+
+def balance_teams(tickets: List[Ticket]) -> Tuple[List[Ticket], List[Ticket]]:
+    """Split players into two equal teams with close rating totals"""
+    half = len(tickets) // 2
+    red, blue = [], []
+    red_total = blue_total = 0
+    # Best players first, each one to the weaker team that still has room
+    for ticket in sorted(tickets, key=lambda t: t.rating, reverse=True):
+        if len(blue) >= half or (len(red) < half and red_total <= blue_total):
+            red.append(ticket)
+            red_total += ticket.rating
+        else:
+            blue.append(ticket)
+            blue_total += ticket.rating
+    return red, blue
+
+
+class MatchQueue:
+    """Players waiting for a match, bucketed by mode and rating.
+
+    Each bucket keeps its tickets in arrival order. A match is searched
+    around one ticket's bucket only, starting with the closest ratings; the
+    search window widens by one bucket every widen_after seconds the ticket
+    has waited, up to max_radius. The cost of forming a match depends on
+    the match size and window, not on how many players are queued.
+    """
+
+    def __init__(self, bucket_width: int = BUCKET_WIDTH, widen_after: float = 10, max_radius: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.bucket_width = bucket_width
+        self.widen_after = widen_after
+        self.max_radius = max_radius
+        self.clock = clock
+        self.buckets: Dict[str, Dict[int, OrderedDict]] = {}  # mode -> bucket -> {sid: Ticket}
+        self.tickets: Dict[str, Ticket] = {}  # sid -> Ticket
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self.tickets
+
+    def bucket_of(self, rating: int) -> int:
+        return rating // self.bucket_width
+
+    def add(self, sid: str, username: str, rating: int, mode: str) -> Ticket:
+        """Queue a player (again, if they already were)"""
+        self.remove(sid)
+        ticket = Ticket(sid, username, rating, mode, self.clock())
+        self.buckets.setdefault(mode, {}).setdefault(self.bucket_of(rating), OrderedDict())[sid] = ticket
+        self.tickets[sid] = ticket
+        return ticket
+
+    def remove(self, sid: str) -> Optional[Ticket]:
+        ticket = self.tickets.pop(sid, None)
+        if ticket is None:
+            return None
+        mode_buckets = self.buckets[ticket.mode]
+        index = self.bucket_of(ticket.rating)
+        del mode_buckets[index][sid]
+        if not mode_buckets[index]:
+            del mode_buckets[index]
+            if not mode_buckets:
+                del self.buckets[ticket.mode]
+        return ticket
+
+    def radius(self, ticket: Ticket, now: float) -> int:
+        """Buckets searched on each side of the ticket's own"""
+        return min(self.max_radius, int((now - ticket.queued_at) // self.widen_after))
+
+    def find_match(self, ticket: Ticket, size: int, now: float = None) -> Optional[List[Ticket]]:
+        """Take size players around ticket out of the queue, or None if not enough are waiting"""
+        now = self.clock() if now is None else now
+        mode_buckets = self.buckets.get(ticket.mode, {})
+        center = self.bucket_of(ticket.rating)
+        players = [ticket]
+        for distance in range(self.radius(ticket, now) + 1):
+            for index in ((center,) if distance == 0 else (center - distance, center + distance)):
+                for candidate in mode_buckets.get(index, {}).values():
+                    if candidate is not ticket:
+                        players.append(candidate)
+                        if len(players) == size:
+                            for player in players:
+                                self.remove(player.sid)
+                            return players
+        return None
+
+    def match_all(self, size_of: Callable[[str], int]) -> List[Tuple[str, List[Ticket]]]:
+        """(mode, players) of every match that can be formed, oldest tickets first.
+
+        Looks at the oldest ticket of each bucket, so a pass costs one search
+        per non-empty bucket whatever the queue length.
+        """
+        now = self.clock()
+        matches = []
+        for mode in list(self.buckets):
+            size = size_of(mode)
+            for index in sorted(self.buckets.get(mode, {})):
+                bucket = self.buckets.get(mode, {}).get(index)
+                while bucket:
+                    players = self.find_match(next(iter(bucket.values())), size, now)
+                    if players is None:
+                        break
+                    matches.append((mode, players))
+        return matches
@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from collections import deque
+from types import FunctionType, MethodType, ModuleType
+from typing import Iterable
+
+# Never followed: code, classes and the event loop are shared by the whole process
+_SKIP_TYPES = (type, ModuleType, FunctionType, MethodType, asyncio.AbstractEventLoop)
+
+
+def deep_sizeof(obj, exclude: Iterable = ()) -> int:
+    """Approximate bytes held by obj and everything it references.
+
+    Objects in exclude (and everything only reachable through them) are not
+    counted, e.g. the rules and map an engine shares with other engines.
+    Each object is counted once even if referenced several times.
+    """
+    seen = {id(o) for o in exclude}
+    pending = [obj]
+    total = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _SKIP_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            pending.extend(current)
+        elif isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        else:
+            attributes = getattr(current, '__dict__', None)
+            if attributes is not None:
+                pending.append(attributes)
+            for cls in type(current).__mro__:
+                slots = getattr(cls, '__slots__', ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if name in ('__dict__', '__weakref__'):
+                        continue
+                    value = getattr(current, name, None)
+                    if value is not None:
+                        pending.append(value)
+    return total
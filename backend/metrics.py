@@ -0,0 +1,38 @@
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable
+
+
+class RateMeter:
+    """Amount per second over a sliding window, summed in one-second buckets"""
+
+    def __init__(self, window: int = 5, clock: Callable[[], float] = time.perf_counter):
+        self.window = window
+        self.clock = clock
+        self.buckets: deque = deque(maxlen=window + 1)  # [second, amount]
+
+    def add(self, amount: float):
+        second = int(self.clock())
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += amount
+        else:
+            self.buckets.append([second, amount])
+
+    def rate(self) -> float:
+        """Average per second over the last window complete seconds"""
+        current = int(self.clock())
+        if not self.buckets or self.buckets[0][0] >= current:
+            return 0.0
+        # Right after start there are fewer than window complete seconds
+        span = min(self.window, current - self.buckets[0][0])
+        total = sum(amount for second, amount in self.buckets if current - span <= second < current)
+        return total / span
+
+
+def percentiles(samples: Iterable[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of samples as {'p50': ..., ...} (zeros when empty)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{p}': 0.0 for p in points}
+    last = len(ordered) - 1
+    return {f'p{p}': ordered[min(last, int(round(p / 100 * last)))] for p in points}
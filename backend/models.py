@@ -43,6 +43,8 @@ class Room(BaseModel):
     max_players: int = 6
     current_players: int = 0
     status: Literal['waiting', 'playing', 'finished'] = 'waiting'
+    mode: str = 'classic'
+    map: str = 'Classic'
     players: List[PlayerInRoom] = []
     game_state: GameState = Field(default_factory=GameState)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -51,6 +53,8 @@ class RoomCreate(BaseModel):
     name: str
     max_players: int = 6
     host: str
+    mode: str = 'classic'
+    map: str = 'Classic'
 
 class RoomResponse(BaseModel):
     id: str
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Emit = Callable[..., Awaitable[Any]]
+
+
+class RoomOutbox:
+    """Bounded outbound queue of one room, drained by its own sender task.
+
+    The game loop only enqueues, so emit latency and slow sockets never land
+    inside a physics tick. Reliable events (goals, game over) are sent in
+    order before the snapshot; snapshots are latest-wins, so a sender that
+    falls behind skips stale ones instead of queueing them.
+    """
+
+    def __init__(self, room_id: str, emit: Emit, max_events: int = 64):
+        self.room_id = room_id
+        self.emit = emit
+        self.events: deque = deque()
+        self.max_events = max_events
+        self.snapshot: Optional[Any] = None
+        self.sent_snapshots = 0
+        self.dropped_snapshots = 0  # Superseded before the sender got to them
+        self.dropped_events = 0  # Reliable events refused because the queue was full
+        self.closing = False
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    def put_event(self, event: str, data: dict) -> bool:
+        """Queue a reliable event; False if the queue is full"""
+        if self.closing or len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return False
+        self.events.append((event, data))
+        self.wakeup.set()
+        return True
+
+    def put_snapshot(self, snapshot):
+        """Replace the pending snapshot with a newer one"""
+        if self.closing:
+            return
+        if self.snapshot is not None:
+            self.dropped_snapshots += 1
+        self.snapshot = snapshot
+        self.wakeup.set()
+
+    def close(self):
+        """Stop accepting messages; the sender exits once reliable events are flushed.
+        
+        A pending snapshot is dropped: it would arrive after game_over.
+        """
+        self.closing = True
+        if self.snapshot is not None:
+            self.snapshot = None
+            self.dropped_snapshots += 1
+        self.wakeup.set()
+
+    async def run(self):
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                # Everything queued so far goes out in one pass, reliable events first
+                while self.events:
+                    event, data = self.events.popleft()
+                    await self.send(event, data)
+                snapshot, self.snapshot = self.snapshot, None
+                if snapshot is not None:
+                    await self.send('game_state', snapshot)
+                    self.sent_snapshots += 1
+                if self.closing and not self.events:
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    async def send(self, event: str, data):
+        try:
+            await self.emit(event, data, room=self.room_id)
+        except Exception as e:
+            logger.error(f'Error sending {event} to room {self.room_id}: {e}', extra={'event': 'outbox', 'room': self.room_id})
+
+    def stats(self) -> dict:
+        """Queue counters for monitoring"""
+        return {
+            'queued_events': len(self.events),
+            'sent_snapshots': self.sent_snapshots,
+            'dropped_snapshots': self.dropped_snapshots,
+            'dropped_events': self.dropped_events,
+        }
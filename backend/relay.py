@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+HaxBall Snapshot Relay
+Serves game_state to players and spectators from the shared-memory snapshot
+rings of the game server processes on this machine (SNAPSHOT_RING in server.py),
+so fan-out runs outside the physics processes and scales separately.
+
+Clients connect with Socket.IO and send 'watch' { roomId }.
+
+Usage:
+    python relay.py --prefix haxball_snap --port 8002
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Dict
+
+import socketio
+from fastapi import FastAPI
+
+from snapshot import GameSnapshot, SnapshotJSON
+from snapshot_ring import RingReader, SnapshotRing, discover_rings
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRelay:
+    """Fans the snapshots of every engine ring out to the clients watching each room"""
+    POLL_INTERVAL = 0.002  # Seconds between ring polls (well under one tick)
+    DISCOVER_INTERVAL = 1  # Seconds between scans for new or removed rings
+    ROOM_TIMEOUT = 10  # Seconds without snapshots before a room's latest one is forgotten
+
+    def __init__(self, sio: socketio.AsyncServer, prefix: str):
+        self.sio = sio
+        self.prefix = prefix
+        self.readers: Dict[str, RingReader] = {}  # ring name -> cursor
+        self.latest: Dict[str, GameSnapshot] = {}  # room_id -> newest snapshot, for new watchers
+        self.updated: Dict[str, float] = {}  # room_id -> when its latest snapshot arrived
+        self.sent = 0  # Snapshots emitted (one per room and poll, whatever the watcher count)
+        self.task: asyncio.Task = None
+        self.setup_handlers()
+
+    def setup_handlers(self):
+        @self.sio.on('watch')
+        async def watch(sid, data):
+            """Receive the game_state of a room"""
+            room_id = data['roomId']
+            await self.sio.enter_room(sid, room_id)
+            if room_id in self.latest:
+                await self.sio.emit('game_state', self.latest[room_id], room=sid)
+
+        @self.sio.on('unwatch')
+        async def unwatch(sid, data):
+            await self.sio.leave_room(sid, data['roomId'])
+
+    def discover(self):
+        """Attach to new rings and drop the ones whose process removed them"""
+        names = set(discover_rings(self.prefix))
+        for name in set(self.readers) - names:
+            self.readers.pop(name).ring.close()
+            logger.info(f'Snapshot ring removed: {name}')
+        for name in names - set(self.readers):
+            try:
+                self.readers[name] = RingReader(SnapshotRing.attach(name))
+                logger.info(f'Snapshot ring attached: {name}')
+            except (FileNotFoundError, ValueError) as e:
+                logger.warning(f'Cannot attach snapshot ring {name}: {e}')
+        now = time.monotonic()
+        for room_id in [r for r, t in self.updated.items() if now - t > self.ROOM_TIMEOUT]:
+            del self.updated[room_id]
+            self.latest.pop(room_id, None)
+
+    def collect(self) -> Dict[str, GameSnapshot]:
+        """Newest intact snapshot of every room published since the last poll"""
+        newest = {}
+        for reader in self.readers.values():
+            for number, room_id, tick, payload in reader.poll():
+                # Decoded straight from shared memory: the only copy, shared by every watcher
+                encoded = str(payload, 'utf-8', 'replace')
+                payload.release()
+                if reader.ring.is_current(number):
+                    newest[room_id] = GameSnapshot.from_encoded(room_id, tick, encoded)
+                else:
+                    reader.lost += 1
+        return newest
+
+    async def run(self):
+        """Poll the rings and emit each room's newest snapshot"""
+        next_discover = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_discover:
+                    self.discover()
+                    next_discover = now + self.DISCOVER_INTERVAL
+                for room_id, snapshot in self.collect().items():
+                    self.latest[room_id] = snapshot
+                    self.updated[room_id] = now
+                    await self.sio.emit('game_state', snapshot, room=room_id)
+                    self.sent += 1
+                await asyncio.sleep(self.POLL_INTERVAL)
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            'rings': sorted(self.readers),
+            'rooms': len(self.latest),
+            'sent': self.sent,
+            'lost': sum(reader.lost for reader in self.readers.values())
+        }
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+        for reader in self.readers.values():
+            reader.ring.close()
+        self.readers.clear()
+
+
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    json=SnapshotJSON  # Snapshots are sent as the engine encoded them
+)
+relay = SnapshotRelay(sio, os.environ.get('SNAPSHOT_RING', 'haxball_snap'))
+api = FastAPI()
+
+
+@api.get('/stats')
+async def get_stats():
+    return relay.stats()
+
+
+@api.on_event('startup')
+async def start_relay():
+    relay.task = asyncio.create_task(relay.run())
+
+
+@api.on_event('shutdown')
+async def stop_relay():
+    relay.close()
+
+
+app = socketio.ASGIApp(sio, other_asgi_app=api, socketio_path='/socket.io')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='game_state relay for the HaxBall game server')
+    parser.add_argument('--prefix', default=None,
+                        help='Ring name prefix, the SNAPSHOT_RING of the servers (default: env or haxball_snap)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8002)
+    args = parser.parse_args()
+    if args.prefix:
+        relay.prefix = args.prefix
+    logging.basicConfig(level=logging.INFO)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,160 @@
+import os
+import socket
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def default_node_id() -> str:
+    """Identity of this server process, overridable with NODE_ID"""
+    return os.environ.get('NODE_ID') or f'{socket.gethostname()}:{os.getpid()}'
+
+
+class RoomDirectory(ABC):
+    """Records which node owns each room so lobbies can be shared across nodes.
+
+    Every entry holds the owning node id, the URL clients should connect to
+    for that node and the lobby summary of the room (room_to_dict output).
+    """
+
+    @abstractmethod
+    async def register_room(self, room_id: str, node_id: str, node_url: str, summary: dict):
+        """Create or refresh the entry for a room owned by node_id"""
+
+    @abstractmethod
+    async def unregister_room(self, room_id: str, node_id: str):
+        """Remove a room, only if node_id still owns it"""
+
+    @abstractmethod
+    async def owner_of(self, room_id: str) -> Optional[dict]:
+        """Return {'node_id', 'node_url'} of the owning node, or None"""
+
+    @abstractmethod
+    async def list_rooms(self) -> List[dict]:
+        """Lobby summaries of the rooms of every node, tagged with their node"""
+
+    async def heartbeat(self, node_id: str):
+        """Mark every room of node_id as still alive"""
+
+    async def report_load(self, node_id: str, node_url: str, load: dict):
+        """Publish the load report of a node (SocketManager.load_report output)"""
+
+    async def list_nodes(self) -> List[dict]:
+        """Latest load report of every live node, tagged with node_id and node_url"""
+        return []
+
+    async def close(self):
+        """Release any connection held by the directory"""
+
+
+class InMemoryRoomDirectory(RoomDirectory):
+    """Single-node directory, the default when no shared backend is configured"""
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+        self.nodes: Dict[str, dict] = {}
+
+    async def register_room(self, room_id, node_id, node_url, summary):
+        self.entries[room_id] = {'node_id': node_id, 'node_url': node_url, 'summary': summary}
+
+    async def unregister_room(self, room_id, node_id):
+        entry = self.entries.get(room_id)
+        if entry and entry['node_id'] == node_id:
+            del self.entries[room_id]
+
+    async def owner_of(self, room_id):
+        entry = self.entries.get(room_id)
+        if entry is None:
+            return None
+        return {'node_id': entry['node_id'], 'node_url': entry['node_url']}
+
+    async def list_rooms(self):
+        return [
+            {**entry['summary'], 'node_id': entry['node_id'], 'node_url': entry['node_url']}
+            for entry in self.entries.values()
+        ]
+
+    async def report_load(self, node_id, node_url, load):
+        self.nodes[node_id] = {**load, 'node_id': node_id, 'node_url': node_url}
+
+    async def list_nodes(self):
+        return list(self.nodes.values())
+
+
+class MongoRoomDirectory(RoomDirectory):
+    """Directory shared by every node through a MongoDB collection.
+
+    Entries of a node that stops sending heartbeats expire through a TTL
+    index, so a crashed node disappears from every lobby on its own.
+    Works against any reachable mongod, e.g. a local one for development.
+    """
+
+    def __init__(self, db, collection: str = 'room_directory', ttl_seconds: int = 30):
+        self.db = db
+        self.collection_name = collection
+        self.ttl_seconds = ttl_seconds
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    @property
+    def nodes(self):
+        # Load reports, one document per node
+        return self.db[f'{self.collection_name}_nodes']
+
+    async def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        await self.collection.create_index('updated_at', expireAfterSeconds=self.ttl_seconds)
+        await self.collection.create_index('node_id')
+        await self.nodes.create_index('updated_at', expireAfterSeconds=self.ttl_seconds)
+        self._indexes_ready = True
+
+    async def register_room(self, room_id, node_id, node_url, summary):
+        await self._ensure_indexes()
+        await self.collection.update_one(
+            {'_id': room_id},
+            {'$set': {
+                'node_id': node_id,
+                'node_url': node_url,
+                'summary': summary,
+                'updated_at': _utcnow(),
+            }},
+            upsert=True
+        )
+
+    async def unregister_room(self, room_id, node_id):
+        await self.collection.delete_one({'_id': room_id, 'node_id': node_id})
+
+    async def owner_of(self, room_id):
+        entry = await self.collection.find_one(
+            {'_id': room_id}, {'node_id': 1, 'node_url': 1, '_id': 0}
+        )
+        return entry
+
+    async def list_rooms(self):
+        rooms = []
+        async for entry in self.collection.find({}, {'_id': 0, 'updated_at': 0}):
+            rooms.append({**entry['summary'], 'node_id': entry['node_id'], 'node_url': entry['node_url']})
+        return rooms
+
+    async def heartbeat(self, node_id):
+        await self.collection.update_many({'node_id': node_id}, {'$set': {'updated_at': _utcnow()}})
+
+    async def report_load(self, node_id, node_url, load):
+        await self._ensure_indexes()
+        await self.nodes.replace_one(
+            {'_id': node_id},
+            {**load, 'node_id': node_id, 'node_url': node_url, 'updated_at': _utcnow()},
+            upsert=True
+        )
+
+    async def list_nodes(self):
+        return [node async for node in self.nodes.find({}, {'_id': 0, 'updated_at': 0})]
+
+
+def _utcnow():
+    # TTL indexes need a BSON date
+    return datetime.now(timezone.utc)
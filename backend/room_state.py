@@ -0,0 +1,142 @@
+from typing import Dict, Iterator, Optional
+from bots import is_bot
+
+TEAMS = ('red', 'blue', 'spectator')
+
+
+class RoomPlayer:
+    """A member of a room (bot or human)"""
+    __slots__ = ('user_id', 'username', 'team', 'ready')
+
+    def __init__(self, user_id: str, username: str, team: str = 'spectator', ready: bool = False):
+        self.user_id = user_id
+        self.username = username
+        self.team = team
+        self.ready = ready
+
+    def to_dict(self) -> dict:
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'team': self.team,
+            'ready': self.ready
+        }
+
+
+class RoomState:
+    """In-memory state of a room, indexed by sid.
+
+    Membership, team and ready changes are O(1): players live in a dict
+    (insertion ordered, so the lobby keeps join order) and the counts the
+    handlers check are kept up to date incrementally. Pydantic models are
+    only for the REST API.
+    """
+    __slots__ = ('room_id', 'name', 'host', 'max_players', 'status', 'mode', 'map', 'listed',
+                 'players', 'team_counts', 'bot_count', 'unready_count')
+
+    def __init__(self, room_id: str, name: str, host: str, max_players: int = 6,
+                 status: str = 'waiting', mode: str = 'classic', map: str = 'Classic', listed: bool = True):
+        self.room_id = room_id
+        self.name = name
+        self.host = host
+        self.max_players = max_players
+        self.status = status
+        self.mode = mode
+        self.map = map
+        self.listed = listed  # Shown in the lobby room list (matchmade rooms are not)
+        self.players: Dict[str, RoomPlayer] = {}
+        self.team_counts = dict.fromkeys(TEAMS, 0)
+        self.bot_count = 0
+        self.unready_count = 0  # Players on a team that are not ready
+
+    @property
+    def current_players(self) -> int:
+        return len(self.players)
+
+    @property
+    def human_count(self) -> int:
+        return len(self.players) - self.bot_count
+
+    def __iter__(self) -> Iterator[RoomPlayer]:
+        return iter(self.players.values())
+
+    def get(self, user_id: str) -> Optional[RoomPlayer]:
+        return self.players.get(user_id)
+
+    def _count(self, player: RoomPlayer, sign: int):
+        self.team_counts[player.team] += sign
+        if player.team != 'spectator' and not player.ready:
+            self.unready_count += sign
+
+    def add_player(self, user_id: str, username: str, team: str = 'spectator', ready: bool = False) -> RoomPlayer:
+        if team not in self.team_counts:
+            raise ValueError(f'Unknown team: {team}')
+        self.remove_player(user_id)
+        player = RoomPlayer(user_id, username, team, ready)
+        self.players[user_id] = player
+        self._count(player, 1)
+        if is_bot(user_id):
+            self.bot_count += 1
+        return player
+
+    def remove_player(self, user_id: str) -> Optional[RoomPlayer]:
+        player = self.players.pop(user_id, None)
+        if player:
+            self._count(player, -1)
+            if is_bot(user_id):
+                self.bot_count -= 1
+        return player
+
+    def bot_name(self) -> str:
+        """Lowest free 'Bot N' (the engine and match stats key players by name)"""
+        taken = {player.username for player in self.players.values()}
+        number = 1
+        while f'Bot {number}' in taken:
+            number += 1
+        return f'Bot {number}'
+
+    def set_team(self, user_id: str, team: str) -> bool:
+        """Move a player to a team; False if they are not in the room"""
+        if team not in self.team_counts:
+            raise ValueError(f'Unknown team: {team}')
+        player = self.players.get(user_id)
+        if player is None:
+            return False
+        self._count(player, -1)
+        player.team = team
+        self._count(player, 1)
+        return True
+
+    def set_ready(self, user_id: str, ready: bool) -> bool:
+        """Change the ready flag of a player; False if they are not in the room"""
+        player = self.players.get(user_id)
+        if player is None:
+            return False
+        self._count(player, -1)
+        player.ready = bool(ready)
+        self._count(player, 1)
+        return True
+
+    def reset_ready(self):
+        """After a match: humans have to ready up again, bots are always ready"""
+        for player in self.players.values():
+            self.set_ready(player.user_id, is_bot(player.user_id))
+
+    @property
+    def all_ready(self) -> bool:
+        return self.unready_count == 0
+
+    def to_dict(self) -> dict:
+        """Convert room to dict for JSON serialization"""
+        return {
+            'id': self.room_id,
+            'name': self.name,
+            'host': self.host,
+            'players': [p.to_dict() for p in self.players.values()],
+            'current_players': len(self.players),
+            'maxPlayers': self.max_players,
+            'status': self.status,
+            'mode': self.mode,
+            'map': self.map,
+            'listed': self.listed
+        }
@@ -1,40 +1,94 @@
-from fastapi import FastAPI, APIRouter
+import time
+_import_started = time.perf_counter()  # Startup report: time spent importing
+
+from fastapi import FastAPI, APIRouter, HTTPException, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import socketio
 import os
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from models import User, UserCreate, UserResponse, Room, RoomCreate, RoomResponse
 from socket_handlers import SocketManager
+from snapshot import SnapshotJSON
+from room_directory import InMemoryRoomDirectory, MongoRoomDirectory
+from maps import available_maps
+from auth import UserStore, issue_token
+from log_pipeline import setup_logging, parse_sample_rates
+from database import LazyDatabase
+from history import MatchHistory, CursorError
+from leaderboard import Leaderboard
+from snapshot_ring import SnapshotRing, ring_name
 
+_setup_started = time.perf_counter()
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection: the client and its pool are created on first use
+# (MONGO_URL, DB_NAME, MONGO_MAX_POOL, MONGO_MIN_POOL, MONGO_TIMEOUT_MS)
+db = LazyDatabase()
+user_store = UserStore(db, 'users')
+match_history = MatchHistory(db)
+leaderboard = Leaderboard(db, 'users', size=int(os.environ.get('LEADERBOARD_SIZE', 100)))
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configure logging: records are sampled and written from a background thread
+log_listener = setup_logging(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    sample_rates=parse_sample_rates(os.environ.get('LOG_SAMPLE', '')),
+    rate_limit=float(os.environ.get('LOG_RATE_LIMIT', 20))  # Records per second per event
 )
 logger = logging.getLogger(__name__)
 
+# Per-packet Socket.IO logging is for debugging only: at 90 Hz per room it floods the log
+SOCKETIO_DEBUG = os.environ.get('SOCKETIO_DEBUG', '').lower() in ('1', 'true', 'yes')
+
 # Create Socket.IO server
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins='*',
-    logger=True,
-    engineio_logger=True
+    logger=SOCKETIO_DEBUG,
+    engineio_logger=SOCKETIO_DEBUG,
+    json=SnapshotJSON  # Reuses the cached encoding of game_state snapshots
 )
 
+# Room directory: 'mongo' shares rooms between every node using the same database
+if os.environ.get('ROOM_DIRECTORY', 'memory') == 'mongo':
+    room_directory = MongoRoomDirectory(db)
+else:
+    room_directory = InMemoryRoomDirectory()
+
+# Shared-memory ring of encoded snapshots for relay processes (relay.py) on this machine
+snapshot_ring = None
+if os.environ.get('SNAPSHOT_RING'):
+    snapshot_ring = SnapshotRing.create(
+        ring_name(os.environ['SNAPSHOT_RING']),  # One ring per worker process
+        slots=int(os.environ.get('SNAPSHOT_RING_SLOTS', 512)),
+        slot_size=int(os.environ.get('SNAPSHOT_RING_SLOT_SIZE', 16384))
+    )
+
 # Create Socket Manager
-socket_manager = SocketManager(sio, db)
+socket_manager = SocketManager(
+    sio, db,
+    directory=room_directory,
+    node_id=os.environ.get('NODE_ID'),
+    node_url=os.environ.get('NODE_URL'),  # Public URL clients are redirected to
+    # Ball collisions are swept, so 30-60 Hz keeps the same physics at lower CPU cost
+    tick_rate=int(os.environ.get('GAME_TICK_RATE', 90)),
+    # Share of the event loop ticks may use before new games are queued
+    tick_budget_threshold=float(os.environ.get('GAME_TICK_BUDGET', 0.75)),
+    # Only clients with a signed token from /api/auth may connect
+    require_auth=os.environ.get('REQUIRE_AUTH', '').lower() in ('1', 'true', 'yes'),
+    history=match_history,
+    leaderboard=leaderboard,
+    # Per-tick match traces for offline analysis (disabled when unset)
+    trace_dir=os.environ.get('TRACE_DIR') or None,
+    snapshot_ring=snapshot_ring,
+    relay_url=os.environ.get('RELAY_URL'),  # Public URL of the relays, sent with game_started
+    # game_state only goes out through the relays, this process does no snapshot fan-out
+    relay_only=os.environ.get('RELAY_ONLY', '').lower() in ('1', 'true', 'yes'),
+    users=user_store  # Queue ratings come from the same user cache as logins
+)
 
 # Create FastAPI app
 app = FastAPI()
@@ -47,22 +101,15 @@ api_router = APIRouter(prefix="/api")
 async def register(user_data: UserCreate):
     """Register a new user"""
     try:
-        # Check if username exists
-        existing_user = await db.users.find_one({"username": user_data.username})
-        if existing_user:
+        # One atomic upsert: an existing username comes back as not created
+        user, created = await user_store.get_or_create(user_data.username)
+        if not created:
             return {"error": "Username already exists"}
         
-        # Create user
-        user = User(username=user_data.username)
-        await db.users.insert_one(user.dict())
-        
-        # Generate simple token (in production, use JWT)
-        token = f"token_{user.id}"
-        
         return UserResponse(
-            id=user.id,
-            username=user.username,
-            token=token
+            id=user['id'],
+            username=user['username'],
+            token=issue_token(user['id'], user['username'])
         )
     except Exception as e:
         logger.error(f"Error registering user: {e}")
@@ -70,24 +117,15 @@ async def register(user_data: UserCreate):
 
 @api_router.post("/auth/login", response_model=UserResponse)
 async def login(user_data: UserCreate):
-    """Login user"""
+    """Login user (created on first login)"""
     try:
-        # Find user
-        user_dict = await db.users.find_one({"username": user_data.username})
-        
-        if not user_dict:
-            # Create new user if doesn't exist
-            user = User(username=user_data.username)
-            await db.users.insert_one(user.dict())
-            user_dict = user.dict()
-        
-        # Generate token
-        token = f"token_{user_dict['id']}"
+        # Recently seen users skip the database entirely
+        user, _ = await user_store.get_or_create(user_data.username)
         
         return UserResponse(
-            id=user_dict['id'],
-            username=user_dict['username'],
-            token=token
+            id=user['id'],
+            username=user['username'],
+            token=issue_token(user['id'], user['username'])
         )
     except Exception as e:
         logger.error(f"Error logging in: {e}")
@@ -96,14 +134,65 @@ async def login(user_data: UserCreate):
 # Room endpoints
 @api_router.get("/rooms")
 async def get_rooms():
-    """Get all rooms"""
+    """Get all rooms of every node"""
     try:
-        rooms = list(socket_manager.rooms.values())
-        return {"rooms": [socket_manager.room_to_dict(room) for room in rooms]}
+        return {"rooms": await socket_manager.list_rooms()}
     except Exception as e:
         logger.error(f"Error getting rooms: {e}")
         return {"error": str(e)}
 
+@api_router.get("/leaderboard")
+async def get_leaderboard():
+    """Top players by wins, goals and losses"""
+    try:
+        return Response(content=await leaderboard.encoded(), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error loading leaderboard: {e}")
+        return {"error": str(e)}
+
+# Match history endpoints (newest first, pass next_cursor back to get the next page)
+@api_router.get("/history/users/{username}")
+async def get_user_history(username: str, limit: int = 20, cursor: Optional[str] = None):
+    """Matches a user played in"""
+    try:
+        return await match_history.for_user(username, limit, cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/history/rooms/{room_id}")
+async def get_room_history(room_id: str, limit: int = 20, cursor: Optional[str] = None):
+    """Matches played in a room"""
+    try:
+        return await match_history.for_room(room_id, limit, cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/history/matches/{match_id}")
+async def get_match(match_id: str):
+    """A finished match with the stats of every player"""
+    match = await match_history.get(match_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+    return match
+
+@api_router.get("/load")
+async def get_load():
+    """Live capacity headroom of this node"""
+    return socket_manager.load_report()
+
+@api_router.get("/placement")
+async def get_placement():
+    """Node new rooms should be created on (this one unless another has clearly more headroom)"""
+    target = await socket_manager.pick_node()
+    if target:
+        return {"node_id": target["node_id"], "node_url": target["node_url"]}
+    return {"node_id": socket_manager.node_id, "node_url": socket_manager.node_url}
+
+@api_router.get("/maps")
+async def get_maps():
+    """Get the names of the available maps"""
+    return {"maps": available_maps()}
+
 @api_router.get("/")
 async def root():
     return {"message": "HaxBall API - WebSocket game server running"}
@@ -126,9 +215,34 @@ socket_app = socketio.ASGIApp(
     socketio_path='/socket.io'
 )
 
+_setup_done = time.perf_counter()
+
+@app.on_event("startup")
+async def start_load_reports():
+    # Nodes without rooms report too: they are the best place for new ones
+    socket_manager.ensure_load_reports()
+    socket_manager.ensure_leaderboard_sync()
+    logger.info(
+        f'Startup: imports {(_setup_started - _import_started) * 1000:.0f} ms, '
+        f'setup {(_setup_done - _setup_started) * 1000:.0f} ms, '
+        f'ready after {(time.perf_counter() - _import_started) * 1000:.0f} ms '
+        f'(database connected: {db.connected})'
+    )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    # Hand running matches over to another node before going away
+    await socket_manager.drain_rooms()
+    await socket_manager.wait_background()  # Results of matches that just ended
+    if socket_manager.load_task:
+        socket_manager.load_task.cancel()
+    if socket_manager.leaderboard_task:
+        socket_manager.leaderboard_task.cancel()
+    await room_directory.close()
+    db.close()
+    if snapshot_ring:
+        snapshot_ring.close()
+    log_listener.stop()  # Flush queued log records
     
 # Export socket_app as the main ASGI application
 app = socket_app
\ No newline at end of file
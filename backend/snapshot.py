@@ -0,0 +1,97 @@
+import json
+from types import MappingProxyType
+from typing import Callable, Dict, List
+
+
+class GameSnapshot:
+    """Immutable per-tick game state, encoded to JSON exactly once"""
+    __slots__ = ('room_id', 'tick', 'state', 'encoded', 'size')
+
+    def __init__(self, room_id: str, tick: int, state: dict):
+        # El estado ya viene copiado desde el engine, no comparte referencias
+        encoded = json.dumps(state, separators=(',', ':'))
+        object.__setattr__(self, 'room_id', room_id)
+        object.__setattr__(self, 'tick', tick)
+        object.__setattr__(self, 'state', MappingProxyType(state))
+        object.__setattr__(self, 'encoded', encoded)
+        object.__setattr__(self, 'size', len(encoded))
+
+    @classmethod
+    def from_encoded(cls, room_id: str, tick: int, encoded: str) -> 'GameSnapshot':
+        """Snapshot encoded by another process (the state is not decoded)"""
+        snapshot = cls.__new__(cls)
+        object.__setattr__(snapshot, 'room_id', room_id)
+        object.__setattr__(snapshot, 'tick', tick)
+        object.__setattr__(snapshot, 'state', None)
+        object.__setattr__(snapshot, 'encoded', encoded)
+        object.__setattr__(snapshot, 'size', len(encoded))
+        return snapshot
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GameSnapshot is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('GameSnapshot is immutable')
+
+
+class SnapshotJSON:
+    """json module replacement that splices pre-encoded snapshots into packets.
+
+    Socket.IO builds every event packet as ``json.dumps([event, data])``.
+    When ``data`` is a GameSnapshot its cached encoding is reused instead of
+    serializing the state again.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if isinstance(obj, GameSnapshot):
+            return obj.encoded
+        if isinstance(obj, list) and any(isinstance(item, GameSnapshot) for item in obj):
+            parts = [
+                item.encoded if isinstance(item, GameSnapshot) else json.dumps(item, **kwargs)
+                for item in obj
+            ]
+            return '[' + ','.join(parts) + ']'
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
+
+
+SnapshotConsumer = Callable[[GameSnapshot], None]
+
+
+class SnapshotPipeline:
+    """Fans a single encoded snapshot out to every registered consumer"""
+
+    def __init__(self):
+        self.consumers: Dict[str, List[SnapshotConsumer]] = {}  # room_id -> consumers
+        self.global_consumers: List[SnapshotConsumer] = []  # Reciben snapshots de todas las salas
+        self.latest: Dict[str, GameSnapshot] = {}
+
+    def subscribe(self, consumer: SnapshotConsumer, room_id: str = None):
+        """Register a consumer for one room, or for every room if room_id is None"""
+        if room_id is None:
+            self.global_consumers.append(consumer)
+        else:
+            self.consumers.setdefault(room_id, []).append(consumer)
+
+    def unsubscribe(self, consumer: SnapshotConsumer, room_id: str = None):
+        """Remove a previously registered consumer"""
+        consumers = self.global_consumers if room_id is None else self.consumers.get(room_id, [])
+        if consumer in consumers:
+            consumers.remove(consumer)
+
+    def publish(self, snapshot: GameSnapshot):
+        """Hand the same snapshot object to every consumer"""
+        self.latest[snapshot.room_id] = snapshot
+        for consumer in self.global_consumers:
+            consumer(snapshot)
+        for consumer in self.consumers.get(snapshot.room_id, ()):
+            consumer(snapshot)
+
+    def drop_room(self, room_id: str):
+        """Forget consumers and cached snapshot of a finished room"""
+        self.consumers.pop(room_id, None)
+        self.latest.pop(room_id, None)
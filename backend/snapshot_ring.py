@@ -0,0 +1,163 @@
+import logging
+import os
+import re
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+RING_MAGIC = b'HXSR'
+SHM_DIR = '/dev/shm'  # Where POSIX shared memory segments are listed (Linux)
+
+# magic, slot count, slot size, records published so far
+_HEADER = struct.Struct('<4sIIQ')
+_PUBLISHED = struct.Struct('<Q')
+_PUBLISHED_OFFSET = 12
+# record number + 1 (0 while being written), tick, room id length, payload length
+_SLOT = struct.Struct('<QIHI')
+
+
+class SnapshotRing:
+    """Single-writer ring of encoded snapshots in POSIX shared memory.
+
+    The engine process appends (room_id, tick, JSON payload) records; any
+    number of relay processes attach by name and read them through
+    memoryviews of the shared segment. Slot i holds record number n where
+    n % slots == i. The writer clears a slot's sequence before rewriting
+    it and sets it after, so readers can tell a record they copied was not
+    overwritten halfway: readers never block the writer, a slow reader
+    just loses the oldest records, like a client losing stale snapshots.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        magic, self.slots, self.slot_size, _ = _HEADER.unpack_from(self.buf, 0)
+        if magic != RING_MAGIC:
+            raise ValueError(f'{shm.name} is not a snapshot ring')
+        self.max_payload = self.slot_size - _SLOT.size
+        self.published = _PUBLISHED.unpack_from(self.buf, _PUBLISHED_OFFSET)[0]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, name: str, slots: int = 512, slot_size: int = 16384) -> 'SnapshotRing':
+        """Create (or replace a stale) ring owned by this process"""
+        size = _HEADER.size + slots * slot_size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a process that crashed: nobody writes to it any more
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, RING_MAGIC, slots, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SnapshotRing':
+        """Open an existing ring for reading"""
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the writer's segment when they exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    def _slot_offset(self, number: int) -> int:
+        return _HEADER.size + (number % self.slots) * self.slot_size
+
+    def publish(self, room_id: str, tick: int, payload: bytes) -> bool:
+        """Append a record; False if it does not fit in a slot"""
+        room = room_id.encode()
+        if len(room) + len(payload) > self.max_payload:
+            return False
+        number = self.published
+        offset = self._slot_offset(number)
+        buf = self.buf
+        _SLOT.pack_into(buf, offset, 0, 0, 0, 0)  # Invalidate before overwriting
+        start = offset + _SLOT.size
+        buf[start:start + len(room)] = room
+        buf[start + len(room):start + len(room) + len(payload)] = payload
+        _SLOT.pack_into(buf, offset, number + 1, tick, len(room), len(payload))
+        self.published = number + 1
+        _PUBLISHED.pack_into(buf, _PUBLISHED_OFFSET, self.published)
+        return True
+
+    def head(self) -> int:
+        """Records published so far, as seen by a reader"""
+        return _PUBLISHED.unpack_from(self.buf, _PUBLISHED_OFFSET)[0]
+
+    def read(self, number: int):
+        """(room_id, tick, payload view) of record number, or None if it was overwritten.
+
+        The view points into shared memory: copy or decode it, then confirm
+        with is_current(number) before using the result.
+        """
+        offset = self._slot_offset(number)
+        sequence, tick, room_length, payload_length = _SLOT.unpack_from(self.buf, offset)
+        if sequence != number + 1:
+            return None
+        start = offset + _SLOT.size
+        room_id = bytes(self.buf[start:start + room_length]).decode()
+        payload = self.buf[start + room_length:start + room_length + payload_length]
+        return room_id, tick, payload
+
+    def is_current(self, number: int) -> bool:
+        """Whether record number is still intact in its slot"""
+        return _SLOT.unpack_from(self.buf, self._slot_offset(number))[0] == number + 1
+
+    def close(self):
+        """Detach; the owner also removes the segment"""
+        self.buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            logger.warning(f'Snapshot ring {self.name} still has views in use')
+            return
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingReader:
+    """Cursor of one relay over one ring, starting at the live head"""
+
+    def __init__(self, ring: SnapshotRing):
+        self.ring = ring
+        self.next = ring.head()
+        self.lost = 0  # Records overwritten before they were read
+
+    def poll(self) -> Iterator[Tuple[int, str, int, memoryview]]:
+        """(number, room_id, tick, payload view) of every record published since the last poll"""
+        head = self.ring.head()
+        if head - self.next > self.ring.slots:
+            self.lost += head - self.ring.slots - self.next
+            self.next = head - self.ring.slots
+        while self.next < head:
+            number = self.next
+            self.next += 1
+            record = self.ring.read(number)
+            if record is None:
+                self.lost += 1
+                continue
+            yield (number,) + record
+
+
+def ring_name(prefix: str, pid: int = None) -> str:
+    """Name of the ring published by an engine process"""
+    return f'{prefix}_{pid or os.getpid()}'
+
+
+def discover_rings(prefix: str) -> List[str]:
+    """Names of the rings of every engine process on this machine"""
+    try:
+        pattern = re.compile(re.escape(prefix) + r'_\d+')  # ring_name: prefix_pid
+        return sorted(name for name in os.listdir(SHM_DIR) if pattern.fullmatch(name))
+    except FileNotFoundError:
+        return []
@@ -1,83 +1,192 @@
 import socketio
 import asyncio
-from typing import Dict
-from models import Room, PlayerInRoom, GameState
+import time
+import uuid
+from typing import Dict, List, Set
+from room_state import RoomState
 from game_engine import GameEngine
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from snapshot import SnapshotPipeline, GameSnapshot
+from snapshot_ring import SnapshotRing
+from bots import BotDirector, new_bot_id, is_bot
+from flood import FloodGuard
+from tick_clock import TickClock
+from tick_budget import TickBudget
+from metrics import RateMeter
+from outbound import RoomOutbox
+from memory import deep_sizeof
+from auth import UserStore, verify_token
+from history import MatchHistory
+from leaderboard import Leaderboard
+from matchmaking import MatchQueue, balance_teams, rating_of
+from trace_export import TraceRecorder
+from models import GameSession, PlayerStats
+from datetime import datetime
+from room_directory import RoomDirectory, InMemoryRoomDirectory, default_node_id
+from maps import load_map, DEFAULT_MAP
+from rules import get_rules, DEFAULT_MODE
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SocketManager:
-    def __init__(self, sio: socketio.AsyncServer, db: AsyncIOMotorDatabase):
+    BOT_DECISION_HZ = 30  # Bots decide less often than physics runs
+    DIRECTORY_HEARTBEAT = 10  # Seconds between room directory heartbeats
+    DRAIN_GRACE = 10  # Seconds allowed to checkpoint every room on shutdown
+    REJOIN_TIMEOUT = 30  # Seconds migrated players have to reconnect
+    MAX_CATCH_UP_TICKS = 3  # Extra physics steps per iteration before late ticks are skipped
+    ROOM_UPDATE_WINDOW = 0.05  # Seconds lobby changes are batched into one room update
+    SWEEP_INTERVAL = 60  # Seconds between consistency sweeps of the room tables
+    TICK_BUDGET_THRESHOLD = 0.75  # Event loop share game ticks may use before new games wait
+    MAX_QUEUED_STARTS = 20  # Games waiting for budget before start requests are refused
+    MAX_QUEUE_WAIT = 60  # Seconds a queued game waits before giving up
+    ADMISSION_RETRY = 1  # Seconds between admission checks of queued games
+    LOAD_REPORT_INTERVAL = 5  # Seconds between load reports to the room directory
+    LEADERBOARD_SYNC_INTERVAL = 60  # Seconds between leaderboard reloads from Mongo
+    MATCHMAKING_INTERVAL = 1  # Seconds between matchmaking passes over the queue
+    PLACEMENT_MARGIN = 0.1  # Extra headroom another node needs before new rooms are sent there
+    
+    def __init__(self, sio: socketio.AsyncServer, db,
+                 directory: RoomDirectory = None, node_id: str = None, node_url: str = None,
+                 tick_rate: int = 90, tick_budget_threshold: float = None, require_auth: bool = False,
+                 history: MatchHistory = None, leaderboard: Leaderboard = None, trace_dir: str = None,
+                 snapshot_ring: SnapshotRing = None, relay_url: str = None, relay_only: bool = False,
+                 users: UserStore = None):
         self.sio = sio
         self.db = db
-        self.rooms: Dict[str, Room] = {}  # In-memory room storage
+        self.tick_rate = tick_rate  # Physics/snapshot rate of every game loop
+        self.tick_budget = TickBudget()  # Event loop time spent on ticks, for admission control
+        self.tick_budget_threshold = tick_budget_threshold or self.TICK_BUDGET_THRESHOLD
+        self.queued_starts: Dict[str, float] = {}  # room_id -> time queued, in arrival order
+        self.admission_task: asyncio.Task = None
+        # Shared directory of rooms across nodes (in-memory for a single node)
+        self.directory = directory or InMemoryRoomDirectory()
+        self.node_id = node_id or default_node_id()
+        self.node_url = node_url
+        self.directory_task: asyncio.Task = None
+        self.pending_rejoins: Dict[str, Dict[str, dict]] = {}  # room_id -> {username: old player}
+        self.resume_after_rejoin: Set[str] = set()  # Migrated rooms that were running when drained
+        self.rejoin_tasks: Dict[str, asyncio.Task] = {}  # room_id -> expiry of its pending rejoins
+        self.background_tasks: Set[asyncio.Task] = set()  # Fire-and-forget work, referenced until done
+        self.draining = False  # Shutting down: drained matches are left for other nodes to restore
+        self.rooms: Dict[str, RoomState] = {}  # In-memory room storage (by sid, see room_state)
         self.game_engines: Dict[str, GameEngine] = {}  # Game engines for active games
         self.game_tasks: Dict[str, asyncio.Task] = {}  # Game loop tasks
+        self.tick_clocks: Dict[str, TickClock] = {}  # Timing of every running game loop
+        self.outboxes: Dict[str, RoomOutbox] = {}  # Outbound queues of running matches
+        # Batched room updates: room_id -> changed player ids, or None for a full update
+        self.dirty_rooms: Dict[str, Set[str]] = {}
+        self.room_update_tasks: Dict[str, asyncio.Task] = {}
+        self.sweeper_task: asyncio.Task = None
+        self.leak_suspects: Set[tuple] = set()  # Inconsistencies seen by the last sweep
+        self.memory_report: dict = {}  # Counts and per-room bytes from the last sweep
+        self.snapshots = SnapshotPipeline()  # Per-tick snapshots shared by all consumers
+        if snapshot_ring:
+            self.snapshots.subscribe(self.publish_to_ring)
+        self.bots = BotDirector()  # Computer-controlled players of every room
+        self.bot_task: asyncio.Task = None
+        self.flood = FloodGuard()  # Per-sid limits for input and chat events
+        self.connected_sids = 0
+        self.require_auth = require_auth  # Refuse connections without a valid session token
+        self.history = history  # Where finished matches are recorded (None: not recorded)
+        self.leaderboard = leaderboard  # Updated with every finished match
+        self.leaderboard_task: asyncio.Task = None
+        self.trace_dir = trace_dir  # Where match traces are exported (None: not recorded)
+        # Snapshots for out-of-process relays; relay_only leaves all game_state fan-out to them
+        self.snapshot_ring = snapshot_ring
+        self.relay_url = relay_url if snapshot_ring else None  # Relays only see rooms published to the ring
+        if relay_url and not snapshot_ring:
+            logger.warning('RELAY_URL is set without SNAPSHOT_RING: game_state is sent by this server')
+        self.relay_only = relay_only and snapshot_ring is not None
+        self.ring_overflows = 0  # Snapshots too large for a ring slot
+        self.match_queue = MatchQueue()  # Players waiting for a matchmade game
+        self.users = users or UserStore(db)  # Cached user documents, for queue ratings
+        self.matchmaking_task: asyncio.Task = None
+        self.identities: Dict[str, str] = {}  # sid -> username verified from its token
+        self.egress = RateMeter()  # Snapshot bytes per second sent to clients
+        self.load_task: asyncio.Task = None
         self.setup_handlers()
         
     def setup_handlers(self):
         """Setup all socket event handlers"""
         
         @self.sio.event
-        async def connect(sid, environ):
-            logger.info(f'Client connected: {sid}')
+        async def connect(sid, environ, auth=None):
+            # Signed tokens are verified in-process, no database lookup
+            claims = verify_token((auth or {}).get('token'))
+            if claims is None and self.require_auth:
+                logger.info(f'Connection refused, invalid token: {sid}', extra={'event': 'connect', 'sid': sid})
+                return False
+            if claims:
+                self.identities[sid] = claims['name']
+            logger.info(f'Client connected: {sid}', extra={'event': 'connect', 'sid': sid})
+            self.connected_sids += 1
             
         @self.sio.event
         async def disconnect(sid):
-            logger.info(f'Client disconnected: {sid}')
+            logger.info(f'Client disconnected: {sid}', extra={'event': 'disconnect', 'sid': sid})
+            self.connected_sids -= 1
+            self.match_queue.remove(sid)
             # Handle player disconnect
             await self.handle_player_disconnect(sid)
+            self.flood.forget(sid)
+            self.identities.pop(sid, None)
             
         @self.sio.on('join_lobby')
         async def join_lobby(sid):
             """Client joins lobby to receive room updates"""
             await self.sio.enter_room(sid, 'lobby')
             # Send current room list
-            room_list = [self.room_to_dict(room) for room in self.rooms.values()]
+            room_list = await self.list_rooms()
             await self.sio.emit('room_list_update', {'rooms': room_list}, room=sid)
             
         @self.sio.on('create_room')
         async def create_room(sid, data):
             """Create a new game room"""
             try:
+                # Steer new rooms to a clearly less loaded node (clients re-send with placed=true)
+                if not data.get('placed'):
+                    target = await self.pick_node()
+                    if target:
+                        await self.sio.emit('create_redirect', {'nodeUrl': target['node_url']}, room=sid)
+                        return
+                        
+                host = self.identities.get(sid, data['host'])
                 room_id = data['name'].replace(' ', '_') + '_' + sid[:6]
+                # Validates mode and map names (raise ValueError when unknown)
+                rules = get_rules(data.get('mode', DEFAULT_MODE))
+                field = load_map(data.get('map') or rules.map_name)
                 
-                room = Room(
+                room = RoomState(
                     room_id=room_id,
                     name=data['name'],
-                    host=data['host'],
-                    max_players=data.get('maxPlayers', 6),
-                    current_players=1,
+                    host=host,
+                    max_players=data.get('maxPlayers', rules.max_players),
                     status='waiting',
-                    players=[PlayerInRoom(
-                        user_id=sid,
-                        username=data['host'],
-                        team='spectator',
-                        ready=False
-                    )]
+                    mode=rules.name,
+                    map=field.name
                 )
+                room.add_player(sid, host)
                 
                 self.rooms[room_id] = room
+                await self.publish_room(room_id)
+                self.ensure_directory_loop()
+                self.ensure_sweeper()
                 
                 # Store session data
-                await self.sio.save_session(sid, {'username': data['host'], 'room_id': room_id})
+                await self.sio.save_session(sid, {'username': host, 'room_id': room_id})
                 
                 # Join room
                 await self.sio.enter_room(sid, room_id)
                 
                 # Notify lobby
-                await self.sio.emit('room_list_update', 
-                                  {'rooms': [self.room_to_dict(r) for r in self.rooms.values()]}, 
-                                  room='lobby')
+                await self.broadcast_room_list()
                 
                 # Send room data to creator
                 await self.sio.emit('room_created', {'room': self.room_to_dict(room)}, room=sid)
                 
-                logger.info(f'Room created: {room_id}')
+                logger.info(f'Room created: {room_id}', extra={'event': 'create_room', 'sid': sid, 'room': room_id})
             except Exception as e:
-                logger.error(f'Error creating room: {e}')
+                logger.error(f'Error creating room: {e}', extra={'event': 'create_room', 'sid': sid})
                 await self.sio.emit('error', {'message': str(e)}, room=sid)
                 
         @self.sio.on('join_room')
@@ -85,11 +194,24 @@ class SocketManager:
             """Join an existing room"""
             try:
                 room_id = data['roomId']
-                username = data['username']
+                username = self.identities.get(sid, data['username'])
                 
                 if room_id not in self.rooms:
-                    await self.sio.emit('error', {'message': 'Room not found'}, room=sid)
-                    return
+                    # The room may live on another node: send the client there
+                    owner = await self.directory.owner_of(room_id)
+                    if owner and owner['node_id'] != self.node_id and owner.get('node_url'):
+                        await self.sio.emit('room_redirect', 
+                                          {'roomId': room_id, 'nodeUrl': owner['node_url']}, 
+                                          room=sid)
+                        return
+                    # This node is shutting down: the client retries on another one
+                    if self.draining:
+                        await self.sio.emit('server_draining', {'roomId': room_id}, room=sid)
+                        return
+                    # Or it may have been drained from a node that shut down
+                    if not await self.restore_room(room_id):
+                        await self.sio.emit('error', {'message': 'Room not found'}, room=sid)
+                        return
                     
                 room = self.rooms[room_id]
                 
@@ -97,14 +219,18 @@ class SocketManager:
                     await self.sio.emit('error', {'message': 'Room is full'}, room=sid)
                     return
                     
-                # Add player to room
-                room.players.append(PlayerInRoom(
-                    user_id=sid,
-                    username=username,
-                    team='spectator',
-                    ready=False
-                ))
-                room.current_players += 1
+                # Add player to room, taking back their place if the match was migrated
+                previous = self.pending_rejoins.get(room_id, {}).pop(username, None)
+                room.add_player(
+                    sid,
+                    username,
+                    team=previous['team'] if previous else 'spectator',
+                    ready=previous['ready'] if previous else False
+                )
+                if previous and room_id in self.game_engines:
+                    self.game_engines[room_id].rebind_player(previous['user_id'], sid)
+                    if not self.pending_rejoins[room_id]:
+                        await self.finish_rejoin(room_id)
                 
                 # Save session
                 await self.sio.save_session(sid, {'username': username, 'room_id': room_id})
@@ -114,17 +240,18 @@ class SocketManager:
                 
                 # Notify room
                 await self.sio.emit('player_joined', 
-                                  {'player': {'username': username}, 'room': self.room_to_dict(room)}, 
+                                  {'player': {'username': username}, 'room': self.room_to_dict(room),
+                                   **self.relay_info(room_id)}, 
                                   room=room_id)
                 
                 # Update lobby
-                await self.sio.emit('room_list_update', 
-                                  {'rooms': [self.room_to_dict(r) for r in self.rooms.values()]}, 
-                                  room='lobby')
+                await self.publish_room(room_id)
+                if room.listed:
+                    await self.broadcast_room_list()
                 
-                logger.info(f'Player {username} joined room {room_id}')
+                logger.info(f'Player {username} joined room {room_id}', extra={'event': 'join_room', 'sid': sid, 'room': room_id})
             except Exception as e:
-                logger.error(f'Error joining room: {e}')
+                logger.error(f'Error joining room: {e}', extra={'event': 'join_room', 'sid': sid})
                 await self.sio.emit('error', {'message': str(e)}, room=sid)
                 
         @self.sio.on('leave_room')
@@ -137,7 +264,7 @@ class SocketManager:
                 if room_id and room_id in self.rooms:
                     await self.remove_player_from_room(sid, room_id)
             except Exception as e:
-                logger.error(f'Error leaving room: {e}')
+                logger.error(f'Error leaving room: {e}', extra={'event': 'leave_room', 'sid': sid})
         
         @self.sio.on('get_room')
         async def get_room(sid, data):
@@ -147,13 +274,14 @@ class SocketManager:
                 
                 if room_id and room_id in self.rooms:
                     room = self.rooms[room_id]
-                    await self.sio.emit('room_updated', {'room': self.room_to_dict(room)}, room=sid)
-                    logger.info(f'Room info sent to {sid} for room {room_id}')
+                    await self.sio.emit('room_updated', {'room': self.room_to_dict(room), **self.relay_info(room_id)},
+                                        room=sid)
+                    logger.info(f'Room info sent to {sid} for room {room_id}', extra={'event': 'get_room', 'sid': sid, 'room': room_id})
                 else:
-                    logger.warning(f'Room {room_id} not found for get_room request')
+                    logger.warning(f'Room {room_id} not found for get_room request', extra={'event': 'get_room', 'sid': sid, 'room': room_id})
                     await self.sio.emit('error', {'message': 'Room not found'}, room=sid)
             except Exception as e:
-                logger.error(f'Error getting room info: {e}')
+                logger.error(f'Error getting room info: {e}', extra={'event': 'get_room', 'sid': sid})
                 
         @self.sio.on('change_team')
         async def change_team(sid, data):
@@ -164,15 +292,10 @@ class SocketManager:
                 team = data['team']
                 
                 if room_id and room_id in self.rooms:
-                    room = self.rooms[room_id]
-                    for player in room.players:
-                        if player.user_id == sid:
-                            player.team = team
-                            break
-                            
-                    await self.sio.emit('room_updated', {'room': self.room_to_dict(room)}, room=room_id)
+                    if self.rooms[room_id].set_team(sid, team):
+                        self.mark_room_dirty(room_id, sid)
             except Exception as e:
-                logger.error(f'Error changing team: {e}')
+                logger.error(f'Error changing team: {e}', extra={'event': 'change_team', 'sid': sid})
                 
         @self.sio.on('player_ready')
         async def player_ready(sid, data):
@@ -181,16 +304,70 @@ class SocketManager:
                 session = await self.sio.get_session(sid)
                 room_id = session.get('room_id')
                 
+                if room_id and room_id in self.rooms:
+                    if self.rooms[room_id].set_ready(sid, data.get('ready', True)):
+                        self.mark_room_dirty(room_id, sid)
+            except Exception as e:
+                logger.error(f'Error updating ready status: {e}', extra={'event': 'player_ready', 'sid': sid})
+                
+        @self.sio.on('add_bot')
+        async def add_bot(sid, data):
+            """Add a computer-controlled player to the room (host only)"""
+            try:
+                session = await self.sio.get_session(sid)
+                room_id = session.get('room_id')
+                
                 if room_id and room_id in self.rooms:
                     room = self.rooms[room_id]
-                    for player in room.players:
-                        if player.user_id == sid:
-                            player.ready = data.get('ready', True)
-                            break
-                            
-                    await self.sio.emit('room_updated', {'room': self.room_to_dict(room)}, room=room_id)
+                    
+                    if room.host != session.get('username'):
+                        await self.sio.emit('error', {'message': 'Only host can add bots'}, room=sid)
+                        return
+                        
+                    if room.current_players >= room.max_players:
+                        await self.sio.emit('error', {'message': 'Room is full'}, room=sid)
+                        return
+                    
+                    # Default to the team with fewer players
+                    team = data.get('team')
+                    if team not in ('red', 'blue'):
+                        red = room.team_counts['red']
+                        blue = room.team_counts['blue']
+                        team = 'red' if red <= blue else 'blue'
+                        
+                    room.add_player(new_bot_id(), room.bot_name(), team=team, ready=True)
+                    
+                    self.mark_room_dirty(room_id)
+                    await self.publish_room(room_id)
+            except Exception as e:
+                logger.error(f'Error adding bot: {e}', extra={'event': 'add_bot', 'sid': sid})
+                
+        @self.sio.on('remove_bot')
+        async def remove_bot(sid, data):
+            """Remove a computer-controlled player from the room (host only)"""
+            try:
+                session = await self.sio.get_session(sid)
+                room_id = session.get('room_id')
+                bot_id = data.get('botId', '')
+                
+                if room_id and room_id in self.rooms and is_bot(bot_id):
+                    room = self.rooms[room_id]
+                    
+                    if room.host != session.get('username'):
+                        await self.sio.emit('error', {'message': 'Only host can remove bots'}, room=sid)
+                        return
+                        
+                    if not room.remove_player(bot_id):
+                        return
+                    
+                    if room_id in self.game_engines:
+                        self.game_engines[room_id].remove_player(bot_id)
+                    self.bots.remove_bot(room_id, bot_id)
+                    
+                    self.mark_room_dirty(room_id)
+                    await self.publish_room(room_id)
             except Exception as e:
-                logger.error(f'Error updating ready status: {e}')
+                logger.error(f'Error removing bot: {e}', extra={'event': 'remove_bot', 'sid': sid})
                 
         @self.sio.on('start_game')
         async def start_game(sid, data):
@@ -208,34 +385,24 @@ class SocketManager:
                         return
                         
                     # Check if all players are ready
-                    if not all(p.ready for p in room.players if p.team != 'spectator'):
+                    if not room.all_ready:
                         await self.sio.emit('error', {'message': 'Not all players are ready'}, room=sid)
                         return
                         
-                    # Start game
-                    room.status = 'playing'
-                    
-                    # Create game engine
-                    engine = GameEngine(room_id)
-                    for player in room.players:
-                        if player.team != 'spectator':
-                            engine.add_player(player.user_id, player.username, player.team)
-                            
-                    self.game_engines[room_id] = engine
-                    
-                    # Start game loop
-                    task = asyncio.create_task(self.game_loop(room_id))
-                    self.game_tasks[room_id] = task
-                    
-                    await self.sio.emit('game_started', {'roomId': room_id}, room=room_id)
-                    logger.info(f'Game started in room {room_id}')
+                    await self.request_game_start(room_id, sid)
             except Exception as e:
-                logger.error(f'Error starting game: {e}')
+                logger.error(f'Error starting game: {e}', extra={'event': 'start_game', 'sid': sid})
                 
         @self.sio.on('player_input')
         async def player_input(sid, data):
             """Handle player input during game"""
             try:
+                # Over the limit: merged into the pending input the game loop applies
+                if not self.flood.allow(sid, 'player_input'):
+                    self.flood.coalesce_input(sid, data)
+                    return
+                pending = self.flood.take_input(sid)
+                
                 session = await self.sio.get_session(sid)
                 room_id = session.get('room_id')
                 
@@ -244,11 +411,11 @@ class SocketManager:
                     engine.update_player_input(
                         sid, 
                         data.get('keys', {}), 
-                        data.get('kick', False),
-                        data.get('push', False)
+                        data.get('kick', False) or bool(pending and pending['kick']),
+                        data.get('push', False) or bool(pending and pending['push'])
                     )
             except Exception as e:
-                logger.error(f'Error handling player input: {e}')
+                logger.error(f'Error handling player input: {e}', extra={'event': 'player_input', 'sid': sid})
                 
         @self.sio.on('toggle_pause')
         async def toggle_pause(sid, data):
@@ -261,15 +428,51 @@ class SocketManager:
                 if room_id and room_id in self.game_engines:
                     engine = self.game_engines[room_id]
                     engine.paused = paused
-                    await self.sio.emit('game_paused', {'paused': paused}, room=room_id)
-                    logger.info(f'Game {"paused" if paused else "resumed"} in room {room_id}')
+                    await self.emit_to_room(room_id, 'game_paused', {'paused': paused})
+                    logger.info(f'Game {"paused" if paused else "resumed"} in room {room_id}', extra={'event': 'toggle_pause', 'sid': sid, 'room': room_id})
             except Exception as e:
-                logger.error(f'Error toggling pause: {e}')
+                logger.error(f'Error toggling pause: {e}', extra={'event': 'toggle_pause', 'sid': sid})
         
+        @self.sio.on('join_queue')
+        async def join_queue(sid, data):
+            """Wait for a matchmade game instead of picking a room"""
+            try:
+                session = await self.sio.get_session(sid)
+                if session and session.get('room_id') in self.rooms:
+                    await self.sio.emit('error', {'message': 'Leave your room before joining the queue'}, room=sid)
+                    return
+                    
+                username = self.identities.get(sid, data['username'])
+                rules = get_rules(data.get('mode', DEFAULT_MODE))  # ValueError when unknown
+                rating = await self.queue_rating(username)
+                self.match_queue.add(sid, username, rating, rules.name)
+                await self.sio.emit('queue_joined', 
+                                  {'mode': rules.name, 'rating': rating, 'queued': len(self.match_queue)}, 
+                                  room=sid)
+                
+                # Try right away around this player, the loop widens the search as they wait
+                players = self.match_queue.find_match(self.match_queue.tickets[sid], rules.max_players)
+                if players:
+                    await self.create_match(rules.name, players)
+                self.ensure_matchmaking_loop()
+            except Exception as e:
+                logger.error(f'Error joining queue: {e}', extra={'event': 'join_queue', 'sid': sid})
+                await self.sio.emit('error', {'message': str(e)}, room=sid)
+                
+        @self.sio.on('leave_queue')
+        async def leave_queue(sid, data=None):
+            """Stop waiting for a matchmade game"""
+            if self.match_queue.remove(sid):
+                await self.sio.emit('queue_left', {}, room=sid)
+                
         @self.sio.on('chat_message')
         async def chat_message(sid, data):
             """Handle chat messages"""
             try:
+                if not self.flood.allow(sid, 'chat_message'):
+                    logger.warning(f'Chat flood from {sid}, message dropped', extra={'event': 'flood', 'sid': sid})
+                    return
+                
                 session = await self.sio.get_session(sid)
                 room_id = session.get('room_id')
                 username = session.get('username')
@@ -282,51 +485,255 @@ class SocketManager:
                     }
                     await self.sio.emit('chat_message', message_data, room=room_id)
             except Exception as e:
-                logger.error(f'Error sending chat message: {e}')
+                logger.error(f'Error sending chat message: {e}', extra={'event': 'chat_message', 'sid': sid})
                 
     async def game_loop(self, room_id: str):
-        """Main game loop - runs at 90 FPS for balanced gameplay"""
+        """Main game loop - runs at tick_rate FPS (90 by default) on absolute deadlines"""
         engine = self.game_engines[room_id]
-        fps = 90
+        fps = self.tick_rate
         frame_time = 1 / fps
+        clock = TickClock(fps, self.MAX_CATCH_UP_TICKS)
+        self.tick_clocks[room_id] = clock
+        # The loop never awaits the network: events go through the room's sender task
+        outbox = RoomOutbox(room_id, self.sio.emit)
+        self.outboxes[room_id] = outbox
         
         try:
             while room_id in self.game_engines:
-                start_time = asyncio.get_event_loop().time()
+                # Ticks due since the last iteration (more than one when running late)
+                steps, skipped = clock.due()
+                work_start = time.perf_counter()
+                if skipped:
+                    logger.warning(f'Room {room_id} fell behind, skipped {skipped} ticks', extra={'event': 'tick_clock', 'room': room_id, 'tick': engine.tick})
+                
+                # Inputs coalesced by the flood guard since the last tick
+                if steps and self.flood.pending_inputs:
+                    self.apply_pending_inputs(engine)
                 
                 # Only update if not paused
-                if not engine.paused:
-                    # Update physics
-                    goal_scored = engine.update_physics(frame_time)
-                    
-                    # Handle goal scored
-                    if goal_scored:
-                        await self.sio.emit('goal_scored', 
-                                          {'team': goal_scored, 'score': engine.score}, 
-                                          room=room_id)
+                if steps and not engine.paused:
+                    for _ in range(steps):
+                        # Update physics
+                        goal_scored = engine.update_physics(frame_time)
                         
-                    # Update time
-                    engine.time_remaining -= frame_time
+                        # Handle goal scored
+                        if goal_scored:
+                            outbox.put_event('goal_scored', 
+                                             {'team': goal_scored, 'score': dict(engine.score)})
+                            
+                    # Update time: skipped ticks still count, the match keeps real-time length
+                    engine.time_remaining -= (steps + skipped) * frame_time
                 
-                # Always send game state (even when paused)
-                game_state = engine.get_game_state()
-                await self.sio.emit('game_state', game_state, room=room_id)
+                # Always send game state (even when paused), once per iteration
+                if steps:
+                    engine.advance_animations()
+                    snapshot = engine.build_snapshot()
+                    self.snapshots.publish(snapshot)
+                    if not self.relay_only:
+                        # Players and spectators share the socket room, encoded only once
+                        outbox.put_snapshot(snapshot)
+                        room = self.rooms.get(room_id)
+                        self.egress.add(snapshot.size * (room.human_count if room else 0))
                 
                 # Check if game is over
                 if engine.time_remaining <= 0:
                     await self.end_game(room_id)
                     break
                     
-                # Sleep to maintain FPS
-                elapsed = asyncio.get_event_loop().time() - start_time
-                sleep_time = max(0, frame_time - elapsed)
-                await asyncio.sleep(sleep_time)
+                # Sleep until the next deadline
+                self.tick_budget.record(time.perf_counter() - work_start, frame_time * steps if steps else None)
+                await asyncio.sleep(clock.sleep_time())
+                
+        except asyncio.CancelledError:
+            logger.info(f'Game loop cancelled for room {room_id}', extra={'event': 'game_loop', 'room': room_id, 'tick': engine.tick})
+        except Exception as e:
+            logger.error(f'Error in game loop: {e}', extra={'event': 'game_loop', 'room': room_id, 'tick': engine.tick})
+        finally:
+            if self.tick_clocks.get(room_id) is clock:
+                del self.tick_clocks[room_id]
+            if self.outboxes.get(room_id) is outbox:
+                del self.outboxes[room_id]
+            outbox.close()  # Queued events are still flushed
+            
+    async def emit_to_room(self, room_id: str, event: str, data: dict):
+        """Send a reliable event to a room, ordered after its queued match events"""
+        outbox = self.outboxes.get(room_id)
+        if outbox and outbox.put_event(event, data):
+            return
+        await self.sio.emit(event, data, room=room_id)
+        
+    def apply_pending_inputs(self, engine: GameEngine):
+        """Apply the latest over-limit input of every player of an engine"""
+        for sid in list(engine.players):
+            pending = self.flood.take_input(sid)
+            if pending:
+                engine.update_player_input(sid, pending['keys'], pending['kick'], pending['push'])
+            
+    def ensure_bot_loop(self):
+        """Start the shared bot loop if there are bots and it is not running"""
+        if self.bots.bot_count and (self.bot_task is None or self.bot_task.done()):
+            self.bot_task = asyncio.create_task(self.bot_loop())
+            
+    async def bot_loop(self):
+        """Decide inputs for all bots of all rooms in one batch per step"""
+        interval = 1 / self.BOT_DECISION_HZ
+        try:
+            while self.bots.bot_count:
+                work_start = time.perf_counter()
+                self.bots.step()
+                self.tick_budget.record(time.perf_counter() - work_start)
+                await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f'Error in bot loop: {e}', extra={'event': 'bot_loop'})
+            
+    async def request_game_start(self, room_id: str, requested_by: str):
+        """Launch a ready room's game now, or queue it until the tick budget allows"""
+        if room_id in self.game_engines or room_id in self.queued_starts:
+            return
+            
+        # Admission control: running matches keep their tick rate
+        if self.queued_starts or not self.can_admit_game():
+            if len(self.queued_starts) >= self.MAX_QUEUED_STARTS:
+                await self.sio.emit('error', 
+                                  {'message': 'Server is at capacity, try again later', 'code': 'server_busy'}, 
+                                  room=requested_by)
+                return
+            self.queued_starts[room_id] = time.monotonic()
+            await self.sio.emit('game_queued', 
+                              {'roomId': room_id, 'position': len(self.queued_starts)}, 
+                              room=room_id)
+            self.ensure_admission_loop()
+            logger.info(f'Game start queued in room {room_id}', extra={'event': 'start_game', 'sid': requested_by, 'room': room_id})
+            return
+            
+        await self.launch_game(room_id)
+        logger.info(f'Game started in room {room_id}', extra={'event': 'start_game', 'sid': requested_by, 'room': room_id})
+        
+    def can_admit_game(self) -> bool:
+        """Whether one more match fits in the tick budget"""
+        return self.tick_budget.can_admit(len(self.game_engines), self.tick_budget_threshold)
+        
+    async def launch_game(self, room_id: str):
+        """Create the engine and loop of a room whose players are ready"""
+        room = self.rooms[room_id]
+        # Start game
+        room.status = 'playing'
+        
+        # Create game engine
+        engine = GameEngine(room_id, get_rules(room.mode), room.map)
+        for player in room:
+            if player.team != 'spectator':
+                engine.add_player(player.user_id, player.username, player.team)
                 
+        self.game_engines[room_id] = engine
+        if self.trace_dir:
+            engine.trace = TraceRecorder(self.trace_dir, room_id, room.mode, room.map, self.tick_rate,
+                                         writer=self.write_trace)
+        
+        # Hand bots over to the shared bot director
+        self.bots.add_room(engine, [p.user_id for p in room if is_bot(p.user_id)])
+        self.ensure_bot_loop()
+        
+        # Start game loop
+        task = asyncio.create_task(self.game_loop(room_id))
+        self.game_tasks[room_id] = task
+        
+        await self.sio.emit('game_started', {'roomId': room_id, **self.relay_info(room_id)}, room=room_id)
+        await self.publish_room(room_id)
+        
+    def ensure_admission_loop(self):
+        """Start the admission loop if games are queued and it is not running"""
+        if self.queued_starts and (self.admission_task is None or self.admission_task.done()):
+            self.admission_task = asyncio.create_task(self.admission_loop())
+            
+    async def admission_loop(self):
+        """Start queued games in arrival order as tick budget frees up"""
+        try:
+            while self.queued_starts:
+                await asyncio.sleep(self.ADMISSION_RETRY)
+                now = time.monotonic()
+                for room_id, queued_at in list(self.queued_starts.items()):
+                    room = self.rooms.get(room_id)
+                    if room is None or room.status != 'waiting' or not room.all_ready:
+                        del self.queued_starts[room_id]
+                    elif now - queued_at > self.MAX_QUEUE_WAIT:
+                        del self.queued_starts[room_id]
+                        await self.sio.emit('error', 
+                                          {'message': 'Server is at capacity, try again later', 'code': 'server_busy'}, 
+                                          room=room_id)
+                    elif self.can_admit_game():
+                        # One game per check, so its cost shows up before the next one
+                        del self.queued_starts[room_id]
+                        await self.launch_game(room_id)
+                        logger.info(f'Queued game started in room {room_id}', extra={'event': 'start_game', 'room': room_id})
+                        break
+                    else:
+                        break
         except asyncio.CancelledError:
-            logger.info(f'Game loop cancelled for room {room_id}')
+            pass
         except Exception as e:
-            logger.error(f'Error in game loop: {e}')
+            logger.error(f'Error in admission loop: {e}', extra={'event': 'start_game'})
+            
+    async def queue_rating(self, username: str) -> int:
+        """Matchmaking rating of a user (the base rating for guests or if Mongo fails)"""
+        try:
+            user = await self.users.find(username)
+        except Exception as e:
+            logger.error(f'Error loading rating of {username}: {e}', extra={'event': 'join_queue'})
+            user = None
+        return rating_of(user.get('stats') if user else None)
+        
+    def ensure_matchmaking_loop(self):
+        """Start the matchmaking loop if players are queued and it is not running"""
+        if len(self.match_queue) and (self.matchmaking_task is None or self.matchmaking_task.done()):
+            self.matchmaking_task = asyncio.create_task(self.matchmaking_loop())
             
+    async def matchmaking_loop(self):
+        """Form matches for players who waited long enough for their search to widen"""
+        try:
+            while len(self.match_queue):
+                await asyncio.sleep(self.MATCHMAKING_INTERVAL)
+                for mode, players in self.match_queue.match_all(lambda m: get_rules(m).max_players):
+                    await self.create_match(mode, players)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f'Error in matchmaking loop: {e}', extra={'event': 'matchmaking'})
+            
+    async def create_match(self, mode: str, players: list):
+        """Create an unlisted room with balanced teams for matched players and start it"""
+        rules = get_rules(mode)
+        red, blue = balance_teams(players)
+        room_id = f'match_{mode}_{uuid.uuid4().hex[:8]}'
+        room = RoomState(
+            room_id=room_id,
+            name=f'Ranked {mode}',
+            host=red[0].username,
+            max_players=rules.max_players,
+            status='waiting',
+            mode=rules.name,
+            map=rules.map_name,
+            listed=False  # Nobody browses for it, so the lobby is not told about it
+        )
+        for team, tickets in (('red', red), ('blue', blue)):
+            for ticket in tickets:
+                room.add_player(ticket.sid, ticket.username, team=team, ready=True)
+                
+        self.rooms[room_id] = room
+        for ticket in players:
+            await self.sio.save_session(ticket.sid, {'username': ticket.username, 'room_id': room_id})
+            await self.sio.enter_room(ticket.sid, room_id)
+        await self.sio.emit('match_found', {'room': self.room_to_dict(room)}, room=room_id)
+        await self.publish_room(room_id)
+        self.ensure_directory_loop()
+        self.ensure_sweeper()
+        
+        logger.info(f'Match formed in room {room_id}: {len(players)} players, mode {mode}', 
+                    extra={'event': 'matchmaking', 'room': room_id})
+        await self.request_game_start(room_id, room_id)
+        
     async def end_game(self, room_id: str):
         """End the game and cleanup"""
         try:
@@ -341,13 +748,20 @@ class SocketManager:
                 else:
                     winner = 'draw'
                     
-                # Notify players
-                await self.sio.emit('game_over', 
-                                  {'winner': winner, 'finalScore': engine.score}, 
-                                  room=room_id)
+                # Notify players (after the goals and snapshots already queued)
+                await self.emit_to_room(room_id, 'game_over', 
+                                        {'winner': winner, 'finalScore': engine.score,
+                                         'stats': engine.stats.summary()})
+                
+                # Saved in the background: this coroutine may be running in the loop task it cancels below
+                self.run_in_background(self.record_match(self.build_session(engine, winner)), 'record_match')
+                if engine.trace:
+                    engine.trace.close()
                 
                 # Cleanup
                 del self.game_engines[room_id]
+                self.snapshots.drop_room(room_id)
+                self.bots.remove_room(room_id)
                 if room_id in self.game_tasks:
                     self.game_tasks[room_id].cancel()
                     del self.game_tasks[room_id]
@@ -355,13 +769,70 @@ class SocketManager:
                 # Reset room status
                 if room_id in self.rooms:
                     self.rooms[room_id].status = 'waiting'
-                    for player in self.rooms[room_id].players:
-                        player.ready = False
+                    self.rooms[room_id].reset_ready()
+                await self.publish_room(room_id)
                         
-                logger.info(f'Game ended in room {room_id}, winner: {winner}')
+                logger.info(f'Game ended in room {room_id}, winner: {winner}', extra={'event': 'end_game', 'room': room_id})
         except Exception as e:
-            logger.error(f'Error ending game: {e}')
+            logger.error(f'Error ending game: {e}', extra={'event': 'end_game', 'room': room_id})
             
+    def build_session(self, engine: GameEngine, winner: str) -> GameSession:
+        """Match history entry of a finished engine (with the id of its trace, if recorded)"""
+        return GameSession(
+            **({'id': engine.trace.match_id} if engine.trace else {}),
+            room_id=engine.room_id,
+            start_time=datetime.utcfromtimestamp(engine.started_at),
+            end_time=datetime.utcnow(),
+            winner=winner,
+            final_score=dict(engine.score),
+            player_stats=[
+                PlayerStats(user_id=player_id, username=player['name'], team=player['team'],
+                            goals=engine.goals.get(player_id, 0),
+                            assists=engine.stats.players.get(player['name'], {}).get('assists', 0))
+                for player_id, player in engine.players.items()
+            ]
+        )
+        
+    def run_in_background(self, coro, event: str) -> asyncio.Task:
+        """Run a coroutine without awaiting it; the task is kept alive and its failure logged"""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        def done(task):
+            self.background_tasks.discard(task)
+            if not task.cancelled() and task.exception():
+                logger.error(f'Error in background {event}: {task.exception()}', extra={'event': event})
+        task.add_done_callback(done)
+        return task
+        
+    async def wait_background(self, timeout: float = 5):
+        """Let background work (e.g. saving finished matches) complete before shutting down"""
+        if self.background_tasks:
+            await asyncio.wait(list(self.background_tasks), timeout=timeout)
+        
+    async def record_match(self, session: GameSession):
+        """Store a finished match and add it to the players' stats"""
+        if self.history:
+            await self.history.record(session)
+        if self.leaderboard:
+            await self.leaderboard.record_match(session)
+        for player in session.player_stats:
+            self.users.forget(player.username)  # Next queue rating reads the new stats
+        
+    def publish_to_ring(self, snapshot: GameSnapshot):
+        """Copy an encoded snapshot into the shared-memory ring read by relays"""
+        if not self.snapshot_ring.publish(snapshot.room_id, snapshot.tick, snapshot.encoded.encode()):
+            self.ring_overflows += 1
+            if self.ring_overflows == 1 or self.ring_overflows % 1000 == 0:
+                logger.warning(f'Snapshot of {snapshot.size} bytes does not fit in a ring slot ({self.ring_overflows} so far)', 
+                               extra={'event': 'snapshot_ring', 'room': snapshot.room_id})
+        
+    def write_trace(self, fn, *args):
+        """Run a trace file write in the default executor, logging failures"""
+        def done(future):
+            if future.exception():
+                logger.error(f'Error writing match trace: {future.exception()}', extra={'event': 'trace'})
+        asyncio.get_running_loop().run_in_executor(None, fn, *args).add_done_callback(done)
+        
     async def handle_player_disconnect(self, sid: str):
         """Handle player disconnect"""
         try:
@@ -371,7 +842,7 @@ class SocketManager:
             if room_id and room_id in self.rooms:
                 await self.remove_player_from_room(sid, room_id)
         except Exception as e:
-            logger.error(f'Error handling disconnect: {e}')
+            logger.error(f'Error handling disconnect: {e}', extra={'event': 'disconnect', 'sid': sid})
             
     async def remove_player_from_room(self, sid: str, room_id: str):
         """Remove player from room"""
@@ -381,8 +852,7 @@ class SocketManager:
             username = session.get('username') if session else 'Unknown'
             
             # Remove player
-            room.players = [p for p in room.players if p.user_id != sid]
-            room.current_players -= 1
+            room.remove_player(sid)
             
             # Remove from game engine if playing
             if room_id in self.game_engines:
@@ -391,14 +861,9 @@ class SocketManager:
             # Leave socket room
             await self.sio.leave_room(sid, room_id)
             
-            # If room is empty, delete it
-            if room.current_players == 0:
-                del self.rooms[room_id]
-                if room_id in self.game_engines:
-                    del self.game_engines[room_id]
-                if room_id in self.game_tasks:
-                    self.game_tasks[room_id].cancel()
-                    del self.game_tasks[room_id]
+            # If room is empty (or only bots are left), delete it
+            if room.human_count == 0:
+                self.discard_room(room_id)
             else:
                 # Notify room
                 await self.sio.emit('player_left', 
@@ -406,30 +871,442 @@ class SocketManager:
                                   room=room_id)
                 
             # Update lobby
-            await self.sio.emit('room_list_update', 
-                              {'rooms': [self.room_to_dict(r) for r in self.rooms.values()]}, 
-                              room='lobby')
+            await self.publish_room(room_id)
+            if room.listed:
+                await self.broadcast_room_list()
                               
-            logger.info(f'Player {username} left room {room_id}')
+            logger.info(f'Player {username} left room {room_id}', extra={'event': 'leave_room', 'sid': sid, 'room': room_id})
         except Exception as e:
-            logger.error(f'Error removing player from room: {e}')
+            logger.error(f'Error removing player from room: {e}', extra={'event': 'leave_room', 'sid': sid, 'room': room_id})
             
-    def room_to_dict(self, room: Room) -> dict:
-        """Convert room to dict for JSON serialization"""
+    async def publish_room(self, room_id: str):
+        """Sync a local room with the shared room directory"""
+        try:
+            if room_id in self.rooms:
+                await self.directory.register_room(
+                    room_id, self.node_id, self.node_url, self.room_to_dict(self.rooms[room_id])
+                )
+            else:
+                await self.directory.unregister_room(room_id, self.node_id)
+        except Exception as e:
+            logger.error(f'Error publishing room {room_id} to directory: {e}', extra={'event': 'directory', 'room': room_id})
+            
+    async def list_rooms(self) -> list:
+        """Lobby room list: local rooms plus the rooms of every other node"""
+        room_list = [self.room_to_dict(room) for room in self.rooms.values() if room.listed]
+        try:
+            room_list.extend(
+                r for r in await self.directory.list_rooms()
+                if r.get('node_id') != self.node_id and r.get('listed', True)
+            )
+        except Exception as e:
+            logger.error(f'Error listing rooms from directory: {e}', extra={'event': 'directory'})
+        return room_list
+        
+    async def broadcast_room_list(self):
+        """Send the aggregated room list to everyone in the lobby"""
+        await self.sio.emit('room_list_update', {'rooms': await self.list_rooms()}, room='lobby')
+        
+    def ensure_directory_loop(self):
+        """Start the directory heartbeat if it is not running"""
+        if self.directory_task is None or self.directory_task.done():
+            self.directory_task = asyncio.create_task(self.directory_loop())
+            
+    async def directory_loop(self):
+        """Keep this node's directory entries alive while it owns rooms"""
+        try:
+            while self.rooms:
+                await asyncio.sleep(self.DIRECTORY_HEARTBEAT)
+                try:
+                    await self.directory.heartbeat(self.node_id)
+                except Exception as e:
+                    logger.error(f'Error sending directory heartbeat: {e}', extra={'event': 'directory'})
+        except asyncio.CancelledError:
+            pass
+            
+    def load_report(self) -> dict:
+        """Live capacity of this node, for the load endpoint and room placement"""
+        utilization = self.tick_budget.utilization()
+        games = len(self.game_engines)
+        per_game = utilization / games if games else 0.0
+        headroom = max(0.0, self.tick_budget_threshold - utilization)
         return {
-            'id': room.room_id,
-            'name': room.name,
-            'host': room.host,
-            'players': [
-                {
-                    'user_id': p.user_id,
-                    'username': p.username,
-                    'team': p.team,
-                    'ready': p.ready
-                } for p in room.players
-            ],
-            'current_players': room.current_players,
-            'maxPlayers': room.max_players,
-            'status': room.status,
-            'map': 'Classic'
+            'node_id': self.node_id,
+            'node_url': self.node_url,
+            'rooms': len(self.rooms),
+            'engines': games,
+            'queued_starts': len(self.queued_starts),
+            'connected_sids': self.connected_sids,
+            'tick_rate': self.tick_rate,
+            'tick_utilization': round(utilization, 4),
+            'tick_budget_threshold': self.tick_budget_threshold,
+            'headroom': round(headroom, 4),
+            # Games that still fit, at the cost of the average running one
+            'free_games': int(headroom / per_game) if per_game else None,
+            'tick_cost': {k: round(v, 4) for k, v in self.tick_budget.tick_percentiles().items()},
+            'egress_bytes_per_sec': round(self.egress.rate()),
+            'accepting_games': self.can_admit_game(),
         }
+        
+    async def pick_node(self) -> dict:
+        """Another node with clearly more headroom than this one, or None to stay here"""
+        try:
+            nodes = await self.directory.list_nodes()
+        except Exception as e:
+            logger.error(f'Error listing nodes from directory: {e}', extra={'event': 'directory'})
+            return None
+        own = self.load_report()['headroom']
+        candidates = [n for n in nodes if n.get('node_id') != self.node_id and n.get('node_url')]
+        if not candidates:
+            return None
+        best = max(candidates, key=lambda n: n.get('headroom', 0))
+        return best if best.get('headroom', 0) > own + self.PLACEMENT_MARGIN else None
+        
+    def ensure_load_reports(self):
+        """Start publishing load reports to the room directory"""
+        if self.load_task is None or self.load_task.done():
+            self.load_task = asyncio.create_task(self.load_report_loop())
+            
+    async def load_report_loop(self):
+        """Publish this node's load so other nodes can place rooms by real cost"""
+        try:
+            while True:
+                try:
+                    await self.directory.report_load(self.node_id, self.node_url, self.load_report())
+                except Exception as e:
+                    logger.error(f'Error reporting load to directory: {e}', extra={'event': 'directory'})
+                await asyncio.sleep(self.LOAD_REPORT_INTERVAL)
+        except asyncio.CancelledError:
+            pass
+            
+    def ensure_leaderboard_sync(self):
+        """Start reconciling the leaderboard with Mongo"""
+        if self.leaderboard and (self.leaderboard_task is None or self.leaderboard_task.done()):
+            self.leaderboard_task = asyncio.create_task(self.leaderboard_sync_loop())
+            
+    async def leaderboard_sync_loop(self):
+        """Pick up results recorded by other nodes and fix any drift of the incremental updates"""
+        try:
+            while True:
+                await asyncio.sleep(self.LEADERBOARD_SYNC_INTERVAL)
+                # Until someone reads it, the leaderboard is not loaded and there is nothing to fix
+                if not self.leaderboard.loaded:
+                    continue
+                try:
+                    await self.leaderboard.reconcile()
+                except Exception as e:
+                    logger.error(f'Error reconciling leaderboard: {e}', extra={'event': 'leaderboard'})
+        except asyncio.CancelledError:
+            pass
+            
+    def ensure_sweeper(self):
+        """Start the room sweeper if it is not running"""
+        if self.sweeper_task is None or self.sweeper_task.done():
+            self.sweeper_task = asyncio.create_task(self.sweeper_loop())
+            
+    async def sweeper_loop(self):
+        """Periodically reconcile the room tables while there is anything to sweep"""
+        try:
+            while self.rooms or self.game_engines or self.game_tasks:
+                await asyncio.sleep(self.SWEEP_INTERVAL)
+                try:
+                    await self.sweep_rooms()
+                except Exception as e:
+                    logger.error(f'Error sweeping rooms: {e}', extra={'event': 'sweeper'})
+        except asyncio.CancelledError:
+            pass
+            
+    def is_connected(self, sid: str) -> bool:
+        return self.sio.manager.is_connected(sid, '/')
+        
+    async def sweep_rooms(self) -> dict:
+        """Reconcile rooms, engines and tasks against live sids and task state.
+        
+        Anything inconsistent is only reaped if the previous sweep saw it too,
+        so transient states (a drain or a join in progress) are left alone.
+        Returns and stores the memory report.
+        """
+        found = set()
+        
+        # Players whose socket is gone (a disconnect handler that failed)
+        for room_id, room in self.rooms.items():
+            for player in room:
+                if not is_bot(player.user_id) and not self.is_connected(player.user_id):
+                    found.add(('player', room_id, player.user_id))
+        # Rooms with no humans left and nobody expected back
+        for room_id, room in self.rooms.items():
+            if room.human_count == 0 and room_id not in self.pending_rejoins:
+                found.add(('room', room_id))
+        # Engines without a room, or whose loop died
+        for room_id in self.game_engines:
+            task = self.game_tasks.get(room_id)
+            if room_id not in self.rooms:
+                found.add(('room', room_id))
+            elif task is None or task.done():
+                found.add(('engine', room_id))
+        # Finished loop tasks of rooms that are not playing
+        for room_id, task in self.game_tasks.items():
+            if task.done() and room_id not in self.game_engines:
+                found.add(('task', room_id))
+                
+        reaped = {'players': 0, 'rooms': 0, 'engines': 0, 'tasks': 0}
+        for item in sorted(found & self.leak_suspects):
+            kind, room_id = item[0], item[1]
+            if kind == 'player':
+                room = self.rooms.get(room_id)
+                if room and room.remove_player(item[2]):
+                    if room_id in self.game_engines:
+                        self.game_engines[room_id].remove_player(item[2])
+                    self.mark_room_dirty(room_id)
+                    reaped['players'] += 1
+            elif kind == 'room' and (room_id in self.rooms or room_id in self.game_engines):
+                self.discard_room(room_id)
+                await self.publish_room(room_id)
+                reaped['rooms'] += 1
+            elif kind == 'engine' and room_id in self.game_engines:
+                # The loop crashed: finish the match so the room goes back to the lobby
+                await self.end_game(room_id)
+                reaped['engines'] += 1
+            elif kind == 'task' and self.game_tasks.get(room_id) and self.game_tasks[room_id].done():
+                del self.game_tasks[room_id]
+                reaped['tasks'] += 1
+        self.leak_suspects = found - (found & self.leak_suspects)
+        
+        # Per-room state of rooms that no longer exist is dropped right away
+        live = set(self.rooms) | set(self.game_engines)
+        for table in (self.tick_clocks, self.outboxes, self.dirty_rooms, self.pending_rejoins, self.snapshots.latest):
+            for room_id in [r for r in table if r not in live]:
+                del table[room_id]
+        for room_id in [r for r in self.room_update_tasks if r not in live]:
+            self.room_update_tasks.pop(room_id).cancel()
+        for room_id in [r for r in self.bots.engines if r not in self.game_engines]:
+            self.bots.remove_room(room_id)
+        self.resume_after_rejoin &= live
+        for sid in [sid for sid in self.flood.buckets if not self.is_connected(sid)]:
+            self.flood.forget(sid)
+        for sid in [sid for sid in self.identities if not self.is_connected(sid)]:
+            del self.identities[sid]
+            
+        if any(reaped.values()):
+            logger.warning(f'Sweeper reaped {reaped}', extra={'event': 'sweeper'})
+        self.memory_report = self.memory_usage()
+        self.memory_report['reaped'] = reaped
+        return self.memory_report
+        
+    def memory_usage(self) -> dict:
+        """Table sizes and approximate bytes held per room (engine included)"""
+        room_bytes = {}
+        for room_id in set(self.rooms) | set(self.game_engines):
+            size = deep_sizeof(self.rooms.get(room_id))
+            engine = self.game_engines.get(room_id)
+            if engine:
+                # Rules and map are shared by every engine of the same mode/map
+                size += deep_sizeof(engine, exclude=(engine.rules, engine.map))
+            room_bytes[room_id] = size
+        return {
+            'rooms': len(self.rooms),
+            'engines': len(self.game_engines),
+            'tasks': len(self.game_tasks),
+            'outboxes': len(self.outboxes),
+            'tracked_sids': len(self.flood.buckets),
+            'room_bytes': room_bytes,
+            'total_room_bytes': sum(room_bytes.values()),
+        }
+        
+    def discard_room(self, room_id: str):
+        """Drop every piece of local state held for a room"""
+        self.rooms.pop(room_id, None)
+        engine = self.game_engines.pop(room_id, None)
+        if engine and engine.trace:
+            engine.trace.close(complete=False)
+        self.snapshots.drop_room(room_id)
+        self.bots.remove_room(room_id)
+        self.pending_rejoins.pop(room_id, None)
+        self.cancel_rejoin_expiry(room_id)
+        self.resume_after_rejoin.discard(room_id)
+        self.dirty_rooms.pop(room_id, None)
+        self.queued_starts.pop(room_id, None)
+        for task in (self.game_tasks.pop(room_id, None), self.room_update_tasks.pop(room_id, None)):
+            if task:
+                task.cancel()
+            
+    async def drain_rooms(self, room_ids: List[str] = None) -> int:
+        """Checkpoint running matches to the database so another node can resume them"""
+        if room_ids is None:
+            self.draining = True  # Every match leaves: do not restore any here
+        room_ids = [r for r in (room_ids or list(self.game_engines)) if r in self.game_engines]
+        if not room_ids:
+            return 0
+        from pymongo import ReplaceOne
+            
+        operations = []
+        paused_before = {}
+        for room_id in room_ids:
+            # Stop simulating first so the checkpoint is the final state
+            task = self.game_tasks.pop(room_id, None)
+            if task:
+                task.cancel()
+            engine = self.game_engines[room_id]
+            paused_before[room_id] = engine.paused
+            engine.paused = True
+            room = self.rooms.get(room_id)
+            operations.append(ReplaceOne({'_id': room_id}, {
+                '_id': room_id,
+                'engine': engine.to_checkpoint(),
+                'was_paused': paused_before[room_id],
+                'room': self.room_to_dict(room) if room else None,
+            }, upsert=True))
+            
+        try:
+            await asyncio.wait_for(
+                self.db.engine_checkpoints.bulk_write(operations, ordered=False),
+                timeout=self.DRAIN_GRACE
+            )
+        except Exception as e:
+            logger.error(f'Error saving checkpoints, resuming matches: {e}', extra={'event': 'drain'})
+            for room_id in room_ids:
+                self.game_engines[room_id].paused = paused_before[room_id]
+                self.game_tasks[room_id] = asyncio.create_task(self.game_loop(room_id))
+            return 0
+            
+        for room_id in room_ids:
+            await self.emit_to_room(room_id, 'server_draining', {'roomId': room_id})
+            self.discard_room(room_id)
+            await self.publish_room(room_id)
+        logger.info(f'Drained {len(room_ids)} rooms', extra={'event': 'drain'})
+        return len(room_ids)
+        
+    async def restore_room(self, room_id: str) -> bool:
+        """Claim a drained match and resume it on this node"""
+        try:
+            doc = await self.db.engine_checkpoints.find_one_and_delete({'_id': room_id})
+        except Exception as e:
+            logger.error(f'Error loading checkpoint for {room_id}: {e}', extra={'event': 'restore', 'room': room_id})
+            return False
+        if not doc or not doc.get('room'):
+            return False
+            
+        summary = doc['room']
+        engine = GameEngine.from_checkpoint(doc['engine'])
+        room = RoomState(
+            room_id=room_id,
+            name=summary['name'],
+            host=summary['host'],
+            max_players=summary['maxPlayers'],
+            status='playing',
+            mode=summary.get('mode', DEFAULT_MODE),
+            map=summary.get('map', DEFAULT_MAP),
+            listed=summary.get('listed', True)
+        )
+        # Bots come back right away, humans get their place back when they rejoin
+        pending = {}
+        bot_ids = []
+        for player in summary['players']:
+            if is_bot(player['user_id']):
+                room.add_player(player['user_id'], player['username'], player['team'], player['ready'])
+                bot_ids.append(player['user_id'])
+            else:
+                pending[player['username']] = player
+        self.pending_rejoins[room_id] = pending
+        if not doc.get('was_paused', False):
+            self.resume_after_rejoin.add(room_id)
+        
+        self.rooms[room_id] = room
+        self.game_engines[room_id] = engine
+        self.bots.add_room(engine, bot_ids)
+        self.ensure_bot_loop()
+        self.game_tasks[room_id] = asyncio.create_task(self.game_loop(room_id))
+        self.rejoin_tasks[room_id] = asyncio.create_task(self.expire_rejoins(room_id))
+        await self.publish_room(room_id)
+        self.ensure_directory_loop()
+        self.ensure_sweeper()
+        logger.info(f'Restored room {room_id} at tick {engine.tick}', extra={'event': 'restore', 'room': room_id, 'tick': engine.tick})
+        return True
+        
+    async def finish_rejoin(self, room_id: str):
+        """Resume a migrated match once its players are back"""
+        self.pending_rejoins.pop(room_id, None)
+        self.cancel_rejoin_expiry(room_id)
+        engine = self.game_engines.get(room_id)
+        if engine and room_id in self.resume_after_rejoin:
+            engine.paused = False
+            await self.emit_to_room(room_id, 'game_paused', {'paused': False})
+        self.resume_after_rejoin.discard(room_id)
+            
+    def cancel_rejoin_expiry(self, room_id: str):
+        task = self.rejoin_tasks.pop(room_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+            
+    async def expire_rejoins(self, room_id: str):
+        """Drop migrated players that never came back and resume the match"""
+        try:
+            await asyncio.sleep(self.REJOIN_TIMEOUT)
+            pending = self.pending_rejoins.get(room_id)
+            if pending is None:
+                return
+            engine = self.game_engines.get(room_id)
+            if engine:
+                for player in pending.values():
+                    engine.remove_player(player['user_id'])
+            room = self.rooms.get(room_id)
+            if room is None or room.human_count == 0:
+                # Nobody came back
+                self.discard_room(room_id)
+                await self.publish_room(room_id)
+                return
+            await self.finish_rejoin(room_id)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f'Error expiring rejoins of {room_id}: {e}', extra={'event': 'restore', 'room': room_id})
+        finally:
+            if self.rejoin_tasks.get(room_id) is asyncio.current_task():
+                del self.rejoin_tasks[room_id]
+        
+    def mark_room_dirty(self, room_id: str, user_id: str = None):
+        """Queue a room update; changes within ROOM_UPDATE_WINDOW go out as one event.
+        
+        With a user_id only that player is sent (room_patch), without one the
+        whole room is (room_updated).
+        """
+        if room_id in self.dirty_rooms:
+            changed = self.dirty_rooms[room_id]
+            if changed is not None and user_id is not None:
+                changed.add(user_id)
+            else:
+                self.dirty_rooms[room_id] = None
+            return
+        self.dirty_rooms[room_id] = {user_id} if user_id is not None else None
+        self.room_update_tasks[room_id] = asyncio.create_task(self.flush_room_update(room_id))
+        
+    async def flush_room_update(self, room_id: str):
+        """Send the batched update of a room after the batching window"""
+        try:
+            await asyncio.sleep(self.ROOM_UPDATE_WINDOW)
+            changed = self.dirty_rooms.pop(room_id, None)
+            self.room_update_tasks.pop(room_id, None)
+            room = self.rooms.get(room_id)
+            if not room:
+                return
+            if changed is None:
+                await self.sio.emit('room_updated', {'room': self.room_to_dict(room), **self.relay_info(room_id)},
+                                    room=room_id)
+            else:
+                players = [room.players[user_id].to_dict() for user_id in changed if user_id in room.players]
+                if players:
+                    await self.sio.emit('room_patch', {'roomId': room_id, 'players': players}, room=room_id)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f'Error sending room update: {e}', extra={'event': 'room_update', 'room': room_id})
+            
+    def relay_info(self, room_id: str) -> dict:
+        """relayUrl of a running match whose game_state is served by the relays (see relay.py)"""
+        if self.relay_url and room_id in self.game_engines:
+            return {'relayUrl': self.relay_url}
+        return {}
+        
+    def room_to_dict(self, room: RoomState) -> dict:
+        """Convert room to dict for JSON serialization"""
+        return room.to_dict()
@@ -0,0 +1,39 @@
+import time
+from collections import deque
+from typing import Callable, Dict
+from metrics import RateMeter, percentiles
+
+
+class TickBudget:
+    """Share of the event loop spent simulating matches.
+
+    Game loops (and the bot loop) report how long each iteration's work
+    took. Utilization is the busy fraction of the last window seconds; 1.0
+    means the loop did nothing but ticks, at which point every room starts
+    missing deadlines. Game ticks also keep their cost relative to the tick
+    period for percentiles.
+    """
+
+    def __init__(self, window: int = 5, samples: int = 2048, clock: Callable[[], float] = time.perf_counter):
+        self.busy = RateMeter(window, clock)
+        self.samples: deque = deque(maxlen=samples)  # Recent tick work / tick period
+
+    def record(self, seconds: float, period: float = None):
+        """Add the duration of a piece of tick work (a game tick if period is given)"""
+        self.busy.add(seconds)
+        if period:
+            self.samples.append(seconds / period)
+
+    def utilization(self) -> float:
+        """Busy fraction over the last window complete seconds"""
+        return self.busy.rate()
+
+    def tick_percentiles(self) -> Dict[str, float]:
+        """Percentiles of recent game tick cost as a fraction of the tick period"""
+        return percentiles(self.samples)
+
+    def can_admit(self, active_games: int, threshold: float) -> bool:
+        """Whether one more game fits under threshold, assuming it costs as much as the average running one"""
+        used = self.utilization()
+        per_game = used / active_games if active_games else 0.0
+        return used + per_game <= threshold
@@ -0,0 +1,55 @@
+import time
+from typing import Callable, Tuple
+
+
+class TickClock:
+    """Fixed-rate tick clock based on absolute deadlines.
+
+    Tick n is due at start + n * period, so sleep jitter and slow iterations
+    do not accumulate. When the loop falls behind, due() returns the missed
+    ticks so they can be simulated, up to 1 + max_catch_up per call; older
+    ticks are skipped (deadlines move forward) and counted.
+    """
+
+    def __init__(self, rate: float, max_catch_up: int = 3, clock: Callable[[], float] = time.perf_counter):
+        self.period = 1 / rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.next_deadline = clock()
+        self.ticks = 0  # Ticks simulated
+        self.late_ticks = 0  # Extra ticks simulated to catch up
+        self.skipped_ticks = 0  # Ticks dropped by the catch-up policy
+        self.drift = 0.0  # Lateness of the last tick, seconds
+        self.max_drift = 0.0
+
+    def due(self) -> Tuple[int, int]:
+        """(ticks to simulate now, ticks skipped) at the current time"""
+        now = self.clock()
+        lateness = now - self.next_deadline
+        if lateness < 0:
+            return 0, 0
+        behind = int(lateness // self.period) + 1
+        run = min(behind, 1 + self.max_catch_up)
+        skipped = behind - run
+
+        self.drift = lateness
+        self.max_drift = max(self.max_drift, lateness)
+        self.ticks += run
+        self.late_ticks += behind - 1
+        self.skipped_ticks += skipped
+        self.next_deadline += behind * self.period
+        return run, skipped
+
+    def sleep_time(self) -> float:
+        """Seconds until the next tick is due"""
+        return max(0.0, self.next_deadline - self.clock())
+
+    def stats(self) -> dict:
+        """Timing counters for monitoring"""
+        return {
+            'ticks': self.ticks,
+            'late_ticks': self.late_ticks,
+            'skipped_ticks': self.skipped_ticks,
+            'drift_ms': round(self.drift * 1000, 3),
+            'max_drift_ms': round(self.max_drift * 1000, 3),
+        }
@@ -0,0 +1,246 @@
+import copy
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHUNK_TICKS = 4096  # Ticks per chunk file (45 s at 90 Hz)
+MANIFEST = 'manifest.json'
+
+EVENT_KINDS = ('kick', 'touch', 'goal')
+TEAM_CODES = {'red': 0, 'blue': 1}
+
+# Columns of each table: name -> dtype
+BALL_COLUMNS = {'tick': 'int32', 'ball_x': 'float32', 'ball_y': 'float32',
+                'ball_vx': 'float32', 'ball_vy': 'float32'}
+PLAYER_COLUMNS = {'player_tick': 'int32', 'player': 'int16', 'player_x': 'float32', 'player_y': 'float32',
+                  'player_vx': 'float32', 'player_vy': 'float32'}
+EVENT_COLUMNS = {'event_tick': 'int32', 'event_kind': 'int8', 'event_player': 'int16', 'event_team': 'int8'}
+TABLES = {'ball': BALL_COLUMNS, 'players': PLAYER_COLUMNS, 'events': EVENT_COLUMNS}
+
+
+def _columns(tables: Dict[str, list]) -> Dict[str, 'np.ndarray']:
+    """Typed columns from buffered row tuples"""
+    import numpy as np
+    columns = {}
+    for table, spec in TABLES.items():
+        rows = np.array(tables[table], dtype=np.float64).reshape(-1, len(spec))
+        for i, (name, dtype) in enumerate(spec.items()):
+            columns[name] = rows[:, i].astype(dtype)
+    return columns
+
+
+def _write_chunk(path: str, tables: Dict[str, list]):
+    import numpy as np
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(f, **_columns(tables))
+    os.replace(tmp, path)  # Readers never see half-written chunks
+
+
+def _write_manifest(path: str, manifest: dict):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def _write(directory: str, chunk: Optional[str], tables: Optional[Dict[str, list]], manifest: dict,
+           after: Optional[threading.Event], done: threading.Event):
+    """One write of a recorder: the chunk, then the manifest listing it, after the previous write"""
+    try:
+        if after is not None:
+            after.wait()
+        os.makedirs(directory, exist_ok=True)
+        if chunk is not None:
+            _write_chunk(os.path.join(directory, chunk), tables)
+        _write_manifest(os.path.join(directory, MANIFEST), manifest)
+    finally:
+        done.set()
+
+
+class TraceRecorder:
+    """Per-tick trace of one match, written as compressed NPZ chunks.
+
+    Each physics step appends the ball row and one row per player as plain
+    tuples, the cheapest thing to do per tick. Every CHUNK_TICKS ticks the
+    buffers are handed to a writer (an executor in the server) that turns
+    them into typed NumPy columns and compresses them off the event loop.
+    A match directory holds chunk_NNNNN.npz files with the ball, players
+    and events tables as separate members, plus a manifest mapping player
+    indices to names and chunks to tick ranges.
+    """
+
+    def __init__(self, root: str, room_id: str, mode: str, map_name: str, tick_rate: int,
+                 writer=None, match_id: str = None):
+        self.match_id = match_id or str(uuid.uuid4())
+        self.started = datetime.utcnow()
+        self.directory = os.path.join(root, self.started.strftime('%Y-%m-%d'), self.match_id)
+        self.writer = writer or (lambda fn, *args: fn(*args))  # Called as writer(fn, *args)
+        self.manifest = {
+            'match_id': self.match_id,
+            'room_id': room_id,
+            'mode': mode,
+            'map': map_name,
+            'tick_rate': tick_rate,
+            'started': self.started.isoformat(),
+            'players': [],  # [{'name', 'team'}], position = player index
+            'chunks': [],  # [{'file', 'first_tick', 'last_tick', 'ticks'}]
+            'complete': False
+        }
+        self.player_index: Dict[str, int] = {}
+        self.ball: List[tuple] = []  # (tick, x, y, vx, vy) per tick
+        self.players: List[tuple] = []  # (tick, index, x, y, vx, vy) per player and tick
+        self.events: List[tuple] = []  # (tick, kind, player, team) per event
+        self.written: Optional[threading.Event] = None  # Set when the last submitted write finished
+        self.closed = False
+
+    def _index(self, name: str, team: str) -> int:
+        index = self.player_index.get(name)
+        if index is None:
+            index = self.player_index[name] = len(self.manifest['players'])
+            self.manifest['players'].append({'name': name, 'team': team})
+        return index
+
+    def sample(self, engine):
+        """Record the state after one physics step"""
+        tick = engine.tick
+        ball = engine.ball
+        self.ball.append((tick, ball['x'], ball['y'], ball['vx'], ball['vy']))
+        append = self.players.append
+        player_index = self.player_index
+        for player in engine.players.values():
+            index = player_index.get(player['name'])
+            if index is None:
+                index = self._index(player['name'], player['team'])
+            append((tick, index, player['x'], player['y'], player['vx'], player['vy']))
+        if len(self.ball) >= CHUNK_TICKS:
+            self.flush()
+
+    def event(self, tick: int, kind: str, name: Optional[str] = None, team: Optional[str] = None):
+        """Record a kick, touch or goal (goals carry the scoring team)"""
+        player = self._index(name, team) if name is not None else -1
+        self.events.append((tick, EVENT_KINDS.index(kind), player, TEAM_CODES.get(team, -1)))
+
+    def flush(self):
+        """Hand the buffered ticks to the writer as one chunk"""
+        if not self.ball and not self.events:
+            return
+        name = f'chunk_{len(self.manifest["chunks"]):05d}.npz'
+        self.manifest['chunks'].append({
+            'file': name,
+            'first_tick': self.ball[0][0] if self.ball else None,
+            'last_tick': self.ball[-1][0] if self.ball else None,
+            'ticks': len(self.ball)
+        })
+        tables = {'ball': self.ball, 'players': self.players, 'events': self.events}
+        self.ball, self.players, self.events = [], [], []
+        # The manifest is rewritten with every chunk, so aborted matches stay readable
+        self._submit(name, tables)
+
+    def _submit(self, chunk: Optional[str] = None, tables: Optional[Dict[str, list]] = None):
+        """Queue a write that starts once the previous one finished, so manifests land in order"""
+        after, self.written = self.written, threading.Event()
+        self.writer(_write, self.directory, chunk, tables, copy.deepcopy(self.manifest), after, self.written)
+
+    def close(self, complete: bool = True):
+        """Write the last chunk and the final manifest"""
+        if self.closed:
+            return
+        self.closed = True
+        self.manifest['complete'] = complete
+        self.manifest['ended'] = datetime.utcnow().isoformat()
+        if self.ball or self.events:
+            self.flush()
+        else:
+            self._submit()
+
+
+def list_matches(root: str) -> List[str]:
+    """Directories of every recorded match under root, oldest day first"""
+    matches = []
+    for day in sorted(os.listdir(root)):
+        day_dir = os.path.join(root, day)
+        if os.path.isdir(day_dir):
+            matches.extend(
+                os.path.join(day_dir, m) for m in sorted(os.listdir(day_dir))
+                if os.path.exists(os.path.join(day_dir, m, MANIFEST))
+            )
+    return matches
+
+
+def read_manifest(match_dir: str) -> dict:
+    with open(os.path.join(match_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def read_match(match_dir: str, columns: Iterable[str], first_tick: int = None,
+               last_tick: int = None) -> Dict[str, 'np.ndarray']:
+    """Selected columns of a match, optionally only the chunks overlapping a tick range.
+
+    NPZ members are decompressed on access, so columns that are not
+    requested are never read.
+    """
+    import numpy as np
+    columns = list(columns)
+    parts: Dict[str, list] = {name: [] for name in columns}
+    for chunk in read_manifest(match_dir)['chunks']:
+        if chunk['ticks'] and ((first_tick is not None and chunk['last_tick'] < first_tick) or
+                               (last_tick is not None and chunk['first_tick'] > last_tick)):
+            continue
+        path = os.path.join(match_dir, chunk['file'])
+        if not os.path.exists(path):
+            continue  # Still being written
+        with np.load(path) as data:
+            for name in columns:
+                parts[name].append(data[name])
+    return {
+        name: np.concatenate(arrays) if arrays else np.empty(0, dtype=_dtype_of(name))
+        for name, arrays in parts.items()
+    }
+
+
+def _dtype_of(column: str) -> str:
+    for spec in TABLES.values():
+        if column in spec:
+            return spec[column]
+    raise KeyError(f'Unknown trace column: {column}')
+
+
+def read_season(root: str, table: str = 'players', columns: Iterable[str] = None,
+                matches: Iterable[str] = None) -> 'pd.DataFrame':
+    """One table of many matches as a DataFrame with a categorical match_id column.
+
+    For the players and events tables, a player_name column is added from
+    each manifest.
+    """
+    import numpy as np
+    import pandas as pd
+    spec = TABLES[table]
+    columns = list(columns or spec)
+    index_column = {'players': 'player', 'events': 'event_player'}.get(table)
+    wanted = columns + ([index_column] if index_column and index_column not in columns else [])
+    frames = []
+    for match_dir in matches or list_matches(root):
+        manifest = read_manifest(match_dir)
+        data = read_match(match_dir, wanted)
+        frame = pd.DataFrame({name: data[name] for name in columns})
+        if index_column:
+            names = np.array([p['name'] for p in manifest['players']] + [None], dtype=object)
+            frame['player_name'] = names[data[index_column]]  # -1 (no player) maps to None
+        frame['match_id'] = manifest['match_id']
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=columns + ['match_id'])
+    season = pd.concat(frames, ignore_index=True)
+    season['match_id'] = season['match_id'].astype('category')
+    return season
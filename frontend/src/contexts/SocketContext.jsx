@@ -1,5 +1,5 @@
-import React, { createContext, useContext, useEffect, useState } from 'react';
-import { initializeSocket, getSocket, disconnectSocket } from '../services/socket';
+import React, { createContext, useCallback, useContext, useEffect, useState } from 'react';
+import { initializeSocket, getSocket, disconnectSocket, switchNode as connectToNode } from '../services/socket';
 
 const SocketContext = createContext(null);
 
@@ -15,9 +15,9 @@ export const SocketProvider = ({ children }) => {
   const [socket, setSocket] = useState(null);
   const [connected, setConnected] = useState(false);
 
-  useEffect(() => {
-    const socketInstance = initializeSocket();
+  const track = (socketInstance) => {
     setSocket(socketInstance);
+    setConnected(socketInstance.connected);
 
     socketInstance.on('connect', () => {
       setConnected(true);
@@ -26,14 +26,23 @@ export const SocketProvider = ({ children }) => {
     socketInstance.on('disconnect', () => {
       setConnected(false);
     });
+  };
+
+  useEffect(() => {
+    track(initializeSocket());
 
     return () => {
       disconnectSocket();
     };
   }, []);
 
+  // Pages re-register their listeners when the socket changes (they depend on socket/connected)
+  const switchNode = useCallback((url) => {  // No url: back to BACKEND_URL
+    track(connectToNode(url));
+  }, []);
+
   return (
-    <SocketContext.Provider value={{ socket, connected }}>
+    <SocketContext.Provider value={{ socket, connected, switchNode }}>
       {children}
     </SocketContext.Provider>
   );
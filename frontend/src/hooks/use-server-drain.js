@@ -0,0 +1,39 @@
+import { useEffect } from 'react';
+import { useSocket } from '../contexts/SocketContext';
+import { toast } from './use-toast';
+
+const REJOIN_DELAY = 1000; // ms before reconnecting, so the draining node has stopped accepting joins
+
+const rejoinKey = (roomId) => `haxball_rejoin_${roomId}`;
+
+// A node shutting down checkpoints its matches and sends server_draining: reconnect through
+// BACKEND_URL and send join_room again, so whichever node we land on restores the match.
+// The pending rejoin is kept in sessionStorage, so it survives moving between the room and game pages.
+export const useServerDrain = (roomId, username) => {
+  const { socket, connected, switchNode } = useSocket();
+
+  useEffect(() => {
+    if (!socket || !connected || !roomId || !username) return;
+
+    if (sessionStorage.getItem(rejoinKey(roomId))) {
+      sessionStorage.removeItem(rejoinKey(roomId));
+      socket.emit('join_room', { roomId, username });
+    }
+
+    const onDraining = (data) => {
+      if (data.roomId !== roomId) return;
+      sessionStorage.setItem(rejoinKey(roomId), '1');
+      toast({
+        title: "Servidor reiniciando",
+        description: "Reconectando la partida a otro servidor..."
+      });
+      // Not cleared on unmount: the old socket disconnects before the delay is over
+      setTimeout(() => switchNode(), REJOIN_DELAY);
+    };
+    socket.on('server_draining', onDraining);
+
+    return () => {
+      socket.off('server_draining', onDraining);
+    };
+  }, [socket, connected, roomId, username, switchNode]);
+};
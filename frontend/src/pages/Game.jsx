@@ -5,12 +5,15 @@ import { ArrowLeft, Pause, Play } from 'lucide-react';
 import { useSocket } from '../contexts/SocketContext';
 import { useAuth } from '../contexts/AuthContext';
 import { toast } from '../hooks/use-toast';
+import { useServerDrain } from '../hooks/use-server-drain';
+import { watchRelay } from '../services/socket';
 
 const Game = () => {
   const navigate = useNavigate();
   const { roomId } = useParams();
   const { socket, connected } = useSocket();
   const { user } = useAuth();
+  useServerDrain(roomId, user?.username);  // Follows the match when this server shuts down
   const canvasRef = useRef(null);
   const keysPressed = useRef({});
   const animationFrameRef = useRef(null);
@@ -383,9 +386,10 @@ const Game = () => {
     window.addEventListener('keydown', handleKeyDown);
     window.addEventListener('keyup', handleKeyUp);
 
-    // Listen for game state updates from server
+    // Listen for game state updates from server (or from its relay)
+    let stopRelay = null;
     if (socket && connected) {
-      socket.on('game_state', (gameStateFromServer) => {
+      const onGameState = (gameStateFromServer) => {
         // Store states for interpolation
         previousGameStateRef.current = lastGameStateRef.current;
         lastGameStateRef.current = gameStateFromServer;
@@ -397,7 +401,13 @@ const Game = () => {
           score: gameStateFromServer.score || prev.score,
           time: Math.floor(gameStateFromServer.time || prev.time)
         }));
-      });
+      };
+      const relayUrl = sessionStorage.getItem(`haxball_relay_${roomId}`);
+      if (relayUrl) {
+        stopRelay = watchRelay(relayUrl, roomId, onGameState);
+      } else {
+        socket.on('game_state', onGameState);
+      }
 
       socket.on('goal_scored', (data) => {
         console.log('Goal scored:', data);
@@ -441,6 +451,9 @@ const Game = () => {
         cancelAnimationFrame(animationFrameRef.current);
       }
       
+      if (stopRelay) {
+        stopRelay();
+      }
       if (socket) {
         socket.off('game_state');
         socket.off('goal_scored');
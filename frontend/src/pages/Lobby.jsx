@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, DialogTrigger } from '../components/ui/dialog';
 import { Input } from '../components/ui/input';
-import { Users, Play, Plus, LogOut, RefreshCw } from 'lucide-react';
+import { Users, Play, Plus, LogOut, RefreshCw, Search, X } from 'lucide-react';
 import { toast } from '../hooks/use-toast';
 import { useAuth } from '../contexts/AuthContext';
 import { useSocket } from '../contexts/SocketContext';
@@ -12,11 +12,15 @@ import { useSocket } from '../contexts/SocketContext';
 const Lobby = () => {
   const navigate = useNavigate();
   const { user, logout } = useAuth();
-  const { socket, connected } = useSocket();
+  const { socket, connected, switchNode } = useSocket();
+  const lastCreate = useRef(null); // Last create_room sent
+  const pendingCreate = useRef(null); // create_room to re-send once connected to the node chosen by the server
   const [rooms, setRooms] = useState([]);
   const [newRoomName, setNewRoomName] = useState('');
   const [maxPlayers, setMaxPlayers] = useState(6);
   const [isCreateDialogOpen, setIsCreateDialogOpen] = useState(false);
+  const [queueMode, setQueueMode] = useState('1v1');
+  const [queued, setQueued] = useState(false);  // Waiting in the matchmaking queue
 
   useEffect(() => {
     if (!user) {
@@ -35,15 +39,57 @@ const Lobby = () => {
 
       // Listen for room created
       socket.on('room_created', (data) => {
+        toast({
+          title: "¡Sala Creada!",
+          description: `Sala "${data.room.name}" creada exitosamente`
+        });
         navigate(`/room/${data.room.id}`);
       });
 
+      // Another node has more capacity: create the room there
+      socket.on('create_redirect', (data) => {
+        pendingCreate.current = lastCreate.current;
+        switchNode(data.nodeUrl);
+      });
+
+      // Matchmaking
+      socket.on('queue_joined', (data) => {
+        setQueued(true);
+        toast({
+          title: "Buscando partida",
+          description: `Modo ${data.mode}, rating ${data.rating} (${data.queued} en cola)`
+        });
+      });
+
+      socket.on('queue_left', () => {
+        setQueued(false);
+      });
+
+      // The match starts right away: the room page follows it to the game
+      socket.on('match_found', (data) => {
+        setQueued(false);
+        toast({
+          title: "¡Partida encontrada!",
+          description: "Equipos equilibrados por rating, el partido empieza ya"
+        });
+        navigate(`/room/${data.room.id}`, { state: { matchmade: true } });
+      });
+
+      if (pendingCreate.current) {
+        socket.emit('create_room', { ...pendingCreate.current, placed: true });
+        pendingCreate.current = null;
+      }
+
       return () => {
         socket.off('room_list_update');
         socket.off('room_created');
+        socket.off('create_redirect');
+        socket.off('queue_joined');
+        socket.off('queue_left');
+        socket.off('match_found');
       };
     }
-  }, [socket, connected, navigate, user]);
+  }, [socket, connected, navigate, user, switchNode]);
 
   const handleCreateRoom = () => {
     if (!newRoomName.trim()) {
@@ -56,28 +102,47 @@ const Lobby = () => {
     }
 
     if (socket && connected) {
-      socket.emit('create_room', {
+      const request = {
         name: newRoomName,
         maxPlayers: maxPlayers,
         host: user.username
-      });
+      };
+      lastCreate.current = request;
+      socket.emit('create_room', request);
 
       setIsCreateDialogOpen(false);
       setNewRoomName('');
-      
+    } else {
       toast({
-        title: "¡Sala Creada!",
-        description: `Sala "${newRoomName}" creada exitosamente`
+        title: "Error de conexión",
+        description: "No hay conexión con el servidor",
+        variant: "destructive"
       });
-    } else {
+    }
+  };
+
+  const handleToggleQueue = () => {
+    if (!socket || !connected) {
       toast({
         title: "Error de conexión",
         description: "No hay conexión con el servidor",
         variant: "destructive"
       });
+      return;
+    }
+    if (queued) {
+      socket.emit('leave_queue');
+    } else {
+      socket.emit('join_queue', { username: user.username, mode: queueMode });
     }
   };
 
+  // Leaving the lobby leaves the queue too
+  useEffect(() => {
+    if (!queued || !socket) return;
+    return () => socket.emit('leave_queue');
+  }, [queued, socket]);
+
   const handleJoinRoom = (room) => {
     const currentPlayers = room.current_players || room.players || 0;
     if (currentPlayers >= room.maxPlayers) {
@@ -159,6 +224,24 @@ const Lobby = () => {
         <div className="flex items-center justify-between mb-6">
           <h2 className="text-2xl font-bold text-white">Salas Disponibles</h2>
           <div className="flex gap-3">
+            <select
+              className="px-3 py-2 rounded-md bg-slate-800 border border-slate-600 text-white"
+              value={queueMode}
+              onChange={(e) => setQueueMode(e.target.value)}
+              disabled={queued}
+            >
+              <option value="1v1">1v1</option>
+              <option value="3v3">3v3</option>
+              <option value="classic">Clásico</option>
+              <option value="futsal">Futsal</option>
+            </select>
+            <Button
+              onClick={handleToggleQueue}
+              className={queued ? "bg-red-600 hover:bg-red-700 text-white" : "bg-blue-600 hover:bg-blue-700 text-white"}
+            >
+              {queued ? <X className="w-4 h-4 mr-2" /> : <Search className="w-4 h-4 mr-2" />}
+              {queued ? 'Cancelar búsqueda' : 'Buscar Partida'}
+            </Button>
             <Button
               onClick={refreshRooms}
               variant="outline"
@@ -1,18 +1,23 @@
-import React, { useState, useEffect } from 'react';
-import { useNavigate, useParams } from 'react-router-dom';
+import React, { useState, useEffect, useRef } from 'react';
+import { useLocation, useNavigate, useParams } from 'react-router-dom';
 import { Button } from '../components/ui/button';
 import { Card } from '../components/ui/card';
 import { Input } from '../components/ui/input';
-import { Users, Crown, Play, ArrowLeft, Send } from 'lucide-react';
+import { Users, Crown, Play, ArrowLeft, Send, Bot, X } from 'lucide-react';
 import { toast } from '../hooks/use-toast';
+import { useServerDrain } from '../hooks/use-server-drain';
 import { useAuth } from '../contexts/AuthContext';
 import { useSocket } from '../contexts/SocketContext';
 
 const Room = () => {
   const navigate = useNavigate();
   const { roomId } = useParams();
+  const location = useLocation();
+  const matchmade = Boolean(location.state?.matchmade);  // Sent here by match_found
   const { user } = useAuth();
-  const { socket, connected } = useSocket();
+  const { socket, connected, switchNode } = useSocket();
+  useServerDrain(roomId, user?.username);
+  const pendingJoin = useRef(false); // join_room to re-send once connected to the node that owns the room
   const [room, setRoom] = useState(null);
   const [messages, setMessages] = useState([]);
   const [newMessage, setNewMessage] = useState('');
@@ -36,18 +41,50 @@ const Room = () => {
       }
     }
 
+    // Game page reads game_state from the relay when the server uses one (relayUrl comes with running matches)
+    const rememberRelay = (data) => {
+      if (data.relayUrl) {
+        sessionStorage.setItem(`haxball_relay_${roomId}`, data.relayUrl);
+      } else {
+        sessionStorage.removeItem(`haxball_relay_${roomId}`);
+      }
+    };
+
+    // Players of a match that is already running go straight to it: matchmade matches start
+    // before this page loads, and a match restored after a server drain is running when we rejoin
+    const followRunningMatch = (data, rejoined = false) => {
+      if (data.room?.status !== 'playing') return;
+      rememberRelay(data);
+      const me = data.room.players?.find(p => p.username === user.username);
+      if ((matchmade || rejoined) && me && me.team !== 'spectator') {
+        navigate(`/game/${roomId}`, { replace: true });
+      }
+    };
+
     if (socket && connected) {
       // Listen for room updates
       socket.on('room_updated', (data) => {
         console.log('Room updated:', data);
+        followRunningMatch(data);
         if (data.room) {
           setRoom(data.room);
           setLoading(false);
         }
       });
 
+      // Batched lobby changes: only the players that changed
+      socket.on('room_patch', (data) => {
+        if (data.roomId !== roomId || !data.players) return;
+        const changed = Object.fromEntries(data.players.map(p => [p.user_id, p]));
+        setRoom(prev => prev && {
+          ...prev,
+          players: prev.players.map(p => changed[p.user_id] || p)
+        });
+      });
+
       socket.on('player_joined', (data) => {
         console.log('Player joined:', data);
+        followRunningMatch(data, data.player?.username === user.username);
         if (data.room) {
           setRoom(data.room);
           setLoading(false);
@@ -75,7 +112,15 @@ const Room = () => {
         setMessages(prev => [...prev, data]);
       });
 
+      // The room lives on another node: reconnect there and join again
+      socket.on('room_redirect', (data) => {
+        if (data.roomId !== roomId) return;
+        pendingJoin.current = true;
+        switchNode(data.nodeUrl);
+      });
+
       socket.on('game_started', (data) => {
+        rememberRelay(data);
         toast({
           title: "¡Juego iniciado!",
           description: "El partido está comenzando..."
@@ -83,25 +128,40 @@ const Room = () => {
         navigate(`/game/${roomId}`);
       });
 
+      socket.on('game_queued', (data) => {
+        toast({
+          title: "Servidor ocupado",
+          description: `El partido empezará en cuanto haya capacidad (posición ${data.position})`
+        });
+      });
+
       socket.on('game_over', (data) => {
         console.log('Game over event received in Room:', data);
         // Recargar la información de la sala después del juego
         socket.emit('get_room', { roomId });
       });
 
+      if (pendingJoin.current) {
+        pendingJoin.current = false;
+        socket.emit('join_room', { roomId, username: user.username });
+      }
+
       // Solicitar información actualizada de la sala al montar el componente
       socket.emit('get_room', { roomId });
 
       return () => {
         socket.off('room_updated');
+        socket.off('room_patch');
         socket.off('player_joined');
         socket.off('player_left');
         socket.off('chat_message');
+        socket.off('room_redirect');
         socket.off('game_started');
+        socket.off('game_queued');
         socket.off('game_over');
       };
     }
-  }, [socket, connected, navigate, user, roomId]);
+  }, [socket, connected, navigate, user, roomId, switchNode, matchmade]);
 
   const handleSendMessage = (e) => {
     e.preventDefault();
@@ -128,6 +188,18 @@ const Room = () => {
     }
   };
 
+  const handleAddBot = (team) => {
+    if (socket && connected) {
+      socket.emit('add_bot', { team });
+    }
+  };
+
+  const handleRemoveBot = (botId) => {
+    if (socket && connected) {
+      socket.emit('remove_bot', { botId });
+    }
+  };
+
   const handleStartGame = () => {
     if (!socket || !connected) return;
 
@@ -172,6 +244,8 @@ const Room = () => {
   const blueTeam = players.filter(p => p.team === 'blue');
   const isHost = room.host === user?.username;
   const currentPlayer = players.find(p => p.username === user?.username);
+  const isBot = (player) => player.user_id?.startsWith('bot_');
+  const roomFull = room.current_players >= room.maxPlayers;
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-900 via-slate-800 to-slate-900">
@@ -218,14 +292,28 @@ const Room = () => {
                   <h3 className="text-xl font-bold text-red-400 flex items-center gap-2">
                     🔴 Equipo Rojo
                   </h3>
-                  <Button
-                    size="sm"
-                    onClick={() => handleChangeTeam('red')}
-                    className="bg-red-600 hover:bg-red-700 text-white"
-                    disabled={!connected}
-                  >
-                    Unirse
-                  </Button>
+                  <div className="flex items-center gap-2">
+                    {isHost && (
+                      <Button
+                        size="sm"
+                        variant="outline"
+                        onClick={() => handleAddBot('red')}
+                        className="border-red-600 text-white hover:bg-red-800"
+                        disabled={!connected || roomFull}
+                        title="Añadir bot"
+                      >
+                        <Bot className="w-4 h-4" />
+                      </Button>
+                    )}
+                    <Button
+                      size="sm"
+                      onClick={() => handleChangeTeam('red')}
+                      className="bg-red-600 hover:bg-red-700 text-white"
+                      disabled={!connected}
+                    >
+                      Unirse
+                    </Button>
+                  </div>
                 </div>
                 <div className="space-y-2">
                   {redTeam.map((player, idx) => (
@@ -235,9 +323,21 @@ const Room = () => {
                     >
                       <div className="flex items-center gap-2">
                         {player.username === room.host && <Crown className="w-4 h-4 text-yellow-400" />}
+                        {isBot(player) && <Bot className="w-4 h-4 text-slate-400" />}
                         <span className="text-white font-medium">{player.username}</span>
                       </div>
-                      {player.ready && <span className="text-green-400 text-sm">✓ Listo</span>}
+                      <div className="flex items-center gap-2">
+                        {player.ready && <span className="text-green-400 text-sm">✓ Listo</span>}
+                        {isHost && isBot(player) && (
+                          <button
+                            onClick={() => handleRemoveBot(player.user_id)}
+                            className="text-slate-400 hover:text-white"
+                            title="Quitar bot"
+                          >
+                            <X className="w-4 h-4" />
+                          </button>
+                        )}
+                      </div>
                     </div>
                   ))}
                   {redTeam.length === 0 && (
@@ -252,14 +352,28 @@ const Room = () => {
                   <h3 className="text-xl font-bold text-blue-400 flex items-center gap-2">
                     🔵 Equipo Azul
                   </h3>
-                  <Button
-                    size="sm"
-                    onClick={() => handleChangeTeam('blue')}
-                    className="bg-blue-600 hover:bg-blue-700 text-white"
-                    disabled={!connected}
-                  >
-                    Unirse
-                  </Button>
+                  <div className="flex items-center gap-2">
+                    {isHost && (
+                      <Button
+                        size="sm"
+                        variant="outline"
+                        onClick={() => handleAddBot('blue')}
+                        className="border-blue-600 text-white hover:bg-blue-800"
+                        disabled={!connected || roomFull}
+                        title="Añadir bot"
+                      >
+                        <Bot className="w-4 h-4" />
+                      </Button>
+                    )}
+                    <Button
+                      size="sm"
+                      onClick={() => handleChangeTeam('blue')}
+                      className="bg-blue-600 hover:bg-blue-700 text-white"
+                      disabled={!connected}
+                    >
+                      Unirse
+                    </Button>
+                  </div>
                 </div>
                 <div className="space-y-2">
                   {blueTeam.map((player, idx) => (
@@ -269,9 +383,21 @@ const Room = () => {
                     >
                       <div className="flex items-center gap-2">
                         {player.username === room.host && <Crown className="w-4 h-4 text-yellow-400" />}
+                        {isBot(player) && <Bot className="w-4 h-4 text-slate-400" />}
                         <span className="text-white font-medium">{player.username}</span>
                       </div>
-                      {player.ready && <span className="text-green-400 text-sm">✓ Listo</span>}
+                      <div className="flex items-center gap-2">
+                        {player.ready && <span className="text-green-400 text-sm">✓ Listo</span>}
+                        {isHost && isBot(player) && (
+                          <button
+                            onClick={() => handleRemoveBot(player.user_id)}
+                            className="text-slate-400 hover:text-white"
+                            title="Quitar bot"
+                          >
+                            <X className="w-4 h-4" />
+                          </button>
+                        )}
+                      </div>
                     </div>
                   ))}
                   {blueTeam.length === 0 && (
@@ -3,14 +3,17 @@ import { io } from 'socket.io-client';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
 let socket = null;
+let nodeUrl = BACKEND_URL; // Game server node the socket talks to (see switchNode)
 
 export const initializeSocket = () => {
   if (!socket) {
-    socket = io(BACKEND_URL, {
+    socket = io(nodeUrl, {
       transports: ['websocket', 'polling'],
       reconnection: true,
       reconnectionDelay: 1000,
-      reconnectionAttempts: 5
+      reconnectionAttempts: 5,
+      // Signed session token from login, verified by the server on connect
+      auth: (cb) => cb({ token: localStorage.getItem('haxball_token') })
     });
 
     socket.on('connect', () => {
@@ -35,6 +38,25 @@ export const getSocket = () => {
   return socket;
 };
 
+// game_state may be served by a relay process instead of the game server (relayUrl in game_started)
+export const watchRelay = (relayUrl, roomId, onState) => {
+  const relay = io(relayUrl, { transports: ['websocket'], reconnection: true });
+  relay.on('connect', () => relay.emit('watch', { roomId }));
+  relay.on('game_state', onState);
+  return () => relay.disconnect();
+};
+
+// Rooms live on one node of the cluster: reconnect to the node named by create_redirect / room_redirect,
+// or back through BACKEND_URL when the current node is going away (server_draining)
+export const switchNode = (url = BACKEND_URL) => {
+  if (socket) {
+    socket.disconnect();
+    socket = null;
+  }
+  nodeUrl = url;
+  return initializeSocket();
+};
+
 export const disconnectSocket = () => {
   if (socket) {
     socket.disconnect();
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+HaxBall Local Load Test
+Starts the backend ASGI app locally and drives it with simulated Socket.IO players
+to find how many rooms one server process sustains.
+
+Usage:
+    python load_test.py --rooms 1,5,10,20 --players 6 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import socketio
+
+BACKEND_DIR = Path(__file__).parent / 'backend'
+SERVER_FPS = int(os.environ.get('GAME_TICK_RATE', 90))  # Nominal server tick rate (see SocketManager.game_loop)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class ServerProcess:
+    """Backend server running in a child process so its CPU and memory can be sampled"""
+
+    def __init__(self, port: int, mongo_url: str):
+        self.port = port
+        self.mongo_url = mongo_url
+        self.process: Optional[subprocess.Popen] = None
+        self._last_cpu = None
+
+    def start(self):
+        env = dict(os.environ)
+        # Socket.IO handlers never touch Mongo, so an unreachable URL is fine:
+        # the motor client only connects on first use
+        env.setdefault('MONGO_URL', self.mongo_url)
+        env.setdefault('DB_NAME', 'haxball_load_test')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'server:socket_app',
+             '--host', '127.0.0.1', '--port', str(self.port), '--log-level', 'warning'],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    async def wait_ready(self, timeout: float = 15):
+        """Wait until the server accepts TCP connections"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'Server exited with code {self.process.returncode}')
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', self.port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.2)
+        raise RuntimeError('Server did not start in time')
+
+    def _read_cpu_seconds(self) -> float:
+        # utime + stime from /proc/<pid>/stat (fields 14 and 15)
+        with open(f'/proc/{self.process.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        return (int(fields[11]) + int(fields[12])) / ticks
+
+    def _read_rss_mb(self) -> float:
+        with open(f'/proc/{self.process.pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    def sample(self) -> Dict[str, float]:
+        """CPU percent since the previous sample and resident memory in MB"""
+        if self.process is None:
+            return {'cpu_percent': 0.0, 'rss_mb': 0.0}
+        try:
+            cpu_seconds = self._read_cpu_seconds()
+            rss_mb = self._read_rss_mb()
+        except (OSError, ValueError):
+            # /proc not available (non-Linux)
+            return {'cpu_percent': 0.0, 'rss_mb': 0.0}
+        now = time.monotonic()
+        cpu_percent = 0.0
+        if self._last_cpu:
+            last_seconds, last_time = self._last_cpu
+            cpu_percent = (cpu_seconds - last_seconds) / max(now - last_time, 1e-9) * 100
+        self._last_cpu = (cpu_seconds, now)
+        return {'cpu_percent': cpu_percent, 'rss_mb': rss_mb}
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class SimulatedPlayer:
+    """A Socket.IO client that plays like a human: holds directions, kicks now and then"""
+
+    def __init__(self, url: str, username: str, input_hz: float):
+        self.url = url
+        self.username = username
+        self.input_interval = 1 / input_hz
+        self.sio = socketio.AsyncClient(reconnection=False, logger=False, engineio_logger=False)
+        self.room: Optional[dict] = None
+        self.game_started = asyncio.Event()
+        self.room_ready = asyncio.Event()
+        self.running = False
+
+        # Metrics
+        self.latencies: List[float] = []  # Input sent -> first snapshot reflecting it (ms)
+        self.intervals: List[float] = []  # Snapshot inter-arrival times (ms)
+        self.snapshots = 0
+        self.errors: List[str] = []
+        self._last_snapshot_at: Optional[float] = None
+        self._pending: Optional[tuple] = None  # (direction, sent_at)
+
+        self.sio.on('room_created', self._on_room)
+        self.sio.on('player_joined', self._on_room)
+        self.sio.on('game_started', self._on_game_started)
+        self.sio.on('game_state', self._on_game_state)
+        self.sio.on('error', self._on_error)
+
+    async def _on_room(self, data):
+        self.room = data['room']
+        self.room_ready.set()
+
+    async def _on_game_started(self, data):
+        self.game_started.set()
+
+    async def _on_error(self, data):
+        self.errors.append(data.get('message', str(data)))
+
+    async def _on_game_state(self, state):
+        now = time.perf_counter()
+        if not self.running:
+            return
+        self.snapshots += 1
+        if self._last_snapshot_at is not None:
+            self.intervals.append((now - self._last_snapshot_at) * 1000)
+        self._last_snapshot_at = now
+
+        if self._pending:
+            direction, sent_at = self._pending
+            me = next((p for p in state['players'] if p['name'] == self.username), None)
+            if me and me['vx'] * direction > 0:
+                self.latencies.append((now - sent_at) * 1000)
+                self._pending = None
+            elif now - sent_at > 1.0:
+                # Blocked by a collision or the kickoff circle, drop the sample
+                self._pending = None
+
+    async def connect(self):
+        await self.sio.connect(self.url, transports=['websocket'])
+
+    async def play(self, stop_at: float):
+        """Send input streams until stop_at, changing direction every few hundred ms"""
+        direction = 1
+        next_turn = 0.0
+        keys = {}
+        self.running = True
+        while time.perf_counter() < stop_at and self.sio.connected:
+            now = time.perf_counter()
+            if now >= next_turn:
+                direction = -direction
+                vertical = random.choice([None, 'w', 's'])
+                keys = {'d' if direction > 0 else 'a': True}
+                if vertical:
+                    keys[vertical] = True
+                next_turn = now + random.uniform(0.25, 0.8)
+                if self._pending is None:
+                    self._pending = (direction, now)
+            await self.sio.emit('player_input', {
+                'keys': keys,
+                'kick': random.random() < 0.05,
+                'push': random.random() < 0.02,
+            })
+            await asyncio.sleep(self.input_interval)
+        self.running = False
+
+    async def disconnect(self):
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+
+class LoadTester:
+    def __init__(self, url: str, players_per_room: int, input_hz: float):
+        self.url = url
+        self.players_per_room = players_per_room
+        self.input_hz = input_hz
+        self._room_seq = 0
+
+    async def open_room(self) -> List[SimulatedPlayer]:
+        """Create a room, fill it with players on both teams and start the game"""
+        self._room_seq += 1
+        tag = f'r{self._room_seq}'
+        players = [
+            SimulatedPlayer(self.url, f'{tag}_p{i}', self.input_hz)
+            for i in range(self.players_per_room)
+        ]
+        host = players[0]
+        await host.connect()
+        await host.sio.emit('create_room', {
+            'name': f'Load {tag}', 'host': host.username, 'maxPlayers': self.players_per_room
+        })
+        await asyncio.wait_for(host.room_ready.wait(), timeout=10)
+        room_id = host.room['id']
+
+        for player in players[1:]:
+            await player.connect()
+            await player.sio.emit('join_room', {'roomId': room_id, 'username': player.username})
+            await asyncio.wait_for(player.room_ready.wait(), timeout=10)
+
+        for i, player in enumerate(players):
+            await player.sio.emit('change_team', {'roomId': room_id, 'team': 'red' if i % 2 == 0 else 'blue'})
+            await player.sio.emit('player_ready', {'roomId': room_id, 'ready': True})
+        # Give the server a moment to apply every ready flag before starting
+        await asyncio.sleep(0.3)
+        await host.sio.emit('start_game', {'roomId': room_id})
+        await asyncio.wait_for(host.game_started.wait(), timeout=10)
+        return players
+
+    async def run_step(self, server: ServerProcess, rooms: List[List[SimulatedPlayer]],
+                       duration: float) -> Dict[str, float]:
+        """Play every open room for `duration` seconds and aggregate metrics"""
+        players = [p for room in rooms for p in room]
+        for p in players:
+            p.latencies.clear()
+            p.intervals.clear()
+            p.snapshots = 0
+            p._last_snapshot_at = None
+
+        server.sample()
+        cpu_samples = []
+        rss_samples = []
+        stop_at = time.perf_counter() + duration
+        play_tasks = [asyncio.create_task(p.play(stop_at)) for p in players]
+        while time.perf_counter() < stop_at:
+            await asyncio.sleep(1)
+            usage = server.sample()
+            cpu_samples.append(usage['cpu_percent'])
+            rss_samples.append(usage['rss_mb'])
+        await asyncio.gather(*play_tasks, return_exceptions=True)
+
+        latencies = [v for p in players for v in p.latencies]
+        intervals = [v for p in players for v in p.intervals]
+        nominal = 1000 / SERVER_FPS
+        return {
+            'rooms': len(rooms),
+            'clients': len(players),
+            'snapshot_hz': sum(p.snapshots for p in players) / max(len(players), 1) / duration,
+            'lat_p50': percentile(latencies, 50),
+            'lat_p95': percentile(latencies, 95),
+            'lat_p99': percentile(latencies, 99),
+            'jitter_p95': percentile([abs(v - nominal) for v in intervals], 95),
+            'jitter_std': statistics.pstdev(intervals) if len(intervals) > 1 else 0.0,
+            'cpu_avg': statistics.mean(cpu_samples) if cpu_samples else 0.0,
+            'cpu_max': max(cpu_samples, default=0.0),
+            'rss_mb': max(rss_samples, default=0.0),
+            'errors': sum(len(p.errors) for p in players),
+        }
+
+
+def print_report(results: List[Dict[str, float]]):
+    """Print one row per load step"""
+    print("\n" + "=" * 110)
+    print("HAXBALL LOAD TEST SUMMARY")
+    print("=" * 110)
+    print(f"{'rooms':>5} {'clients':>7} {'snap/s':>7} {'lat p50':>8} {'lat p95':>8} {'lat p99':>8} "
+          f"{'jit p95':>8} {'jit std':>8} {'cpu avg':>8} {'cpu max':>8} {'rss MB':>7} {'errors':>6}")
+    for r in results:
+        print(f"{r['rooms']:>5} {r['clients']:>7} {r['snapshot_hz']:>7.1f} "
+              f"{r['lat_p50']:>6.1f}ms {r['lat_p95']:>6.1f}ms {r['lat_p99']:>6.1f}ms "
+              f"{r['jitter_p95']:>6.1f}ms {r['jitter_std']:>6.1f}ms "
+              f"{r['cpu_avg']:>7.1f}% {r['cpu_max']:>7.1f}% {r['rss_mb']:>7.1f} {r['errors']:>6}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Local load test for the HaxBall game server')
+    parser.add_argument('--rooms', default='1,5,10',
+                        help='Comma-separated room counts to ramp through (default: 1,5,10)')
+    parser.add_argument('--players', type=int, default=6, help='Simulated players per room')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds to measure at each step')
+    parser.add_argument('--input-hz', type=float, default=30, help='player_input events per second per client')
+    parser.add_argument('--port', type=int, default=8765, help='Port for the local server')
+    parser.add_argument('--url', default=None,
+                        help='Use an already running server instead of starting one (no CPU/memory stats)')
+    parser.add_argument('--mongo-url', default='mongodb://localhost:27017',
+                        help='MONGO_URL for the local server if not set in the environment')
+    args = parser.parse_args()
+
+    steps = sorted(int(n) for n in args.rooms.split(','))
+    url = args.url or f'http://127.0.0.1:{args.port}'
+    server = ServerProcess(args.port, args.mongo_url)
+
+    print("Starting HaxBall Load Test...")
+    print(f"Server: {url} | steps: {steps} rooms x {args.players} players | {args.duration}s per step")
+    print("-" * 60)
+
+    if not args.url:
+        server.start()
+        await server.wait_ready()
+
+    tester = LoadTester(url, args.players, args.input_hz)
+    rooms: List[List[SimulatedPlayer]] = []
+    results = []
+    try:
+        for target in steps:
+            while len(rooms) < target:
+                rooms.append(await tester.open_room())
+            print(f"  Measuring {len(rooms)} rooms...")
+            result = await tester.run_step(server, rooms, args.duration)
+            results.append(result)
+            print(f"  -> p95 latency {result['lat_p95']:.1f}ms, snapshots {result['snapshot_hz']:.1f}/s, "
+                  f"cpu {result['cpu_avg']:.0f}%")
+    finally:
+        print_report(results)
+        await asyncio.gather(*(p.disconnect() for room in rooms for p in room), return_exceptions=True)
+        server.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("\n\nLoad test interrupted by user")
+        sys.exit(1)
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules (server.py runs from backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from tests.fakes import FakeSio  # noqa: E402
+
+
+@pytest.fixture
+def sio():
+    return FakeSio()
+
+
+@pytest.fixture
+def mongo():
+    """Fresh in-memory Mongo database (skips when mongomock_motor is not installed)"""
+    mongomock_motor = pytest.importorskip('mongomock_motor')
+    return mongomock_motor.AsyncMongoMockClient()['test']
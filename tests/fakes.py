@@ -0,0 +1,54 @@
+class FakeManager:
+    def __init__(self, sio):
+        self.sio = sio
+
+    def is_connected(self, sid, namespace):
+        return sid in self.sio.connected
+
+
+class FakeSio:
+    """Stand-in for socketio.AsyncServer that records what SocketManager emits"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.sessions = {}
+        self.rooms = {}  # sid -> rooms entered
+        self.connected = set()
+        self.emitted = []  # (event, data, room)
+        self.manager = FakeManager(self)
+
+    def on(self, event):
+        def register(handler):
+            self.handlers[event] = handler
+            return handler
+        return register
+
+    def event(self, handler):
+        self.handlers[handler.__name__] = handler
+        return handler
+
+    async def emit(self, event, data=None, room=None):
+        self.emitted.append((event, data, room))
+
+    async def get_session(self, sid):
+        return self.sessions.get(sid, {})
+
+    async def save_session(self, sid, session):
+        self.sessions[sid] = session
+
+    async def enter_room(self, sid, room):
+        self.rooms.setdefault(sid, set()).add(room)
+
+    async def leave_room(self, sid, room):
+        self.rooms.get(sid, set()).discard(room)
+
+    async def connect(self, sid):
+        self.connected.add(sid)
+        await self.handlers['connect'](sid, {})
+
+    async def call(self, event, sid, data=None):
+        return await self.handlers[event](sid, data if data is not None else {})
+
+    def events(self, name, room=None):
+        """Data of every emitted event called name (to room, if given)"""
+        return [data for event, data, to in self.emitted if event == name and (room is None or to == room)]
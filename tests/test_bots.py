@@ -0,0 +1,44 @@
+import asyncio
+
+from bots import is_bot
+
+
+def test_host_bots_join_and_play(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'Bots', 'host': 'ana', 'mode': '3v3', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        await sio.call('change_team', 's1', {'team': 'red'})
+        await sio.call('player_ready', 's1', {'ready': True})
+        await sio.call('add_bot', 's1', {'team': 'blue'})
+        await sio.call('add_bot', 's1', {})  # No team: joins the smaller one (ties go to red)
+        room = manager.rooms[room_id]
+        bots = [p for p in room if is_bot(p.user_id)]
+        assert sorted((p.username, p.team) for p in bots) == [('Bot 1', 'blue'), ('Bot 2', 'red')]
+
+        # Only the host manages bots
+        await sio.connect('s2')
+        await sio.call('join_room', 's2', {'roomId': room_id, 'username': 'bea'})
+        await sio.call('remove_bot', 's2', {'botId': bots[0].user_id})
+        assert sio.events('error', room='s2')[-1] == {'message': 'Only host can remove bots'}
+        assert room.get(bots[0].user_id) is not None
+
+        await sio.call('start_game', 's1')
+        engine = manager.game_engines[room_id]
+        blue_bot = next(p.user_id for p in bots if p.team == 'blue')
+        start = dict(engine.players[blue_bot])
+        for _ in range(60):
+            manager.bots.step()
+            engine.update_physics()
+        moved = engine.players[blue_bot]
+        assert (moved['x'], moved['y']) != (start['x'], start['y'])
+
+        await sio.call('remove_bot', 's1', {'botId': blue_bot})
+        assert room.get(blue_bot) is None
+        assert blue_bot not in engine.players
+        await manager.end_game(room_id)
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from checkpoint import CheckpointError, decode_checkpoint, encode_checkpoint
+from game_engine import GameEngine
+
+
+def test_round_trip():
+    state = {'room_id': 'r', 'score': {'red': 2, 'blue': 1}, 'ball': {'x': 1.5, 'y': -2.25}}
+    assert decode_checkpoint(encode_checkpoint(state)) == state
+
+
+def test_rejects_foreign_and_corrupt_blobs():
+    blob = encode_checkpoint({'tick': 1})
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(b'HX')
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(b'XXXX' + blob[4:])
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(blob[:5] + b'not zlib')
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(blob[:4] + bytes([99]) + blob[5:])
+
+
+def test_engine_resumes_from_checkpoint():
+    engine = GameEngine('room', map_name=None)
+    engine.add_player('s1', 'Ana', 'red')
+    engine.add_player('s2', 'Bo', 'blue')
+    engine.update_player_input('s1', {'d': True}, kick=True)
+    for _ in range(200):
+        engine.update_physics()
+    engine.score['red'] = 3
+
+    restored = GameEngine.from_checkpoint(engine.to_checkpoint())
+    assert restored.tick == engine.tick
+    assert restored.score == engine.score
+    assert restored.ball == engine.ball
+    assert restored.players == engine.players
+    assert restored.stats.summary() == engine.stats.summary()
+
+    # Both continue identically from neutral inputs
+    engine.update_player_input('s1', {}, kick=False)
+    for _ in range(50):
+        engine.update_physics()
+        restored.update_physics()
+    assert restored.ball == pytest.approx(engine.ball)
+
+
+async def start_match(sio, manager, sid='a1', username='ana'):
+    """Room with one human on red and a bot on blue, match running"""
+    await sio.connect(sid)
+    await sio.call('create_room', sid, {'name': 'Drain', 'host': username, 'mode': '1v1', 'placed': True})
+    room_id = sio.events('room_created')[-1]['room']['id']
+    await sio.call('change_team', sid, {'team': 'red'})
+    await sio.call('player_ready', sid, {'ready': True})
+    await sio.call('add_bot', sid, {'team': 'blue'})
+    await sio.call('start_game', sid)
+    assert room_id in manager.game_engines
+    return room_id
+
+
+def test_drained_match_is_restored_on_another_node(mongo):
+    from tests.fakes import FakeSio
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        old_sio, new_sio = FakeSio(), FakeSio()
+        old, new = SocketManager(old_sio, mongo), SocketManager(new_sio, mongo)
+        room_id = await start_match(old_sio, old)
+
+        assert await old.drain_rooms() == 1
+        assert old_sio.events('server_draining', room=room_id) == [{'roomId': room_id}]
+        assert room_id not in old.rooms
+        # A client that reconnects to the draining node is told to try again elsewhere
+        await old_sio.connect('a2')
+        await old_sio.call('join_room', 'a2', {'roomId': room_id, 'username': 'ana'})
+        assert old_sio.events('server_draining', room='a2') == [{'roomId': room_id}]
+
+        await new_sio.connect('b1')
+        await new_sio.call('join_room', 'b1', {'roomId': room_id, 'username': 'ana'})
+        engine = new.game_engines[room_id]
+        assert 'b1' in engine.players
+        assert [p.username for p in new.rooms[room_id]] == ['Bot 1', 'ana']
+        # Everyone is back: the match resumes and the expiry task is gone
+        assert room_id not in new.pending_rejoins
+        assert new.rejoin_tasks == {}
+        assert not engine.paused
+
+    asyncio.run(scenario())
+
+
+def test_unclaimed_rejoins_expire(mongo):
+    from tests.fakes import FakeSio
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        old_sio, new_sio = FakeSio(), FakeSio()
+        old, new = SocketManager(old_sio, mongo), SocketManager(new_sio, mongo)
+        new.REJOIN_TIMEOUT = 0.05
+        room_id = await start_match(old_sio, old)
+        await old.drain_rooms()
+
+        # A spectator restores the match, but its player never comes back
+        await new_sio.connect('b1')
+        await new_sio.call('join_room', 'b1', {'roomId': room_id, 'username': 'someone'})
+        assert room_id in new.rejoin_tasks
+        await asyncio.sleep(0.1)
+        assert new.rejoin_tasks == {}
+        assert 'a1' not in new.game_engines[room_id].players
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from collision import sweep_capsule, sweep_circle, sweep_line_crossing
+from game_engine import GameEngine
+
+
+def segment(ax, ay, bx, by):
+    length = math.hypot(bx - ax, by - ay)
+    return (ax, ay, bx, by, (bx - ax) / length, (by - ay) / length, length)
+
+
+def test_sweep_circle_time_of_impact():
+    # Point moving right from x=0 hits a circle of radius 10 centred at x=50 at x=40
+    t, nx, ny = sweep_circle(0, 0, 100, 0, 50, 0, 10)
+    assert t == pytest.approx(0.4)
+    assert (nx, ny) == pytest.approx((-1, 0))
+
+
+def test_sweep_circle_misses():
+    assert sweep_circle(0, 0, 30, 0, 50, 0, 10) is None  # Stops short
+    assert sweep_circle(0, 20, 100, 0, 50, 0, 10) is None  # Passes beside
+    assert sweep_circle(0, 0, -100, 0, 50, 0, 10) is None  # Moving away
+    assert sweep_circle(45, 0, 100, 0, 50, 0, 10) is None  # Already overlapping
+
+
+def test_sweep_capsule_flat_side_and_ends():
+    wall = segment(0, 100, 200, 100)
+    t, nx, ny = sweep_capsule(50, 0, 0, 200, wall, 10)
+    assert t == pytest.approx(90 / 200)
+    assert (nx, ny) == pytest.approx((0, -1))
+    # Beyond the end of the segment only the rounded cap is hit
+    t, nx, ny = sweep_capsule(205, 0, 0, 200, wall, 10)
+    assert 90 / 200 < t < 1
+    assert nx > 0 and ny < 0
+
+
+def test_sweep_line_crossing_inside_extent_only():
+    goal = segment(0, 0, 0, 100)
+    assert sweep_line_crossing(50, 50, -100, 0, goal, 1, 0, 10) == pytest.approx(0.4)
+    assert sweep_line_crossing(50, 150, -100, 0, goal, 1, 0, 10) is None
+    assert sweep_line_crossing(50, 50, 100, 0, goal, 1, 0, 10) is None
+
+
+def open_play_engine() -> GameEngine:
+    engine = GameEngine('test')
+    engine.kickoff_team = None
+    engine.ball_touched = True
+    engine.game_started = True
+    return engine
+
+
+@pytest.mark.parametrize('hz', [90, 30])
+def test_fast_ball_does_not_tunnel_through_player(hz):
+    engine = open_play_engine()
+    engine.add_player('p1', 'Keeper', 'red')
+    keeper = engine.players['p1']
+    keeper.update(x=700, y=300, vx=0, vy=0)
+    # 60 units per base tick: at 30 Hz one step moves the ball 180 units, more than the keeper is wide
+    engine.ball.update(x=500, y=300, vx=60, vy=0)
+    for _ in range(hz // 3):
+        engine.update_physics(1 / hz)
+        assert engine.ball['x'] < keeper['x']
+    assert engine.stats.players['Keeper']['touches'] == 1
+
+
+def run_free_ball(hz: int, seconds: float = 1.0) -> dict:
+    engine = open_play_engine()
+    engine.ball.update(x=700, y=300, vx=4, vy=-3)
+    for _ in range(int(seconds * hz)):
+        engine.update_physics(1 / hz)
+    return engine.ball
+
+
+def test_ball_travel_is_independent_of_tick_rate():
+    at_90 = run_free_ball(90)
+    at_30 = run_free_ball(30)
+    for key in ('x', 'y', 'vx', 'vy'):
+        assert at_30[key] == pytest.approx(at_90[key], rel=1e-9, abs=1e-9)
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from database import LazyDatabase
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+
+def test_server_import_does_not_load_the_driver():
+    code = (
+        'import sys, server; '
+        'loaded = [m for m in sys.modules if m.split(".")[0] in ("motor", "pymongo")]; '
+        'print(server.db.connected, loaded)'
+    )
+    env = {**os.environ, 'MONGO_URL': 'mongodb://127.0.0.1:1', 'DB_NAME': 'test'}
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'False []'
+
+
+def test_missing_settings_fail_on_first_use(monkeypatch):
+    monkeypatch.delenv('MONGO_URL', raising=False)
+    monkeypatch.setenv('DB_NAME', 'haxball_test')
+    db = LazyDatabase()
+    assert not db.connected
+    with pytest.raises(RuntimeError, match='MONGO_URL'):
+        db.users
+    with pytest.raises(AttributeError):
+        db._private
+
+
+def test_client_is_created_once(monkeypatch):
+    pytest.importorskip('motor')
+    monkeypatch.setenv('DB_NAME', 'haxball_test')
+    db = LazyDatabase(url='mongodb://127.0.0.1:1', max_pool_size=5)
+    users = db.users  # Creating the client does not connect
+    assert db.connected
+    assert users.name == 'users' and db['rooms'].name == 'rooms'
+    assert db.database.name == 'haxball_test'
+    assert db.client is db.client
+    assert db.client.options.pool_options.max_pool_size == 5
+    db.close()
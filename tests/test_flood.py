@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import flood
+from flood import FloodGuard, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=100.0)
+    monkeypatch.setattr(flood, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_token_bucket_burst_and_refill():
+    bucket = TokenBucket(rate=2, burst=3, now=0)
+    assert [bucket.take(0) for _ in range(4)] == [True, True, True, False]
+    assert bucket.take(0.5)  # One token back after half a second
+    assert not bucket.take(0.5)
+    assert [bucket.take(10) for _ in range(4)] == [True, True, True, False]  # Never above burst
+
+
+def test_limits_are_per_sid_and_event(clock):
+    guard = FloodGuard({'chat_message': (1, 2)})
+    assert [guard.allow('a', 'chat_message') for _ in range(3)] == [True, True, False]
+    assert guard.allow('b', 'chat_message')
+    assert all(guard.allow('a', 'leave_room') for _ in range(10))  # No limit configured
+    clock.value += 1
+    assert guard.allow('a', 'chat_message')
+    assert guard.stats()['dropped'] == {'chat_message': 1}
+
+    guard.forget('a')
+    assert 'a' not in guard.buckets
+
+
+def test_over_limit_inputs_are_coalesced():
+    guard = FloodGuard()
+    guard.coalesce_input('a', {'keys': {'up': True}, 'kick': True})
+    guard.coalesce_input('a', {'keys': {'left': True}, 'push': True})
+    guard.coalesce_input('a', {'keys': {'left': True}})
+    assert guard.stats()['coalesced_inputs'] == 3
+    # Latest keys; kick and push survive from earlier inputs
+    assert guard.take_input('a') == {'keys': {'left': True}, 'kick': True, 'push': True}
+    assert guard.take_input('a') is None
+
+
+def test_chat_flood_drops_messages(sio, clock):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        manager.flood.limits['chat_message'] = (1, 2)
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'Chat', 'host': 'ana', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        for n in range(4):
+            await sio.call('chat_message', 's1', {'message': f'm{n}'})
+        return [m['message'] for m in sio.events('chat_message', room=room_id)]
+
+    assert asyncio.run(scenario()) == ['m0', 'm1']
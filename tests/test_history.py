@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from history import CursorError, MatchHistory, decode_cursor, encode_cursor
+from models import GameSession, PlayerStats
+
+
+def test_cursor_round_trip():
+    end_time = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor(end_time, 'match-1')) == (end_time, 'match-1')
+
+
+def test_invalid_cursor():
+    with pytest.raises(CursorError):
+        decode_cursor('not a cursor')
+
+
+def test_pages_cover_every_match_once():
+    mongomock_motor = pytest.importorskip('mongomock_motor')
+    history = MatchHistory(mongomock_motor.AsyncMongoMockClient()['test'])
+    start = datetime(2024, 1, 1)
+
+    async def scenario():
+        for i in range(7):
+            # Matches 2 and 3 end at the same instant: the id breaks the tie
+            end_time = start + timedelta(minutes=min(i, 2) if i < 4 else i)
+            await history.record(GameSession(
+                id=f'm{i}', room_id='room', start_time=start, end_time=end_time, winner='red',
+                player_stats=[PlayerStats(user_id='s', username='ana' if i % 2 else 'bo', team='red')]
+            ))
+        pages, cursor = [], None
+        while True:
+            page = await history.for_room('room', limit=3, cursor=cursor)
+            pages.append([match['id'] for match in page['matches']])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return pages, await history.for_user('ana', limit=10)
+
+    pages, ana = asyncio.run(scenario())
+    assert pages == [['m6', 'm5', 'm4'], ['m3', 'm2', 'm1'], ['m0']]
+    assert [match['id'] for match in ana['matches']] == ['m5', 'm3', 'm1']
+    assert all(len(match['player_stats']) == 1 for match in ana['matches'])
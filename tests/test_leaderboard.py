@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from leaderboard import Leaderboard
+from models import GameSession, PlayerStats
+
+
+def entry(username, wins=0, goals=0, losses=0):
+    return {'username': username, 'wins': wins, 'goals': goals, 'losses': losses}
+
+
+def names(board):
+    return [row['username'] for row in board.top()]
+
+
+def test_offer_keeps_the_ranking_sorted():
+    board = Leaderboard(db=None, size=2, margin=1)
+    board.offer(entry('ana', wins=3))
+    board.offer(entry('bea', wins=5))
+    board.offer(entry('cris', wins=3, goals=4))
+    assert names(board) == ['bea', 'cris']
+    assert [row['rank'] for row in board.top()] == [1, 2]
+
+    board.offer(entry('dani', wins=1))  # Below the kept range
+    assert 'dani' not in board.entries
+    board.offer(entry('ana', wins=6))  # Moves up, the margin fills the visible top
+    assert names(board) == ['ana', 'bea']
+    assert board.top(limit=10) == board.top()
+    assert len(board.ranking) == len(board.entries) == 3
+
+
+def test_reconcile_and_match_results(mongo):
+    async def scenario():
+        await mongo.users.insert_many([
+            {'username': 'ana', 'stats': {'wins': 2, 'losses': 0, 'goals': 5}},
+            {'username': 'bea', 'stats': {'wins': 2, 'losses': 1, 'goals': 5}},
+            {'username': 'cris'},
+        ])
+        board = Leaderboard(mongo, size=10)
+        body = json.loads(await board.encoded())
+        before = [row['username'] for row in body['leaderboard']]
+
+        session = GameSession(room_id='r', winner='blue', player_stats=[
+            PlayerStats(user_id='s1', username='ana', team='red', goals=1),
+            PlayerStats(user_id='s2', username='cris', team='blue', goals=2),
+            PlayerStats(user_id='bot_1', username='Bot 1', team='blue'),
+            PlayerStats(user_id='s3', username='guest', team='blue'),
+        ])
+        await board.record_match(session)
+        cached = await board.encoded()
+        assert cached is await board.encoded()  # Encoded once per change
+        stored = await mongo.users.find_one({'username': 'cris'}, {'_id': 0})
+        await board.reconcile()
+        return before, json.loads(cached)['leaderboard'], board.top(), stored
+
+    before, after, reconciled, cris = asyncio.run(scenario())
+    assert before == ['ana', 'bea', 'cris']
+    assert [(row['username'], row['wins'], row['losses']) for row in after] == [
+        ('ana', 2, 1), ('bea', 2, 1), ('cris', 1, 0)  # ana's goal breaks the tie
+    ]
+    assert reconciled == after  # The incremental ranking matches a reload
+    assert cris['stats'] == {'goals': 2, 'wins': 1}
@@ -0,0 +1,64 @@
+import io
+import logging
+import queue
+
+import pytest
+
+from log_pipeline import DroppingQueueHandler, SamplingFilter, parse_sample_rates, setup_logging
+
+
+def record(event, level=logging.INFO, name='server'):
+    rec = logging.LogRecord(name, level, __file__, 1, 'msg', None, None)
+    if event:
+        rec.event = event
+    return rec
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates('connect=0.1, socketio=0,,x=3') == {'connect': 0.1, 'socketio': 0.0, 'x': 1.0}
+    assert parse_sample_rates('') == {}
+    with pytest.raises(ValueError):
+        parse_sample_rates('connect=often')
+
+
+def test_sampling_keeps_one_in_n_and_reports_the_rest():
+    sampler = SamplingFilter({'connect': 0.25, 'socketio': 0}, rate_limit=0)
+    kept = [sampler.filter(record('connect')) for _ in range(8)]
+    assert kept == [True, False, False, False] * 2
+    assert not any(sampler.filter(record(None, name='socketio')) for _ in range(3))
+    # Warnings are never sampled, and the next kept record counts the dropped ones
+    warning = record('connect', logging.WARNING)
+    assert sampler.filter(warning) and warning.suppressed == 3
+    kept = record('connect')
+    assert sampler.filter(kept) and not hasattr(kept, 'suppressed')
+
+
+def test_rate_limit_per_event():
+    sampler = SamplingFilter(rate_limit=5)
+    kept = [sampler.filter(record('error', logging.ERROR)) for _ in range(10)]
+    assert kept.count(True) == 5
+    assert sampler.filter(record('other', logging.ERROR))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.enqueue(record('x'))
+    assert handler.dropped == 3
+
+
+def test_setup_logging_writes_structured_lines():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+    try:
+        listener = setup_logging(stream=stream)
+        logging.getLogger('test').info('hola', extra={'event': 'join_room', 'room': 'r1'})
+        listener.stop()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+    assert 'hola [event=join_room room=r1]' in stream.getvalue()
@@ -0,0 +1,65 @@
+import pytest
+
+from maps import CompiledMap, MapError, available_maps, load_map
+
+
+def spec(**overrides):
+    base = {
+        'name': 'Test',
+        'width': 400,
+        'height': 200,
+        'walls': [[0, 0, 400, 0], [0, 200, 400, 200]],
+        'posts': [{'segment': [0, 80, 0, 80.5], 'radius': 5}],
+        'goals': [
+            {'team': 'red', 'segment': [0, 80, 0, 120]},
+            {'team': 'blue', 'segment': [400, 80, 400, 120]},
+        ],
+        'spawns': {'red': [[100, 100], [100, 50]]},
+    }
+    base.update(overrides)
+    return base
+
+
+def test_load_map_is_shared_and_case_insensitive():
+    assert 'Classic' in available_maps()
+    assert load_map('classic') is load_map('Classic') is load_map()
+    with pytest.raises(MapError):
+        load_map('Nowhere')
+
+
+def test_compiled_map_is_immutable():
+    field = CompiledMap(spec())
+    with pytest.raises(AttributeError):
+        field.width = 10
+
+
+def test_goal_normals_face_the_field():
+    field = CompiledMap(spec())
+    normals = {team: (nx, ny) for team, _, _, nx, ny in field.goals}
+    assert normals['red'] == pytest.approx((1, 0))
+    assert normals['blue'] == pytest.approx((-1, 0))
+    assert field.goal_centers['blue'] == (400, 100)
+
+
+def test_grid_query_returns_nearby_segments_only():
+    field = CompiledMap(spec(), cell_size=50)
+    kinds = lambda found: sorted(field.segments[i][2] for i in found)
+    assert kinds(field.query(150, 10, 160, 20)) == ['wall']
+    assert kinds(field.query(0, 70, 10, 90)) == ['post']
+    assert set(field.query(0, 0, 400, 200)) == set(range(len(field.segments)))
+
+
+def test_spawn_points_cycle():
+    field = CompiledMap(spec())
+    assert field.spawn_point('red', 2) == (100.0, 100.0)
+    assert field.spawn_point('blue', 0) is None
+
+
+@pytest.mark.parametrize('bad', [
+    {'goals': [{'team': 'red', 'segment': [0, 80, 0, 120]}]},
+    {'walls': [[5, 5, 5, 5]]},
+    {'width': 'wide'},
+])
+def test_invalid_maps_raise_map_error(bad):
+    with pytest.raises(MapError):
+        CompiledMap(spec(**bad))
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+
+from models import GameSession, PlayerStats
+
+
+def test_failed_match_recording_is_logged(sio, caplog):
+    from socket_handlers import SocketManager
+
+    class BrokenHistory:
+        async def record(self, session):
+            raise RuntimeError('disk full')
+
+    async def scenario():
+        manager = SocketManager(sio, db=None, history=BrokenHistory())
+        session = GameSession(room_id='r', player_stats=[PlayerStats(user_id='s1', username='ana', team='red')])
+        task = manager.run_in_background(manager.record_match(session), 'record_match')
+        assert task in manager.background_tasks
+        await manager.wait_background()
+        await asyncio.sleep(0)
+        return manager
+
+    with caplog.at_level(logging.ERROR):
+        manager = asyncio.run(scenario())
+    assert manager.background_tasks == set()
+    assert 'disk full' in caplog.text
+
+
+def test_finished_match_is_recorded(sio, mongo):
+    from history import MatchHistory
+    from leaderboard import Leaderboard
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        await mongo.users.insert_one({'id': '1', 'username': 'ana', 'stats': {'wins': 0, 'losses': 0, 'goals': 0}})
+        manager = SocketManager(sio, mongo, history=MatchHistory(mongo), leaderboard=Leaderboard(mongo))
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'R', 'host': 'ana', 'mode': '1v1', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        await sio.call('change_team', 's1', {'team': 'red'})
+        await sio.call('player_ready', 's1', {'ready': True})
+        await sio.call('add_bot', 's1', {'team': 'blue'})
+        await sio.call('start_game', 's1')
+        manager.game_engines[room_id].score['red'] = 1
+        await manager.end_game(room_id)
+        await manager.wait_background()
+        return room_id, await manager.history.for_room(room_id), await mongo.users.find_one({'username': 'ana'})
+
+    room_id, page, ana = asyncio.run(scenario())
+    assert [match['winner'] for match in page['matches']] == ['red']
+    assert ana['stats']['wins'] == 1
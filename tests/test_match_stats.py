@@ -0,0 +1,62 @@
+import pytest
+
+from maps import load_map
+from match_stats import MatchStats
+
+
+def player(name, x, y):
+    return {'name': name, 'x': x, 'y': y}
+
+
+@pytest.mark.parametrize('hz', [30, 60, 90, 120])
+def test_heatmap_density_follows_game_time(hz):
+    stats = MatchStats(load_map())
+    players = {'s1': player('ana', 10, 10)}
+    for tick in range(hz):  # One second of play
+        stats.step(tick, players, scale=90 / hz)
+    summary = stats.summary()
+    assert summary['heatmap']['samples'] == 10
+    assert summary['players']['ana']['heatmap'][0][0] == 10
+
+
+def test_passes_chains_and_assists():
+    stats = MatchStats(load_map())
+    ball = {'x': 0, 'y': 0, 'vx': 0, 'vy': 0}
+    stats.kick('ana', 'red', 0, ball)
+    stats.touch('bea', 'red', 20)
+    stats.kick('bea', 'red', 21, ball)
+    stats.touch('cris', 'red', 40)
+    stats.goal('red')
+    summary = stats.summary()
+    assert summary['players']['ana']['passes'] == 1
+    assert summary['players']['bea']['passes'] == 1
+    assert summary['players']['bea']['assists'] == 1
+    assert summary['teams']['red']['longest_chain'] == 2
+    assert summary['teams']['red']['chains'] == 1
+
+
+def test_interception_ends_the_chain():
+    stats = MatchStats(load_map())
+    ball = {'x': 0, 'y': 0, 'vx': 0, 'vy': 0}
+    stats.kick('ana', 'red', 0, ball)
+    stats.touch('bea', 'red', 20)
+    stats.touch('dani', 'blue', 40)
+    stats.goal('blue')
+    summary = stats.summary()
+    assert summary['teams']['red']['chains'] == 1
+    assert summary['players']['bea']['assists'] == 0
+
+
+def test_state_round_trip_keeps_the_sample_clock():
+    field = load_map()
+    stats = MatchStats(field)
+    players = {'s1': player('ana', 10, 10)}
+    for tick in range(13):
+        stats.step(tick, players)
+    restored = MatchStats(field)
+    restored.load_state(stats.to_state())
+    for tick in range(13, 18):
+        stats.step(tick, players)
+        restored.step(tick, players)
+    assert restored.summary() == stats.summary()
+    assert stats.summary()['heatmap']['samples'] == 2
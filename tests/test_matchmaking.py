@@ -0,0 +1,112 @@
+import asyncio
+
+from matchmaking import MatchQueue, balance_teams, rating_of
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rating_of():
+    assert rating_of(None) == 1000
+    assert rating_of({'wins': 6, 'losses': 2}) == 1100
+
+
+def test_match_waits_for_enough_players_of_the_mode():
+    queue = MatchQueue(clock=Clock())
+    first = queue.add('s1', 'ana', 1000, '1v1')
+    queue.add('s2', 'bo', 1000, '3v3')
+    assert queue.find_match(first, 2) is None
+    queue.add('s3', 'cy', 1050, '1v1')
+    players = queue.find_match(first, 2)
+    assert [p.sid for p in players] == ['s1', 's3']
+    assert 's1' not in queue and 's3' not in queue
+    assert len(queue) == 1
+
+
+def test_rating_window_widens_with_waiting_time():
+    clock = Clock()
+    queue = MatchQueue(bucket_width=100, widen_after=10, max_radius=2, clock=clock)
+    low = queue.add('s1', 'ana', 1000, '1v1')
+    queue.add('s2', 'pro', 1250, '1v1')  # Two buckets away
+    assert queue.find_match(low, 2) is None
+    clock.now = 10  # One bucket on each side
+    assert queue.find_match(low, 2) is None
+    clock.now = 20
+    assert [p.sid for p in queue.find_match(low, 2)] == ['s1', 's2']
+
+
+def test_window_stops_at_max_radius():
+    clock = Clock()
+    queue = MatchQueue(bucket_width=100, widen_after=10, max_radius=1, clock=clock)
+    low = queue.add('s1', 'ana', 1000, '1v1')
+    queue.add('s2', 'pro', 1500, '1v1')
+    clock.now = 1000
+    assert queue.find_match(low, 2) is None
+
+
+def test_closest_ratings_are_matched_first():
+    clock = Clock()
+    queue = MatchQueue(bucket_width=100, widen_after=10, clock=clock)
+    queue.add('far', 'far', 1200, '1v1')
+    queue.add('near', 'near', 1010, '1v1')
+    me = queue.add('me', 'me', 1000, '1v1')
+    clock.now = 100
+    assert [p.sid for p in queue.find_match(me, 2)] == ['me', 'near']
+
+
+def test_balance_teams_splits_evenly_with_close_totals():
+    queue = MatchQueue(clock=Clock())
+    tickets = [queue.add(f's{r}', f'p{r}', r, 'classic') for r in (1400, 1300, 1000, 1000, 900, 800)]
+    red, blue = balance_teams(tickets)
+    assert len(red) == len(blue) == 3
+    assert abs(sum(t.rating for t in red) - sum(t.rating for t in blue)) <= 100
+
+
+def test_queue_to_match_flow(sio, mongo):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        await mongo.users.insert_one({'id': '1', 'username': 'pro', 'stats': {'wins': 2, 'losses': 0}})
+        manager = SocketManager(sio, mongo)
+        await sio.connect('s1')
+        await sio.connect('s2')
+        await sio.call('join_queue', 's1', {'username': 'pro', 'mode': '1v1'})
+        assert sio.events('queue_joined', room='s1') == [{'mode': '1v1', 'rating': 1050, 'queued': 1}]
+        await sio.call('join_queue', 's2', {'username': 'new', 'mode': '1v1'})
+
+        room = sio.events('match_found')[0]['room']
+        assert not room['listed']
+        assert sorted((p['username'], p['team']) for p in room['players']) == [('new', 'blue'), ('pro', 'red')]
+        assert all(p['ready'] for p in room['players'])
+        assert len(manager.match_queue) == 0
+        # Both players are in the room and the match started without anyone pressing start
+        for sid in ('s1', 's2'):
+            assert sio.sessions[sid]['room_id'] == room['id']
+            assert room['id'] in sio.rooms[sid]
+        assert room['id'] in manager.game_engines
+        assert sio.events('game_started', room=room['id'])
+        # Matchmade rooms stay out of the lobby list
+        assert room['id'] not in [r['id'] for r in await manager.list_rooms()]
+        # Rated through the user cache: the next join does not read the database
+        assert manager.users.cache.get('pro')['stats']['wins'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_leave_queue(sio, mongo):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, mongo)
+        await sio.connect('s1')
+        await sio.call('join_queue', 's1', {'username': 'ana', 'mode': '3v3'})
+        await sio.call('leave_queue', 's1')
+        assert sio.events('queue_left', room='s1') == [{}]
+        assert len(manager.match_queue) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,80 @@
+import asyncio
+
+from outbound import RoomOutbox
+
+
+class Recorder:
+    def __init__(self, delay: float = 0):
+        self.sent = []
+        self.delay = delay
+
+    async def __call__(self, event, data, room=None):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append((event, data, room))
+
+
+def test_events_before_snapshot_and_latest_snapshot_wins():
+    async def scenario():
+        emit = Recorder()
+        outbox = RoomOutbox('room', emit)
+        outbox.put_snapshot({'tick': 1})
+        outbox.put_event('goal_scored', {'team': 'red'})
+        outbox.put_snapshot({'tick': 2})
+        outbox.put_snapshot({'tick': 3})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        outbox.task.cancel()
+        return emit.sent, outbox.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == [('goal_scored', {'team': 'red'}, 'room'), ('game_state', {'tick': 3}, 'room')]
+    assert stats['sent_snapshots'] == 1
+    assert stats['dropped_snapshots'] == 2
+
+
+def test_slow_sender_skips_stale_snapshots():
+    async def scenario():
+        emit = Recorder(delay=0.01)
+        outbox = RoomOutbox('room', emit)
+        for tick in range(20):
+            outbox.put_snapshot({'tick': tick})
+            await asyncio.sleep(0.002)
+        outbox.close()
+        await asyncio.wait_for(outbox.task, 1)
+        return emit.sent, outbox.stats()
+
+    sent, stats = asyncio.run(scenario())
+    ticks = [data['tick'] for _, data, _ in sent]
+    assert ticks == sorted(ticks)
+    assert len(ticks) < 20
+    assert stats['sent_snapshots'] + stats['dropped_snapshots'] == 20
+
+
+def test_reliable_events_are_bounded():
+    async def scenario():
+        emit = Recorder()
+        outbox = RoomOutbox('room', emit, max_events=2)
+        accepted = [outbox.put_event('chat_message', {'n': n}) for n in range(3)]
+        outbox.close()
+        await asyncio.wait_for(outbox.task, 1)
+        return accepted, emit.sent, outbox.stats()
+
+    accepted, sent, stats = asyncio.run(scenario())
+    assert accepted == [True, True, False]
+    assert [data['n'] for _, data, _ in sent] == [0, 1]
+    assert stats['dropped_events'] == 1
+
+
+def test_close_flushes_events_and_drops_pending_snapshot():
+    async def scenario():
+        emit = Recorder()
+        outbox = RoomOutbox('room', emit)
+        outbox.put_event('game_over', {'winner': 'blue'})
+        outbox.put_snapshot({'tick': 9})
+        outbox.close()
+        outbox.put_event('goal_scored', {'team': 'red'})  # Refused once closing
+        await asyncio.wait_for(outbox.task, 1)
+        return emit.sent
+
+    assert asyncio.run(scenario()) == [('game_over', {'winner': 'blue'}, 'room')]
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from room_directory import InMemoryRoomDirectory, MongoRoomDirectory, RoomDirectory
+
+
+def test_directory_base_is_abstract():
+    with pytest.raises(TypeError):
+        RoomDirectory()
+
+    class Partial(RoomDirectory):
+        async def register_room(self, room_id, node_id, node_url, summary):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def directory_scenario(directory):
+    async def scenario():
+        await directory.register_room('r1', 'node-a', 'http://a', {'id': 'r1', 'name': 'Uno'})
+        await directory.register_room('r2', 'node-b', 'http://b', {'id': 'r2', 'name': 'Dos'})
+        # Only the owner can remove its entry
+        await directory.unregister_room('r1', 'node-b')
+        owner = await directory.owner_of('r1')
+        await directory.unregister_room('r2', 'node-b')
+        rooms = await directory.list_rooms()
+        await directory.report_load('node-a', 'http://a', {'rooms': 1})
+        return owner, rooms, await directory.owner_of('r2'), await directory.list_nodes()
+
+    return asyncio.run(scenario())
+
+
+def test_in_memory_directory():
+    owner, rooms, gone, nodes = directory_scenario(InMemoryRoomDirectory())
+    assert owner == {'node_id': 'node-a', 'node_url': 'http://a'}
+    assert rooms == [{'id': 'r1', 'name': 'Uno', 'node_id': 'node-a', 'node_url': 'http://a'}]
+    assert gone is None
+    assert nodes == [{'rooms': 1, 'node_id': 'node-a', 'node_url': 'http://a'}]
+
+
+def test_mongo_directory_expires_through_ttl_index(mongo):
+    directory = MongoRoomDirectory(mongo, ttl_seconds=12)
+    owner, rooms, gone, nodes = directory_scenario(directory)
+    assert owner == {'node_id': 'node-a', 'node_url': 'http://a'}
+    assert rooms == [{'id': 'r1', 'name': 'Uno', 'node_id': 'node-a', 'node_url': 'http://a'}]
+    assert gone is None
+    assert nodes == [{'rooms': 1, 'node_id': 'node-a', 'node_url': 'http://a'}]
+
+    async def ttl_indexes():
+        found = {}
+        for collection in (directory.collection, directory.nodes):
+            info = await collection.index_information()
+            found[collection.name] = [
+                index.get('expireAfterSeconds') for index in info.values() if index['key'] == [('updated_at', 1)]
+            ]
+        return found
+
+    assert asyncio.run(ttl_indexes()) == {'room_directory': [12], 'room_directory_nodes': [12]}
@@ -0,0 +1,75 @@
+import pytest
+
+from room_state import RoomState
+
+
+def recount(room):
+    """Counters recomputed from scratch, to compare with the incremental ones"""
+    teams = {'red': 0, 'blue': 0, 'spectator': 0}
+    for player in room:
+        teams[player.team] += 1
+    unready = sum(1 for p in room if p.team != 'spectator' and not p.ready)
+    bots = sum(1 for p in room if p.user_id.startswith('bot_'))
+    return teams, unready, bots
+
+
+def check(room):
+    assert (room.team_counts, room.unready_count, room.bot_count) == recount(room)
+
+
+def test_counters_follow_every_change():
+    room = RoomState('r', 'Sala', 'ana')
+    room.add_player('s1', 'ana')
+    room.add_player('s2', 'bea', team='red')
+    room.add_player('bot_1', 'Bot 1', team='blue', ready=True)
+    check(room)
+    assert not room.all_ready and room.human_count == 2
+
+    room.set_team('s1', 'blue')
+    room.set_ready('s1', True)
+    room.set_ready('s2', True)
+    check(room)
+    assert room.all_ready
+
+    room.add_player('s2', 'bea')  # Rejoining replaces the old entry
+    room.remove_player('bot_1')
+    check(room)
+    assert room.current_players == 2 and room.bot_count == 0
+
+
+def test_unknown_players_and_teams():
+    room = RoomState('r', 'Sala', 'ana')
+    assert not room.set_team('ghost', 'red')
+    assert not room.set_ready('ghost', True)
+    assert room.remove_player('ghost') is None
+    room.add_player('s1', 'ana')
+    with pytest.raises(ValueError):
+        room.set_team('s1', 'green')
+    with pytest.raises(ValueError):
+        room.add_player('s2', 'bea', team='green')
+
+
+def test_reset_ready_keeps_bots_ready():
+    room = RoomState('r', 'Sala', 'ana')
+    room.add_player('s1', 'ana', team='red', ready=True)
+    room.add_player('bot_1', room.bot_name(), team='blue', ready=True)
+    room.reset_ready()
+    check(room)
+    assert [(p.username, p.ready) for p in room] == [('ana', False), ('Bot 1', True)]
+
+
+def test_bot_names_reuse_the_lowest_free_number():
+    room = RoomState('r', 'Sala', 'ana')
+    for n in range(3):
+        room.add_player(f'bot_{n}', room.bot_name(), team='red')
+    room.remove_player('bot_1')
+    assert room.bot_name() == 'Bot 2'
+
+
+def test_to_dict_keeps_join_order():
+    room = RoomState('r', 'Sala', 'ana', max_players=2, mode='1v1')
+    room.add_player('s2', 'bea')
+    room.add_player('s1', 'ana', team='red')
+    data = room.to_dict()
+    assert [p['username'] for p in data['players']] == ['bea', 'ana']
+    assert (data['current_players'], data['maxPlayers'], data['mode']) == (2, 2, '1v1')
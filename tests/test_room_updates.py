@@ -0,0 +1,53 @@
+import asyncio
+
+
+async def open_room(sio, manager):
+    await sio.connect('s1')
+    await sio.call('create_room', 's1', {'name': 'Churn', 'host': 'ana', 'placed': True})
+    room_id = sio.events('room_created')[0]['room']['id']
+    await sio.connect('s2')
+    await sio.call('join_room', 's2', {'roomId': room_id, 'username': 'bea'})
+    await asyncio.sleep(manager.ROOM_UPDATE_WINDOW * 2)  # Let the join go out
+    sio.emitted.clear()
+    return room_id
+
+
+def test_team_and_ready_churn_is_one_patch(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        room_id = await open_room(sio, manager)
+        for team in ('red', 'blue', 'red'):
+            await sio.call('change_team', 's1', {'team': team})
+        await sio.call('change_team', 's2', {'team': 'blue'})
+        await sio.call('player_ready', 's2', {'ready': True})
+        assert sio.events('room_patch', room=room_id) == []
+        await asyncio.sleep(manager.ROOM_UPDATE_WINDOW * 2)
+        return room_id, manager
+
+    room_id, manager = asyncio.run(scenario())
+    patches = sio.events('room_patch', room=room_id)
+    assert len(patches) == 1 and sio.events('room_updated', room=room_id) == []
+    players = {p['username']: (p['team'], p['ready']) for p in patches[0]['players']}
+    assert players == {'ana': ('red', False), 'bea': ('blue', True)}
+    assert manager.dirty_rooms == {} and manager.room_update_tasks == {}
+
+
+def test_full_update_absorbs_player_changes(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        room_id = await open_room(sio, manager)
+        await sio.call('player_ready', 's2', {'ready': True})
+        manager.mark_room_dirty(room_id)
+        await sio.call('change_team', 's1', {'team': 'red'})
+        await asyncio.sleep(manager.ROOM_UPDATE_WINDOW * 2)
+        return room_id
+
+    room_id = asyncio.run(scenario())
+    assert sio.events('room_patch', room=room_id) == []
+    updates = sio.events('room_updated', room=room_id)
+    assert len(updates) == 1
+    assert {p['username']: p['team'] for p in updates[0]['room']['players']} == {'ana': 'red', 'bea': 'spectator'}
@@ -0,0 +1,36 @@
+import dataclasses
+
+import pytest
+
+from game_engine import GameEngine
+from rules import PRESETS, get_rules
+
+
+def test_presets_are_shared_and_frozen():
+    rules = get_rules('Futsal')
+    assert rules is get_rules('futsal') is PRESETS['futsal']
+    assert get_rules(None) is get_rules('classic')
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        rules.kick_power = 99
+    with pytest.raises(TypeError):
+        PRESETS['custom'] = rules
+    with pytest.raises(ValueError):
+        get_rules('rugby')
+
+
+def test_derived_distances():
+    rules = get_rules('classic')
+    assert rules.player_diameter == 2 * rules.player_radius
+    assert rules.contact_distance == rules.player_radius + rules.ball_radius
+    assert rules.kick_distance == rules.contact_distance + rules.kick_reach
+    assert rules.pickup_distance == rules.player_radius + rules.powerup_radius
+    custom = dataclasses.replace(rules, player_radius=30)
+    assert custom.pickup_distance == 30 + rules.powerup_radius
+
+
+def test_engines_share_rules_and_map():
+    first = GameEngine('a', get_rules('3v3'))
+    second = GameEngine('b', get_rules('3v3'))
+    assert first.rules is second.rules
+    assert first.map is second.map
+    assert first.time_remaining == 300
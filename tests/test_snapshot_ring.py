@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+import snapshot_ring
+from snapshot_ring import RingReader, SnapshotRing, discover_rings, ring_name
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+
+@pytest.fixture
+def ring():
+    if not os.path.isdir(snapshot_ring.SHM_DIR):
+        pytest.skip('POSIX shared memory not available')
+    ring = SnapshotRing.create(f'hxtest_{uuid.uuid4().hex[:8]}', slots=4, slot_size=64)
+    yield ring
+    ring.close()
+
+
+def test_publish_and_read_from_another_process(ring):
+    assert ring.publish('room1', 7, b'{"t":7}')
+    assert not ring.publish('room1', 8, b'x' * ring.max_payload)  # Does not fit with the room id
+    code = (
+        'import sys; from snapshot_ring import SnapshotRing; '
+        'ring = SnapshotRing.attach(sys.argv[1]); '
+        'room_id, tick, payload = ring.read(0); '
+        'print(ring.head(), room_id, tick, bytes(payload).decode()); '
+        'del payload; ring.close()'
+    )
+    result = subprocess.run([sys.executable, '-c', code, ring.name], cwd=BACKEND,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['1', 'room1', '7', '{"t":7}']
+    assert result.stderr == ''  # The reader did not unlink or warn about the segment
+    assert ring.head() == 1
+
+
+def test_is_current_detects_overwritten_records(ring):
+    ring.publish('room1', 1, b'first')
+    room_id, tick, payload = ring.read(0)
+    copied = bytes(payload)
+    del payload
+    assert ring.is_current(0) and copied == b'first'
+    for tick in range(2, 6):  # Wraps around the four slots
+        ring.publish('room1', tick, b'later')
+    assert not ring.is_current(0)
+    assert ring.read(0) is None
+    assert ring.is_current(4)
+
+
+def test_reader_skips_what_it_lost(ring):
+    ring.publish('a', 0, b'old')  # Before the reader attached: not delivered
+    reader = RingReader(ring)
+    for tick in range(1, 8):
+        ring.publish('a', tick, b'p')
+    records = [(number, tick) for number, _, tick, payload in reader.poll()]
+    assert records == [(4, 4), (5, 5), (6, 6), (7, 7)]
+    assert reader.lost == 3
+    assert list(reader.poll()) == []
+
+
+def test_stale_ring_is_replaced(ring):
+    ring.publish('a', 1, b'p')
+    fresh = SnapshotRing.create(ring.name, slots=4, slot_size=64)
+    ring.owner = False  # Its segment was unlinked by create
+    try:
+        assert fresh.head() == 0
+    finally:
+        fresh.close()
+
+
+def test_discover_rings(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_ring, 'SHM_DIR', str(tmp_path))
+    for name in ('hx_12', 'hx_7', 'hx_relay', 'hx_12.tmp', 'other_3'):
+        (tmp_path / name).touch()
+    assert discover_rings('hx') == ['hx_12', 'hx_7']
+    assert ring_name('hx', 42) == 'hx_42'
+    monkeypatch.setattr(snapshot_ring, 'SHM_DIR', str(tmp_path / 'missing'))
+    assert discover_rings('hx') == []
@@ -0,0 +1,60 @@
+import asyncio
+import sys
+
+from game_engine import GameEngine
+from memory import deep_sizeof
+
+
+def test_leaks_are_reaped_on_the_second_sweep(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'Fugas', 'host': 'ana', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        # A player whose disconnect was never handled, and a room with only a bot left
+        manager.rooms[room_id].add_player('gone', 'fantasma')
+        await sio.call('create_room', 's1', {'name': 'Vacía', 'host': 'ana', 'placed': True})
+        empty_id = sio.events('room_created')[1]['room']['id']
+        manager.rooms[empty_id].remove_player('s1')
+        manager.rooms[empty_id].add_player('bot_1', 'Bot 1')
+        manager.dirty_rooms['old'] = None  # State of a room that no longer exists
+
+        first = await manager.sweep_rooms()
+        assert first['reaped'] == {'players': 0, 'rooms': 0, 'engines': 0, 'tasks': 0}
+        assert 'old' not in manager.dirty_rooms
+        second = await manager.sweep_rooms()
+        return manager, room_id, empty_id, second
+
+    manager, room_id, empty_id, report = asyncio.run(scenario())
+    assert report['reaped'] == {'players': 1, 'rooms': 1, 'engines': 0, 'tasks': 0}
+    assert manager.rooms[room_id].get('gone') is None
+    assert empty_id not in manager.rooms
+    assert set(report['room_bytes']) == {room_id}
+
+
+def test_transient_state_survives_one_sweep(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None)
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'Sala', 'host': 'ana', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        manager.rooms[room_id].add_player('joining', 'bea')
+        await manager.sweep_rooms()
+        await sio.connect('joining')  # Its connection completed before the next sweep
+        return manager, room_id, await manager.sweep_rooms()
+
+    manager, room_id, report = asyncio.run(scenario())
+    assert not any(report['reaped'].values())
+    assert manager.rooms[room_id].get('joining') is not None
+
+
+def test_engine_size_excludes_shared_rules_and_map():
+    engine = GameEngine('r')
+    assert deep_sizeof(engine, exclude=(engine.rules, engine.map)) < deep_sizeof(engine)
+    # Referenced twice, counted once
+    twice, once = [engine.map, engine.map], [engine.map]
+    assert deep_sizeof(twice) - sys.getsizeof(twice) == deep_sizeof(once) - sys.getsizeof(once)
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tick_budget import TickBudget
+
+
+def fake_clock(start=100.0):
+    now = SimpleNamespace(value=start)
+    return now, lambda: now.value
+
+
+def test_utilization_over_complete_seconds():
+    now, clock = fake_clock()
+    budget = TickBudget(window=2, clock=clock)
+    budget.record(0.3, period=1 / 90)
+    budget.record(0.2)
+    assert budget.utilization() == 0.0  # Current second not complete yet
+    now.value += 1
+    budget.record(0.1)
+    now.value += 1
+    assert budget.utilization() == pytest.approx(0.3)  # (0.5 + 0.1) / 2
+    assert budget.tick_percentiles()['p50'] == pytest.approx(0.3 * 90)
+
+
+def test_admission_assumes_the_average_game_cost():
+    now, clock = fake_clock()
+    budget = TickBudget(window=1, clock=clock)
+    budget.record(0.6)
+    now.value += 1
+    assert not budget.can_admit(active_games=2, threshold=0.8)  # 0.6 + 0.3
+    assert budget.can_admit(active_games=2, threshold=0.9)
+    assert TickBudget(clock=clock).can_admit(active_games=0, threshold=0.1)
+
+
+def test_starts_wait_for_budget(sio):
+    from socket_handlers import SocketManager
+
+    async def scenario():
+        manager = SocketManager(sio, db=None, tick_budget_threshold=0.5)
+        manager.ADMISSION_RETRY = 0.01
+        now, clock = fake_clock()
+        manager.tick_budget = TickBudget(window=1, clock=clock)
+        manager.tick_budget.record(0.9)  # Loop saturated by other matches
+        now.value += 1
+
+        await sio.connect('s1')
+        await sio.call('create_room', 's1', {'name': 'Cola', 'host': 'ana', 'mode': '1v1', 'placed': True})
+        room_id = sio.events('room_created')[0]['room']['id']
+        await sio.call('change_team', 's1', {'team': 'red'})
+        await sio.call('player_ready', 's1', {'ready': True})
+        await sio.call('add_bot', 's1', {'team': 'blue'})
+        await sio.call('start_game', 's1')
+        assert sio.events('game_queued', room=room_id) == [{'roomId': room_id, 'position': 1}]
+        assert room_id not in manager.game_engines
+
+        await asyncio.sleep(0.05)
+        assert room_id not in manager.game_engines
+        now.value += 2  # The busy second falls out of the window
+        await asyncio.sleep(0.05)
+        started = room_id in manager.game_engines
+        await manager.end_game(room_id)
+        return started
+
+    assert asyncio.run(scenario())
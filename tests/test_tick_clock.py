@@ -0,0 +1,56 @@
+import pytest
+
+from tick_clock import TickClock
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_clock(max_catch_up: int = 3):
+    clock = FakeClock()
+    return clock, TickClock(10, max_catch_up=max_catch_up, clock=clock)
+
+
+def test_first_tick_is_due_immediately():
+    clock, ticks = make_clock()
+    assert ticks.due() == (1, 0)
+    assert ticks.due() == (0, 0)
+    assert ticks.sleep_time() == pytest.approx(0.1)
+
+
+def test_deadlines_do_not_accumulate_jitter():
+    clock, ticks = make_clock()
+    for n in range(50):
+        clock.now = 100.0 + n * 0.1 + 0.03  # Every wakeup 30 ms late
+        assert ticks.due() == (1, 0)
+    assert ticks.next_deadline == pytest.approx(100.0 + 50 * 0.1)
+    assert ticks.ticks == 50
+    assert ticks.late_ticks == 0
+    assert ticks.drift == pytest.approx(0.03)
+
+
+def test_catches_up_missed_ticks():
+    clock, ticks = make_clock()
+    ticks.due()
+    clock.now += 0.25  # Ticks due at +0.1 and +0.2
+    assert ticks.due() == (2, 0)
+    assert ticks.late_ticks == 1
+    assert ticks.sleep_time() == pytest.approx(0.05)
+
+
+def test_skips_ticks_beyond_catch_up_limit():
+    clock, ticks = make_clock(max_catch_up=3)
+    ticks.due()
+    clock.now += 1.0  # Ticks due at +0.1 ... +1.0
+    assert ticks.due() == (4, 6)
+    assert ticks.ticks == 5
+    assert ticks.skipped_ticks == 6
+    # Skipped deadlines move forward, so the loop does not stay behind
+    assert ticks.due() == (0, 0)
+    assert ticks.sleep_time() == pytest.approx(0.1)
+    assert ticks.stats()['max_drift_ms'] == pytest.approx(900.0)  # Measured from the +0.1 deadline
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import trace_export
+from game_engine import GameEngine
+from trace_export import TraceRecorder, list_matches, read_manifest, read_match, read_season
+
+
+def record_match(root, ticks, writer=None):
+    engine = GameEngine('r')
+    engine.add_player('s1', 'ana', 'red')
+    engine.add_player('s2', 'bea', 'blue')
+    engine.trace = TraceRecorder(str(root), 'r', 'classic', 'Classic', 90, writer=writer)
+    engine.update_player_input('s1', {'right': True}, kick=False)
+    for _ in range(ticks):
+        engine.update_physics()
+    engine.trace.event(engine.tick, 'goal', team='red')
+    engine.trace.close()
+    return engine
+
+
+def test_npz_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_export, 'CHUNK_TICKS', 40)
+    engine = record_match(tmp_path, 100)
+    match_dir, = list_matches(str(tmp_path))
+    manifest = read_manifest(match_dir)
+    assert manifest['complete']
+    assert [p['name'] for p in manifest['players']] == ['ana', 'bea']
+    assert [c['ticks'] for c in manifest['chunks']] == [40, 40, 20]
+
+    data = read_match(match_dir, ['tick', 'ball_x', 'player', 'player_x', 'event_kind', 'event_team'])
+    assert data['tick'].tolist() == list(range(1, 101))
+    assert data['tick'].dtype == np.int32 and data['ball_x'].dtype == np.float32
+    assert data['player'].tolist() == [0, 1] * 100
+    assert data['player_x'][-2] == pytest.approx(engine.players['s1']['x'])
+    assert data['event_kind'][-1] == trace_export.EVENT_KINDS.index('goal')
+    assert data['event_team'][-1] == trace_export.TEAM_CODES['red']
+
+    # Only the chunks overlapping the range are read
+    window = read_match(match_dir, ['tick'], first_tick=50, last_tick=60)
+    assert window['tick'].tolist() == list(range(41, 81))
+
+
+def test_season_frame(tmp_path):
+    pytest.importorskip('pandas')
+    record_match(tmp_path, 10)
+    record_match(tmp_path, 5)
+    season = read_season(str(tmp_path), 'players', ['player_tick', 'player_x'])
+    assert len(season) == 30
+    assert set(season['player_name']) == {'ana', 'bea'}
+    assert season['match_id'].dtype == 'category' and season['match_id'].nunique() == 2
+
+
+def test_concurrent_writes_land_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_export, 'CHUNK_TICKS', 10)
+    threads = []
+    delays = iter([0.2, 0.1, 0.0, 0.0, 0.0])  # Earlier writes would finish last
+
+    def writer(fn, *args):
+        delay = next(delays, 0.0)
+        thread = threading.Thread(target=lambda: (time.sleep(delay), fn(*args)))
+        threads.append(thread)
+        thread.start()
+
+    record_match(tmp_path, 30, writer=writer)
+    for thread in threads:
+        thread.join()
+    match_dir, = list_matches(str(tmp_path))
+    manifest = read_manifest(match_dir)
+    assert manifest['complete']
+    assert [c['file'] for c in manifest['chunks']] == [f'chunk_{n:05d}.npz' for n in range(4)]
+    assert read_match(match_dir, ['tick'])['tick'].tolist() == list(range(1, 31))